@@ -0,0 +1,244 @@
+"""
+Send alerts (e.g., emails from a :class:`~msl.lab_logger.validators.Validator`) from a background thread.
+
+The thread that submits an alert never waits for the alert to be sent. Alerts
+with the same sensor and validator are rate limited, and the alerts that are
+submitted within the digest period are sent together as one message.
+
+The alerts are configured in the configuration file, for example::
+
+    <smtp>
+        <settings>settings.ini</settings>
+        <recipients>someone@example.com</recipients>
+    </smtp>
+    <alerts min_interval="3600" digest="60"/>
+
+or, to write the alerts to a local file instead of sending emails::
+
+    <alerts file="alerts.log"/>
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+import weakref
+from datetime import datetime
+from typing import NamedTuple, TYPE_CHECKING
+
+from .log import logger
+
+if TYPE_CHECKING:
+    from msl.equipment import Config
+
+
+class Alert(NamedTuple):
+    sensor: str
+    validator: str
+    subject: str
+    body: str
+    timestamp: datetime
+
+
+class Transport:
+    """Sends the text of an alert somewhere. Subclasses must override :meth:`.send`."""
+
+    def send(self, subject: str, body: str) -> None:
+        raise NotImplementedError('Subclass should implement this')
+
+
+class SMTPTransport(Transport):
+
+    def __init__(self, settings: str, recipients: list[str]) -> None:
+        """Send an alert as an email, see :func:`msl.io.send_email`.
+
+        Args:
+            settings: The path to the SMTP settings file.
+            recipients: The email addresses to send the alert to.
+        """
+        self.settings = settings
+        self.recipients = recipients
+
+    def send(self, subject: str, body: str) -> None:
+        from msl.io import send_email
+        send_email(self.settings, self.recipients, sender=None, subject=subject, body=body)
+
+
+class FileTransport(Transport):
+
+    def __init__(self, path: str) -> None:
+        """Append an alert to a local file, e.g., for testing or when there is no SMTP server.
+
+        Args:
+            path: The path to the file.
+        """
+        self.path = path
+
+    def send(self, subject: str, body: str) -> None:
+        with open(self.path, mode='at', encoding='utf-8') as fp:
+            fp.write(f'{datetime.now().isoformat(sep="T", timespec="seconds")} {subject}\n{body}\n\n')
+
+
+class AlertDispatcher:
+
+    def __init__(self,
+                 transport: Transport,
+                 *,
+                 min_interval: float = 3600,
+                 digest: float = 60,
+                 maxsize: int = 1000) -> None:
+        """Send alerts from a background thread.
+
+        Args:
+            transport: How to send the alerts.
+            min_interval: The minimum number of seconds between alerts that have
+                the same sensor and validator. The alerts that are suppressed are
+                counted and the count is included in the next alert that is sent.
+            digest: The number of seconds to wait, after an alert is submitted,
+                for other alerts to send together with it.
+            maxsize: The maximum number of alerts waiting to be sent. An alert
+                that is submitted when the queue is full is dropped.
+        """
+        self.transport = transport
+        self.min_interval = float(min_interval)
+        self.digest = float(digest)
+        self._lock = threading.Lock()
+        self._last_sent: dict[tuple[str, str], float] = {}
+        self._suppressed: dict[tuple[str, str], int] = {}
+        self._queue: queue.Queue[Alert | None] = queue.Queue(maxsize=int(maxsize))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='lab-logger-alerts', daemon=True)
+        self._thread.start()
+
+    def submit(self, sensor: str, validator: str, subject: str, body: str) -> bool:
+        """Submit an alert to be sent. Never blocks.
+
+        Returns:
+            Whether the alert will be sent (i.e., it was not rate limited or dropped).
+        """
+        key = (sensor, validator)
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_sent.get(key)
+            if last is not None and now - last < self.min_interval:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+            self._last_sent[key] = now
+            suppressed = self._suppressed.pop(key, 0)
+
+        if suppressed:
+            body += f'\n\n{suppressed} similar alert(s) were suppressed since the previous alert.'
+        try:
+            self._queue.put_nowait(Alert(sensor, validator, subject, body, datetime.now()))
+        except queue.Full:
+            logger.warning(f'The alert queue is full, dropped an alert from {sensor} ({validator})')
+            return False
+        return True
+
+    def close(self, timeout: float = None) -> None:
+        """Send the alerts that are waiting and stop the background thread.
+
+        Never blocks for longer than `timeout` seconds, even if the queue is
+        full and the transport is not responding.
+        """
+        self._stop.set()
+        try:
+            # wakes the thread if it is waiting for an alert, if the queue is full
+            # the thread does not wait because it checks the stop event first
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(f'The alerts were not sent within {timeout} second(s) of closing')
+
+    def _get(self, timeout: float | None) -> Alert | None:
+        # returns None if there is no alert within the timeout, when closing
+        # the alerts that are waiting are returned without waiting for more
+        if self._stop.is_set():
+            timeout = 0
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _run(self) -> None:
+        while True:
+            alert = self._get(None)
+            if alert is None:
+                if self._stop.is_set():
+                    return
+                continue
+
+            batch = [alert]
+            deadline = time.monotonic() + self.digest
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                alert = self._get(remaining)
+                if alert is None:
+                    break
+                batch.append(alert)
+
+            self._send(batch)
+
+    def _send(self, batch: list[Alert]) -> None:
+        if len(batch) == 1:
+            subject, body = batch[0].subject, batch[0].body
+        else:
+            subject = f'[MSL-Lab-Logger] {len(batch)} alerts'
+            body = '\n\n'.join(f'{a.timestamp.isoformat(sep="T", timespec="seconds")} '
+                               f'{a.sensor} ({a.validator}): {a.subject}\n{a.body}' for a in batch)
+        try:
+            self.transport.send(subject, body)
+        except Exception as e:
+            logger.exception(e)
+
+
+def from_config(cfg: Config) -> AlertDispatcher | None:
+    """Returns the dispatcher for the alerts in a configuration file.
+
+    The same dispatcher is returned each time that this function is called
+    with the same `cfg`. Returns :data:`None` if alerts are not configured.
+    """
+    with _dispatchers_lock:
+        if cfg in _dispatchers:
+            return _dispatchers[cfg]
+
+        element = cfg.find('alerts')
+        kwargs = dict(element.attrib) if element is not None else {}
+        path = kwargs.pop('file', None)
+        transport = None
+        if path:
+            transport = FileTransport(path)
+        else:
+            smtp = cfg.find('smtp')
+            settings = smtp.find('settings') if smtp is not None else None
+            recipients = [r.text for r in smtp.findall('recipients')] if smtp is not None else []
+            if settings is not None and recipients:
+                transport = SMTPTransport(settings.text, recipients)
+
+        dispatcher = None
+        if transport is not None:
+            dispatcher = AlertDispatcher(transport, **kwargs)
+            _running.append(dispatcher)
+        _dispatchers[cfg] = dispatcher
+        return dispatcher
+
+
+def close() -> None:
+    """Send the alerts that are waiting and stop all dispatchers."""
+    with _dispatchers_lock:
+        dispatchers = list(_running)
+        _running.clear()
+        _dispatchers.clear()
+    for dispatcher in dispatchers:
+        dispatcher.close(timeout=30)
+
+
+# the dispatcher of each Config, which is removed when the Config is garbage collected
+# (the id of a Config could be reused by a new Config) and every dispatcher to close
+_dispatchers: weakref.WeakKeyDictionary[Config, AlertDispatcher | None] = weakref.WeakKeyDictionary()
+_running: list[AlertDispatcher] = []
+_dispatchers_lock = threading.Lock()
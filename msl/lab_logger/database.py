@@ -1,66 +1,408 @@
-from enum import Enum
 import os
 import sqlite3
+import threading
+import time
 from datetime import datetime
-from typing import Sequence
+from typing import Any, Callable, Sequence
 
 from .sensors import Sensor
+from .log import logger
+from .schema import DatabaseTypes
+from .scheduler import LatencyStats
+from . import partitions
+from . import pragmas
+from . import timestamps
 
 
-class DatabaseTypes(Enum):
-    """SQLite data types."""
-    NULL = 'NULL'
-    INTEGER = 'INTEGER'
-    REAL = 'REAL'
-    TEXT = 'TEXT'
-    BLOB = 'BLOB'
-    DATETIME = 'DATETIME'
-    FLOAT = 'REAL'
+def create_rejected_table(db: sqlite3.Connection) -> None:
+    """
+    create the table for the readings that a validator rejected
+
+    The table has the same columns as the data table (the pid is the pid
+    that the reading had in the data table, or NULL) and an additional
+    column with the name of the validator that rejected the reading.
+    """
+    columns = []
+    for _, name, typ, *_ in db.execute('PRAGMA table_info(data);'):
+        columns.append(f'{name} {"INTEGER" if name == "pid" else typ}')
+    db.execute(f'CREATE TABLE IF NOT EXISTS rejected ({", ".join(columns)}, validator TEXT)')
+    db.execute('CREATE INDEX IF NOT EXISTS rejected_datetime ON rejected (datetime)')
+    db.execute('CREATE INDEX IF NOT EXISTS rejected_pid ON rejected (pid)')
 
 
 class Database:
 
     def __init__(self, sensor: Sensor) -> None:
         """
-        Initialise two tables: one for data and one for metadata
+        Initialise three tables: one for data, one for the rejected data and one for metadata
+
+        A single connection to the database is kept open until :meth:`.close`
+        is called (or the `with` block exits) so that each call to :meth:`.write`
+        does not have to re-open the SQLite file.
+
+        Rows are buffered in memory and written in a single transaction once
+        ``buffer_size`` rows have been collected or the oldest buffered row is
+        older than ``flush_interval`` seconds. Both values are read from the
+        configuration file. By default, every row is written immediately.
+
+        Timestamps are stored as ISO 8601 strings unless the ``timestamp_format``
+        element in the configuration file is ``epoch``, in which case they are
+        stored as integer milliseconds (see :mod:`~msl.lab_logger.timestamps`).
+        The format of an existing database is always kept.
+
+        If the ``partition`` element in the configuration file is ``month`` or
+        ``year`` then the rows are written to one database per month or per year,
+        ``<log_dir>/<serial>/YYYY-MM.sqlite3`` or ``<log_dir>/<serial>/YYYY.sqlite3``
+        (see :mod:`~msl.lab_logger.partitions`), according to the timestamp of each row.
+        A partition is not created until a row is written to it.
+
+        The connection is tuned by the ``sqlite`` element in the configuration file
+        (see :mod:`~msl.lab_logger.pragmas`) and, unless it is disabled, a background
+        thread checkpoints the write-ahead log every ``checkpoint_interval`` seconds.
         """
         cfg = sensor.config
-        self.path = os.path.join(cfg.value('log_dir'), f'{sensor.record.serial}.sqlite3')
         self.timeout = cfg.value('db_timeout', 10)
+        self.pragmas, self.checkpoint_interval = pragmas.from_config(cfg)
+        self.buffer_size = max(1, int(cfg.value('buffer_size', 1)))
+        self.flush_interval = cfg.value('flush_interval')
+
+        self.partition = cfg.value('partition')
+        if self.partition not in (None, partitions.MONTH, partitions.YEAR):
+            raise ValueError(f'Invalid partition {self.partition!r}, must be '
+                             f'{partitions.MONTH!r} or {partitions.YEAR!r}')
+
+        fmt = cfg.value('timestamp_format', timestamps.ISO)
+        if fmt not in (timestamps.ISO, timestamps.EPOCH):
+            raise ValueError(f'Invalid timestamp_format {fmt!r}, must be '
+                             f'{timestamps.ISO!r} or {timestamps.EPOCH!r}')
+        self.timestamp_format = fmt
+
+        self.serial = sensor.record.serial
+        if self.partition is None:
+            self.directory = cfg.value('log_dir')
+            self._partition_name = None
+            self.path = os.path.join(self.directory, f'{sensor.record.serial}.sqlite3')
+        else:
+            self.directory = os.path.join(cfg.value('log_dir'), sensor.record.serial)
+            os.makedirs(self.directory, exist_ok=True)
+            # a partition is opened when the first row is written to it, the path
+            # is the partition of the current time until a row is written
+            self._partition_name = None
+            name = partitions.partition_name(datetime.now(), self.partition)
+            self.path = os.path.join(self.directory, f'{name}.sqlite3')
 
-        db = sqlite3.connect(self.path, timeout=self.timeout)
-        # Set sqlite to Write-Ahead Log (WAL) journal mode to allow concurrent read and write connection to the database
-        db.execute('pragma journal_mode=wal')
+        self._buffer = []
+        self._rejected = []
+        self._buffer_t0 = 0.0
 
+        # the INSERT statements of the schema are the same for every row, so
+        # sqlite3 reuses the prepared statements from its statement cache
+        self.schema = sensor.schema
+        self._metadata = sensor.record.to_dict()
+
+        # the connection is used by the thread that writes, by the checkpoint thread
+        # and by the thread of the Scheduler that writes the latency statistics
+        self._lock = threading.RLock()
+        self._db = None
+        if self.partition is None:
+            self._connect()
+
+        self._stopped = threading.Event()
+        self._checkpointer = None
+        if self.checkpoint_interval > 0:
+            self._checkpointer = threading.Thread(
+                target=self._run_checkpoints, name=f'checkpoint-{sensor.record.serial}', daemon=True)
+            self._checkpointer.start()
+
+    def _create_tables(self, db: sqlite3.Connection) -> None:
+        """Create the tables (if they do not already exist) in the database that was just opened."""
+        fmt = self.timestamp_format
         #  data
-        field_str = ', '.join(f'{k} {v.name}' for k, v in sensor.fields.items())
         db.execute(
             f'CREATE TABLE IF NOT EXISTS data ('
             f'pid INTEGER PRIMARY KEY AUTOINCREMENT, '
-            f'datetime DATETIME, '
-            f'{field_str}'
+            f'datetime {"INTEGER" if fmt == timestamps.EPOCH else "DATETIME"}, '
+            f'{self.schema.definitions}'
             f')'
         )
+        self.timestamp_format = timestamps.timestamp_format(db)
+        if self.timestamp_format != fmt:
+            logger.warning(f'{self.path} stores {self.timestamp_format} timestamps, ignoring timestamp_format={fmt!r}')
+        # get_data() filters on the timestamp, an index avoids a full table scan (and
+        # is added to databases that were created before the index was introduced)
+        db.execute('CREATE INDEX IF NOT EXISTS data_datetime ON data (datetime)')
+        #  rejected - the data that a validator rejected, to diagnose faults
+        create_rejected_table(db)
+        #  latency - the statistics of how late the readings were taken, see Scheduler
+        db.execute(f'CREATE TABLE IF NOT EXISTS latency ('
+                   f'datetime {"INTEGER" if self.timestamp_format == timestamps.EPOCH else "DATETIME"}, '
+                   f'count INTEGER, skipped INTEGER, mean REAL, jitter REAL, min REAL, max REAL)')
         #  metadata - e.g. a place to store the equipment record for the source of the logged data
         db.execute(f'CREATE TABLE IF NOT EXISTS metadata (datetime DATETIME, field TEXT, value TEXT, unique (field, value))')
         timestamp = datetime.now().replace(microsecond=0).isoformat(sep='T')
 
-        metadata_dict = sensor.record.to_dict()
-        for k, v in metadata_dict.items():
-            data = (timestamp, k, str(v))
-            try:
-                db.execute(f'INSERT INTO metadata VALUES (?, ?, ?);', data)
-            except sqlite3.IntegrityError:
-                # that (field, value) pair is already in the metadata table
-                pass
+        # a (field, value) pair that is already in the metadata table is replaced, so
+        # the rowid of the latest value of a field is the largest (e.g., A -> B -> A)
+        for k, v in self._metadata.items():
+            db.execute('INSERT OR REPLACE INTO metadata VALUES (?, ?, ?);', (timestamp, k, str(v)))
 
         db.commit()
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *ignore) -> None:
+        self.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return the open connection to the database, (re)connecting if necessary."""
+        with self._lock:
+            if self._db is None:
+                # the connection may be used by a different thread of the Scheduler for each reading
+                db = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+                try:
+                    pragmas.apply(db, self.pragmas)
+                    self._create_tables(db)
+                except:
+                    db.close()
+                    raise
+                self._db = db
+            return self._db
+
+    def close(self) -> None:
+        """Write any buffered rows, stop the checkpoint thread and then close the connection to the database."""
+        self._stopped.set()
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                self._optimize()
+                self._disconnect()
+            if self._checkpointer is not None:
+                self._checkpointer.join()
+
+    def _disconnect(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                try:
+                    self._db.close()
+                finally:
+                    self._db = None
+
+    def _optimize(self) -> None:
+        """Let SQLite update the statistics that the query planner uses, before the connection is closed."""
+        if self._db is not None:
+            try:
+                self._db.execute('PRAGMA optimize;')
+            except sqlite3.Error as e:
+                logger.warning(f'Cannot optimize {self.path}: {e}')
+
+    def checkpoint(self) -> None:
+        """Copy the transactions in the write-ahead log to the database without blocking readers or writers."""
+        with self._lock:
+            if self._db is None:
+                return
+            try:
+                self._db.execute('PRAGMA wal_checkpoint(PASSIVE);')
+            except sqlite3.Error as e:
+                logger.warning(f'Cannot checkpoint {self.path}: {e}')
+
+    def _run_checkpoints(self) -> None:
+        while not self._stopped.wait(self.checkpoint_interval):
+            self.checkpoint()
+
+    @property
+    def pending(self) -> int:
+        """The number of rows in the buffer that have not been written to the database."""
+        return len(self._buffer) + len(self._rejected)
+
+    def timestamp(self, dt: datetime = None) -> str | int:
+        """
+        the value to store in the datetime column, in the format of this database
+
+        If `dt` is not specified then the current time is used. ISO 8601
+        timestamps have a resolution of 1 second and epoch timestamps have
+        a resolution of 1 millisecond.
+        """
+        if dt is None:
+            dt = datetime.now()
+        if self.timestamp_format == timestamps.EPOCH:
+            return timestamps.to_epoch(dt)
+        return dt.replace(microsecond=0).isoformat(sep='T')
+
     def write(self, data: Sequence[float]) -> None:
         """
         write data to the database
+
+        The row is added to the buffer, which is flushed if it is full or if
+        the oldest row in the buffer has exceeded the flush interval.
         """
-        questions = ', '.join('?' for _ in data)
-        with sqlite3.connect(self.path, timeout=self.timeout) as db:
-            db.execute(f'INSERT INTO data VALUES (NULL, {questions});', data)
-            db.commit()
+        self._append(self._buffer, data)
+        self.flush_if_due()
+
+    def write_rejected(self, data: Sequence[float], validator: str) -> None:
+        """
+        write data that a validator rejected to the rejected table
+
+        The row shares the buffer (and the transaction when it is flushed)
+        with the rows that are written by :meth:`.write`.
+        """
+        self._append(self._rejected, (*data, validator))
+        self.flush_if_due()
+
+    def write_many(self, rows: Sequence[Sequence[float]], rejected: Sequence[tuple[Sequence[float], str]] = ()) -> None:
+        """
+        write many rows to the database
+
+        The rows are added to the buffer, which is then flushed (at most once)
+        if it is full or if the oldest row in the buffer has exceeded the flush
+        interval. The `rejected` rows are ``(data, validator)`` pairs.
+        """
+        for row in rows:
+            self._append(self._buffer, row)
+        for row, validator in rejected:
+            self._append(self._rejected, (*row, validator))
+        self.flush_if_due()
+
+    def _append(self, buffer: list, row: Sequence) -> None:
+        if self.partition is not None:
+            name = partitions.partition_name(row[0], self.partition)
+            if name != self._partition_name:
+                self._switch_partition(name)
+        if not (self._buffer or self._rejected):
+            self._buffer_t0 = time.monotonic()
+        buffer.append(row)
+
+    def flush_if_due(self) -> None:
+        """
+        write the buffered rows if the buffer is full or if the oldest row in
+        the buffer has exceeded the flush interval
+        """
+        if self.pending >= self.buffer_size or \
+                (self.flush_interval is not None and time.monotonic() - self._buffer_t0 >= self.flush_interval):
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        write all buffered rows to the database in one transaction
+
+        If writing fails then the rows are kept in the buffer, the connection
+        is closed so that the next flush re-opens the database, and the
+        exception is re-raised.
+        """
+        if not (self._buffer or self._rejected):
+            return
+
+        with self._lock:
+            db = self._connect()
+            try:
+                with db:
+                    if self._buffer:
+                        db.executemany(self.schema.insert_sql, self._buffer)
+                    if self._rejected:
+                        db.executemany(self.schema.reject_sql, self._rejected)
+            except sqlite3.Error:
+                logger.warning(f'Error writing to {self.path}, will reconnect on the next write')
+                self._disconnect()
+                raise
+        self._buffer.clear()
+        self._rejected.clear()
+
+    def write_latency(self, stats: LatencyStats) -> None:
+        """
+        write the statistics of how late the readings were taken to the latency table
+
+        The statistics (in seconds) are written immediately, with the current time.
+        """
+        row = (self.timestamp(), stats.count, stats.skipped, stats.mean, stats.jitter, stats.min, stats.max)
+        with self._lock:
+            db = self._connect()
+            try:
+                with db:
+                    db.execute('INSERT INTO latency VALUES (?, ?, ?, ?, ?, ?, ?);', row)
+            except sqlite3.Error:
+                self._disconnect()
+                raise
+
+    def clear_buffer(self) -> int:
+        """
+        discard the buffered rows and return the number of rows that were discarded
+
+        For example, a :class:`~msl.lab_logger.spool.Spool` also has the rows
+        and it writes them to the database once the database is available.
+        """
+        n = self.pending
+        self._buffer.clear()
+        self._rejected.clear()
+        return n
+
+    def watermark(self, timestamp: str | int, table: str = 'data') -> tuple[str | int | None, int]:
+        """
+        the latest timestamp in a table and the number of rows that have that timestamp
+
+        The table is in the database (i.e., the partition) that a row with the
+        value of `timestamp` is written to. The latest timestamp is :data:`None`
+        if the table is empty.
+        """
+        self._check_table(table)
+        result = self._query(timestamp, lambda db: self._watermark(db, table))
+        return (None, 0) if result is None else result
+
+    def count_rows(self, row: Sequence, table: str = 'data') -> int:
+        """
+        the number of rows in a table that are equal to `row`
+
+        The `row` is ``(timestamp, *fields)``, or ``(timestamp, *fields, validator)``
+        for the rejected table. The table is in the database (i.e., the partition)
+        that `row` is written to.
+        """
+        self._check_table(table)
+        fields = self.schema.names + (('validator',) if table == 'rejected' else ())
+        # the index of the datetime column is used to find the rows to compare
+        where = ''.join(f' AND {name} IS ?' for name in fields)
+        sql = f'SELECT COUNT(*) FROM {table} WHERE datetime = ?{where};'
+        return self._query(row[0], lambda db: db.execute(sql, tuple(row)).fetchone()[0]) or 0
+
+    @staticmethod
+    def _check_table(table: str) -> None:
+        if table not in ('data', 'rejected'):
+            raise ValueError(f'Invalid table {table!r}, must be data or rejected')
+
+    def _query(self, timestamp: str | int, query: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Call `query` with the database that a row with the value of `timestamp` is written to.
+
+        Returns :data:`None` if the database is a partition that does not exist.
+        """
+        if self.partition is not None:
+            name = partitions.partition_name(timestamp, self.partition)
+            if name != self._partition_name:
+                path = os.path.join(self.directory, f'{name}.sqlite3')
+                if not os.path.isfile(path):
+                    return None
+                db = pragmas.connect_read_only(path, self.pragmas, timeout=self.timeout)
+                try:
+                    return query(db)
+                finally:
+                    db.close()
+
+        with self._lock:
+            return query(self._connect())
+
+    @staticmethod
+    def _watermark(db: sqlite3.Connection, table: str) -> tuple[str | int | None, int]:
+        # both the MAX() and the COUNT() use the index of the datetime column
+        latest, count = db.execute(
+            f'SELECT datetime, COUNT(*) FROM {table} '
+            f'WHERE datetime = (SELECT MAX(datetime) FROM {table});'
+        ).fetchone()
+        return latest, count
+
+    def _switch_partition(self, name: str) -> None:
+        """Write the buffered rows to the current partition and then use partition `name`."""
+        self.flush()
+        with self._lock:
+            self._optimize()
+            self._disconnect()
+        self._partition_name = name
+        self.path = os.path.join(self.directory, f'{name}.sqlite3')
+        logger.info(f'Writing to {self.path}')
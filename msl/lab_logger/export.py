@@ -0,0 +1,324 @@
+"""
+Export the data table of a database to a columnar file, and read it back.
+
+Usage::
+
+    python -m msl.lab_logger.export <database> [output] [--start START] [--end END] [--chunk-size N]
+
+The records are streamed from the database in chunks, so the memory usage
+does not depend on the number of records. The file format is chosen from the
+extension of the output file:
+
+* ``.parquet`` -- Apache Parquet, one row group per chunk (requires pyarrow_)
+* ``.npz`` -- a zip archive of NumPy structured arrays, one array per chunk
+  (a database that has ``TEXT`` or ``BLOB`` fields cannot be exported to ``.npz``)
+
+If the output file is not specified then it is the path of the database
+with the extension ``.parquet`` if pyarrow_ is installed, otherwise ``.npz``.
+
+The column types are the types of the fields of the sensor, see
+:class:`~msl.lab_logger.schema.FieldSchema`. An exported file can be read
+with :func:`~msl.lab_logger.get_data.get_data` (and be used as an archived
+partition of a partitioned database, see :mod:`~msl.lab_logger.partitions`).
+
+.. _pyarrow: https://arrow.apache.org/docs/python/
+"""
+import argparse
+import itertools
+import json
+import os
+import zipfile
+from datetime import datetime
+
+from .partitions import find_partitions
+
+PARQUET = '.parquet'
+NPZ = '.npz'
+
+EXTENSIONS = (PARQUET, NPZ)
+
+# the key of the Parquet metadata that stores the numpy dtype, since Parquet
+# does not have a type for timestamps with a resolution of 1 second
+_DTYPE_KEY = b'msl.lab_logger.dtype'
+
+
+def default_extension():
+    """Returns the extension of the format to export to if the output file is not specified.
+
+    Returns
+    -------
+    :class:`str`
+        ``.parquet`` if pyarrow_ is installed, otherwise ``.npz``.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return NPZ
+    return PARQUET
+
+
+def export(path, out=None, start=None, end=None, chunk_size=100000):
+    """Export the records in the data table of a database to a columnar file.
+
+    Parameters
+    ----------
+    path : :class:`str`
+        The path to the SQLite_ database or to the directory of a partitioned database.
+    out : :class:`str`, optional
+        The path of the file to write to. The extension decides the format,
+        either ``.parquet`` or ``.npz``. See :func:`default_extension`.
+    start : :class:`datetime.datetime` or :class:`str`, optional
+        See :func:`~msl.lab_logger.get_data.get_data`.
+    end : :class:`datetime.datetime` or :class:`str`, optional
+        See :func:`~msl.lab_logger.get_data.get_data`.
+    chunk_size : :class:`int`, optional
+        The number of records to read from the database and write at a time.
+
+    Returns
+    -------
+    :class:`int`
+        The number of records that were exported.
+    """
+    if out is None:
+        out = os.path.splitext(path.rstrip('/\\'))[0] + default_extension()
+
+    ext = os.path.splitext(out)[1].lower()
+    if ext not in EXTENSIONS:
+        raise ValueError('Invalid file extension {!r}, must be one of {}'.format(ext, ', '.join(EXTENSIONS)))
+
+    chunks = _iter_chunks(path, start, end, chunk_size)
+    try:
+        if ext == PARQUET:
+            return _write_parquet(out, chunks)
+        return _write_npz(out, chunks)
+    finally:
+        chunks.close()
+
+
+def _iter_chunks(path, start, end, chunk_size):
+    """Iterate over the records to export. At least one (possibly empty) chunk is yielded.
+
+    The partitions of a partitioned database may store ISO timestamps (a
+    resolution of 1 second) or epoch timestamps (1 millisecond), so the
+    timestamps of every chunk are converted to the finest resolution.
+    """
+    from .get_data import get_data
+    from .get_data import iter_data
+
+    unit = _datetime_unit(path, start, end)
+    empty = True
+    chunks = iter_data(path, start=start, end=end, as_array=True, chunk_size=chunk_size)
+    try:
+        for chunk in chunks:
+            empty = False
+            yield _as_unit(chunk, unit)
+    finally:
+        chunks.close()
+    if empty:
+        # an empty array still has the columns and their types
+        yield _as_unit(get_data(path, start=start, end=end, as_array=True), unit)
+
+
+def _datetime_unit(path, start, end):
+    """Returns the finest unit of the timestamps in the partitions to export, or :data:`None` if not partitioned."""
+    import numpy as np
+    from .get_data import iter_data
+
+    if not os.path.isdir(path):
+        return None
+    units = set()
+    for partition in find_partitions(path, start, end):
+        chunks = iter_data(partition, select='datetime', as_array=True, chunk_size=1)
+        try:
+            for chunk in chunks:
+                units.add(np.datetime_data(chunk.dtype['datetime'])[0])
+                break
+        finally:
+            chunks.close()
+    return 'ms' if 'ms' in units else None
+
+
+def _as_unit(chunk, unit):
+    """Returns `chunk` with the timestamps in `unit`."""
+    if unit is None or chunk.dtype['datetime'] == 'datetime64[{}]'.format(unit):
+        return chunk
+    dtype = [(name, 'datetime64[{}]'.format(unit) if name == 'datetime' else chunk.dtype[name])
+             for name in chunk.dtype.names]
+    return chunk.astype(dtype)
+
+
+def read_export(path, start=None, end=None, select='*'):
+    """Read the records in an exported file.
+
+    Parameters
+    ----------
+    path : :class:`str`
+        The path to a ``.parquet`` or ``.npz`` file that :func:`export` created.
+    start : :class:`datetime.datetime` or :class:`str`, optional
+        See :func:`~msl.lab_logger.get_data.get_data`.
+    end : :class:`datetime.datetime` or :class:`str`, optional
+        See :func:`~msl.lab_logger.get_data.get_data`.
+    select : :class:`str` or :class:`list` of :class:`str`, optional
+        The column(s) to read, either ``*`` or the name(s) of the column(s).
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        A structured array, as :func:`~msl.lab_logger.get_data.get_data`
+        returns if `as_array` is :data:`True`.
+    """
+    import numpy as np
+
+    chunks = list(iter_export(path, start=start, end=end, select=select))
+    if len(chunks) == 1:
+        return chunks[0]
+    return np.concatenate(chunks)
+
+
+def iter_export(path, start=None, end=None, select='*'):
+    """Iterate over the records in an exported file, one chunk (as it was written) at a time.
+
+    See :func:`read_export` for a description of the parameters.
+
+    Yields
+    ------
+    :class:`numpy.ndarray`
+        A chunk of records. At least one (possibly empty) chunk is yielded.
+    """
+    columns = _select(select)
+    chunks = _read_parquet(path) if path.lower().endswith(PARQUET) else _read_npz(path)
+    empty = True
+    for chunk in chunks:
+        chunk = _filter(chunk, start, end)
+        if columns is not None:
+            chunk = chunk[columns]
+        if len(chunk) or empty:
+            yield chunk
+            empty = False
+
+
+def _select(select):
+    """Returns the names of the selected columns, or :data:`None` for all columns."""
+    if isinstance(select, str):
+        select = [name.strip() for name in select.split(',')]
+    select = list(select)
+    if select == ['*']:
+        return None
+    return select
+
+
+def _filter(chunk, start, end):
+    """Returns the records in `chunk` between `start` and `end` (with the same bounds as a query)."""
+    import numpy as np
+
+    if start is None and end is None:
+        return chunk
+    t = chunk['datetime']
+    start = None if start is None else np.datetime64(_to_datetime(start))
+    end = None if end is None else np.datetime64(_to_datetime(end))
+    if start is not None and end is not None:
+        return chunk[(t >= start) & (t <= end)]
+    if start is not None:
+        return chunk[t > start]
+    return chunk[t < end]
+
+
+def _to_datetime(value):
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def _write_npz(out, chunks):
+    """Write each chunk as a separate array of a zip archive, so only one chunk is in memory at a time.
+
+    The arrays are written without pickle, so a ``TEXT`` or ``BLOB`` column
+    (an object column of the structured array) cannot be written.
+    """
+    import numpy as np
+
+    first = next(chunks)
+    objects = [name for name in first.dtype.names if first.dtype[name].hasobject]
+    if objects:
+        raise ValueError('Cannot export the TEXT or BLOB column(s) {} to {}, export to {} '
+                         'instead'.format(', '.join(objects), NPZ, PARQUET))
+
+    total = 0
+    with zipfile.ZipFile(out, mode='w', compression=zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+        for i, chunk in enumerate(itertools.chain([first], chunks)):
+            with zf.open('chunk{:06d}.npy'.format(i), mode='w', force_zip64=True) as fp:
+                np.lib.format.write_array(fp, chunk, allow_pickle=False)
+            total += len(chunk)
+    return total
+
+
+def _read_npz(path):
+    import numpy as np
+
+    with zipfile.ZipFile(path) as zf:
+        for name in sorted(zf.namelist()):
+            with zf.open(name) as fp:
+                yield np.lib.format.read_array(fp, allow_pickle=False)
+
+
+def _write_parquet(out, chunks):
+    """Write each chunk as a row group of a Parquet file, so only one chunk is in memory at a time."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    total = 0
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_arrays([pa.array(chunk[name]) for name in chunk.dtype.names],
+                                         names=list(chunk.dtype.names))
+            if writer is None:
+                schema = table.schema.with_metadata({_DTYPE_KEY: json.dumps(chunk.dtype.descr)})
+                writer = pq.ParquetWriter(out, schema)
+            table = table.replace_schema_metadata(writer.schema.metadata)
+            writer.write_table(table)
+            total += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return total
+
+
+def _read_parquet(path):
+    import numpy as np
+    import pyarrow.parquet as pq
+
+    pf = pq.ParquetFile(path)
+    try:
+        metadata = pf.schema_arrow.metadata or {}
+        if _DTYPE_KEY in metadata:
+            dtype = np.dtype([tuple(item) for item in json.loads(metadata[_DTYPE_KEY])])
+        else:
+            dtype = np.dtype([(field.name, field.type.to_pandas_dtype()) for field in pf.schema_arrow])
+        if pf.metadata.num_rows == 0:
+            yield np.empty(0, dtype=dtype)
+        for i in range(pf.num_row_groups):
+            table = pf.read_row_group(i)
+            array = np.empty(table.num_rows, dtype=dtype)
+            for name, column in zip(table.schema.names, table.columns):
+                array[name] = column.to_numpy()
+            yield array
+    finally:
+        pf.close()
+
+
+def main(*args):
+    p = argparse.ArgumentParser(description='Export the data table of a database to a columnar file.')
+    p.add_argument('database', help='the path to the database (or the directory of a partitioned database)')
+    p.add_argument('output', nargs='?', help='the path of the .parquet or .npz file to write to')
+    p.add_argument('--start', help='only export the records after yyyy-mm-dd[ HH:MM:SS]')
+    p.add_argument('--end', help='only export the records before yyyy-mm-dd[ HH:MM:SS]')
+    p.add_argument('--chunk-size', type=int, default=100000, help='the number of records to write at a time')
+    args = p.parse_args(args)
+    n = export(args.database, args.output, start=args.start, end=args.end, chunk_size=args.chunk_size)
+    print('Exported {} records'.format(n))
+
+
+if __name__ == '__main__':
+    import sys
+    main(*sys.argv[1:])
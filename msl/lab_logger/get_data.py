@@ -2,18 +2,38 @@
 Functions to interrogate an SQLite database and return the data
 """
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import sqlite3
 
+from .export import EXTENSIONS as _EXPORT_EXTENSIONS
+from .export import iter_export
+from .export import read_export
+from .partitions import find_partitions
+from .pragmas import connect_read_only
+from .schema import FieldSchema
+from .timestamps import EPOCH
+from .timestamps import ISO
+from .timestamps import from_epoch
+from .timestamps import to_epoch
+from .timestamps import query_value
+from .timestamps import timestamp_format
 
-def get_data(path, start=None, end=None, as_datetime=True, select='*'):
+
+def get_data(path, start=None, end=None, as_datetime=True, select='*', as_array=False, include_rejected=False):
     """Fetch all the log records between two dates.
 
     Parameters
     ----------
     path : :class:`str`
-        The path to the SQLite_ database.
+        The path to the SQLite_ database or to the directory of a partitioned
+        database (see :mod:`~msl.lab_logger.partitions`). Only the partitions
+        that overlap `start` and `end` are queried, in parallel, and the
+        records are returned in time order. Can also be the path to a file
+        that was exported by :func:`~msl.lab_logger.export.export`, which only
+        contains the records in the data table.
     start : :class:`datetime.datetime` or :class:`str`, optional
         Include all records that have a timestamp > `start`. If :class:`str` then in
         ``yyyy-mm-dd`` or ``yyyy-mm-dd HH:MM:SS`` format.
@@ -23,46 +43,570 @@ def get_data(path, start=None, end=None, as_datetime=True, select='*'):
     as_datetime : :class:`bool`, optional
         Whether to fetch the timestamps from the database as :class:`datetime.datetime` objects.
         If :data:`False` then the timestamps will be of type :class:`str` and this function
-        will return much faster if requesting data over a large date range.
+        will return much faster if requesting data over a large date range. If the database
+        stores epoch timestamps then :data:`False` returns the timestamps as :class:`int`
+        milliseconds.
     select : :class:`str` or :class:`list` of :class:`str`, optional
         The column(s) in the database to use with the ``SELECT`` SQL command.
+    as_array : :class:`bool`, optional
+        Whether to return a numpy structured array instead of a :class:`list`.
+        The field names are the column names, the timestamps are of type
+        ``datetime64[s]`` (``datetime64[ms]`` for epoch timestamps), the ``pid``
+        is an integer and all other columns are ``float64`` (a ``NULL`` value
+        is ``NaN``), except for ``TEXT`` and ``BLOB`` columns which are objects,
+        see :class:`~msl.lab_logger.schema.FieldSchema`.
+        The value of `as_datetime` is ignored.
+    include_rejected : :class:`bool`, optional
+        Whether to also include the records that a validator rejected (the
+        ``rejected`` table). The records are then sorted by timestamp and
+        the ``pid`` of a record that was rejected while logging is ``None``
+        (``-1`` if `as_array` is :data:`True`).
 
     Returns
     -------
-    :class:`list` of :class:`tuple`
+    :class:`list` of :class:`tuple` or :class:`numpy.ndarray`
         A list of ``(timestamp, resistance, ...)`` log records,
-        depending on the value of `select`.
+        depending on the value of `select` and `as_array`.
     """
-    if not os.path.isfile(path):
-        raise IOError('Cannot find {}'.format(path))
+    if os.path.isdir(path):
+        results = _map_partitions(path, start, end, lambda p: get_data(
+            p, start=start, end=end, as_datetime=as_datetime, select=select,
+            as_array=as_array, include_rejected=include_rejected))
+        if as_array:
+            import numpy as np
+            return np.concatenate(results)
+        return [row for rows in results for row in rows]
 
-    detect_types = sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES if as_datetime else 0
-    db = sqlite3.connect(path, timeout=10.0, detect_types=detect_types,
-                         isolation_level=None)  # Open database in Autocommit mode by setting isolation_level to None
-    db.execute(
-        'pragma journal_mode=wal')  # Set sqlite to Write-Ahead Log (WAL) journal mode to allow concurrent read and write connection to the database
+    if _is_export(path):
+        data = read_export(path, start=start, end=end, select=select)
+        return data if as_array else _array_to_rows(data, as_datetime)
+
+    db = _connect(path, as_datetime and not as_array)
     cursor = db.cursor()
 
-    if isinstance(start, datetime):
-        start = start.isoformat(sep='T')
-    if isinstance(end, datetime):
-        end = end.isoformat(sep='T')
-    if select != '*':
-        if isinstance(select, (list, tuple, set)):
-            select = ','.join(select)
-    base = 'SELECT {} FROM data'.format(select)
+    fmt = timestamp_format(db)
+    table = _table(db, include_rejected)
+    order = ' ORDER BY datetime' if include_rejected else ''
+    sql, parameters = _select_sql(_columns(select), start, end, fmt, suffix=order, table=table)
 
-    if start is None and end is None:
-        cursor.execute(base + ';')
-    elif start is not None and end is None:
-        cursor.execute(base + ' WHERE datetime > ?;', (start,))
-    elif start is None and end is not None:
-        cursor.execute(base + ' WHERE datetime < ?;', (end,))
+    if as_array:
+        # COUNT and SELECT must see the same snapshot of the database to
+        # fill the preallocated array with exactly the rows that were counted
+        cursor.execute('BEGIN;')
+        cursor.execute(*_select_sql('COUNT(*)', start, end, fmt, table=table))
+        size = cursor.fetchone()[0]
+        cursor.execute(sql, parameters)
+        data = _fill_array(cursor, size, fmt, schema=FieldSchema.from_database(db))
+        cursor.execute('COMMIT;')
     else:
-        cursor.execute(base + ' WHERE datetime BETWEEN ? AND ?;', (start, end))
+        cursor.execute(sql, parameters)
+        data = cursor.fetchall()
+        if as_datetime and fmt == EPOCH:
+            data = _epoch_to_datetime(cursor, data)
 
-    data = cursor.fetchall()
     cursor.close()
     db.close()
 
     return data
+
+
+def iter_data(path, start=None, end=None, as_datetime=True, select='*', as_array=False, chunk_size=10000,
+              include_rejected=False):
+    """Iterate over the log records between two dates in chunks.
+
+    Only one chunk of records is held in memory at a time, so the memory
+    usage does not depend on the size of the date range.
+
+    The database connection is closed when the iteration finishes or when
+    the generator is closed, e.g., if the caller stops early::
+
+        with contextlib.closing(iter_data(path)) as chunks:
+            for chunk in chunks:
+                ...
+
+    Parameters
+    ----------
+    path : :class:`str`
+        See :func:`get_data`. The partitions of a partitioned database are
+        read one after the other and a chunk never spans two partitions.
+    start : :class:`datetime.datetime` or :class:`str`, optional
+        See :func:`get_data`.
+    end : :class:`datetime.datetime` or :class:`str`, optional
+        See :func:`get_data`.
+    as_datetime : :class:`bool`, optional
+        See :func:`get_data`.
+    select : :class:`str` or :class:`list` of :class:`str`, optional
+        See :func:`get_data`.
+    as_array : :class:`bool`, optional
+        See :func:`get_data`.
+    chunk_size : :class:`int`, optional
+        The maximum number of records in each chunk. The chunks of an exported
+        file are the chunks that the file was written with.
+    include_rejected : :class:`bool`, optional
+        See :func:`get_data`.
+
+    Yields
+    ------
+    :class:`list` of :class:`tuple` or :class:`numpy.ndarray`
+        A chunk of log records, in the same format that :func:`get_data` returns.
+    """
+    if os.path.isdir(path):
+        for partition in _partitions(path, start, end):
+            yield from iter_data(partition, start=start, end=end, as_datetime=as_datetime, select=select,
+                                 as_array=as_array, chunk_size=chunk_size, include_rejected=include_rejected)
+        return
+
+    if _is_export(path):
+        for chunk in iter_export(path, start=start, end=end, select=select):
+            if len(chunk):
+                yield chunk if as_array else _array_to_rows(chunk, as_datetime)
+        return
+
+    db = _connect(path, as_datetime and not as_array)
+    try:
+        fmt = timestamp_format(db)
+        table = _table(db, include_rejected)
+        order = ' ORDER BY datetime' if include_rejected else ''
+        cursor = db.execute(*_select_sql(_columns(select), start, end, fmt, suffix=order, table=table))
+        dtype = _array_dtype(cursor, fmt, FieldSchema.from_database(db)) if as_array else None
+        convert = as_datetime and not as_array and fmt == EPOCH
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            if as_array:
+                yield _to_array(rows, dtype)
+            elif convert:
+                yield _epoch_to_datetime(cursor, rows)
+            else:
+                yield rows
+        cursor.close()
+    finally:
+        db.close()
+
+
+def get_aggregated(path, start=None, end=None, bucket='1h', funcs=('min', 'max', 'mean'),
+                   select=None, as_datetime=True, as_array=False):
+    """Fetch the log records between two dates reduced to one record per time bucket.
+
+    The records are grouped into buckets of equal duration and reduced by the
+    SQLite_ engine, so only the aggregated values are returned to Python.
+
+    Parameters
+    ----------
+    path : :class:`str`
+        See :func:`get_data`. If a bucket spans two partitions then the
+        values from each partition are combined.
+    start : :class:`datetime.datetime` or :class:`str`, optional
+        See :func:`get_data`.
+    end : :class:`datetime.datetime` or :class:`str`, optional
+        See :func:`get_data`.
+    bucket : :class:`str` or :class:`int`, optional
+        The duration of each bucket. Either the number of seconds or an integer
+        followed by a unit, e.g., ``'30s'``, ``'15min'``, ``'1h'``, ``'1d'`` or ``'1w'``.
+        Buckets are aligned to multiples of the duration since 1970-01-01T00:00:00.
+    funcs : :class:`str` or :class:`tuple` of :class:`str`, optional
+        The aggregate function(s) to apply to each column in each bucket.
+        Can be any of ``min``, ``max``, ``mean``, ``sum`` and ``count``.
+    select : :class:`str` or :class:`list` of :class:`str`, optional
+        The column(s) to aggregate. Default is all columns except
+        ``pid`` and ``datetime``.
+    as_datetime : :class:`bool`, optional
+        See :func:`get_data`.
+    as_array : :class:`bool`, optional
+        See :func:`get_data`.
+
+    Returns
+    -------
+    :class:`list` of :class:`tuple` or :class:`numpy.ndarray`
+        A list of ``(timestamp, column1_func1, column1_func2, ...)`` records, where
+        the timestamp is the start of the bucket. If `as_array` is :data:`True` then
+        the field names are ``datetime`` and ``<column>_<func>``.
+    """
+    seconds = _bucket_seconds(bucket)
+    if isinstance(funcs, str):
+        funcs = (funcs,)
+    for func in funcs:
+        if func not in _AGGREGATES:
+            raise ValueError('Invalid aggregate function {!r}, must be one '
+                             'of {}'.format(func, ', '.join(_AGGREGATES)))
+
+    funcs = tuple(funcs)
+    if os.path.isdir(path):
+        # the count is needed to combine the mean of a bucket that spans two partitions
+        partial = funcs if 'mean' not in funcs or 'count' in funcs else funcs + ('count',)
+        results = _map_partitions(path, start, end, lambda p: _aggregate(p, start, end, seconds, partial, select))
+        names = results[-1][0]
+        rows = _merge_buckets([rows for _, rows in results], partial)
+        if partial != funcs:
+            n = len(partial)
+            keep = [0] + [i for i in range(1, len(names)) if (i - 1) % n != n - 1]
+            names = [names[i] for i in keep]
+            rows = [tuple(row[i] for i in keep) for row in rows]
+    else:
+        names, rows = _aggregate(path, start, end, seconds, funcs, select)
+
+    if as_array:
+        return _to_array(rows, _NO_FIELDS.array_dtype(names))
+    if as_datetime:
+        return [(datetime.fromisoformat(row[0]),) + row[1:] for row in rows]
+    return rows
+
+
+def _aggregate(path, start, end, seconds, funcs, select):
+    """Returns the column names and the rows of the aggregated records in a database."""
+    if _is_export(path):
+        return _aggregate_array(read_export(path, start=start, end=end), seconds, funcs, select)
+
+    db = _connect(path, False)
+    try:
+        if select is None:
+            columns = FieldSchema.from_database(db).names
+        elif isinstance(select, str):
+            columns = [select]
+        else:
+            columns = list(select)
+
+        aggregates = ', '.join('{}({}) AS {}_{}'.format(_AGGREGATES[func], column, column, func)
+                               for column in columns for func in funcs)
+        fmt = timestamp_format(db)
+        if fmt == EPOCH:
+            epoch = 'datetime / 1000 / {0} * {0}'.format(seconds)
+        else:
+            epoch = "CAST(strftime('%s', datetime) AS INTEGER) / {0} * {0}".format(seconds)
+        bucket_start = "strftime('%Y-%m-%dT%H:%M:%S', {}, 'unixepoch') AS datetime".format(epoch)
+        cursor = db.execute(*_select_sql(bucket_start + ', ' + aggregates, start, end, fmt,
+                                         suffix=' GROUP BY 1 ORDER BY 1'))
+        rows = cursor.fetchall()
+        names = [item[0] for item in cursor.description]
+        cursor.close()
+    finally:
+        db.close()
+    return names, rows
+
+
+def _aggregate_array(array, seconds, funcs, select):
+    """Returns the column names and the rows of the aggregated records in a structured array.
+
+    The values are the same as the aggregate SQL functions return, i.e., NaN
+    values are ignored (like NULL) and a bucket without values is :data:`None`.
+    """
+    import numpy as np
+
+    if select is None:
+        columns = [name for name in array.dtype.names if name not in ('pid', 'datetime')]
+    elif isinstance(select, str):
+        columns = [select]
+    else:
+        columns = list(select)
+    names = ['datetime'] + ['{}_{}'.format(column, func) for column in columns for func in funcs]
+    if not len(array):
+        return names, []
+
+    t = array['datetime'].astype('datetime64[s]').astype('int64') // seconds * seconds
+    order = np.argsort(t, kind='stable')
+    t = t[order]
+    index = np.flatnonzero(np.r_[True, t[1:] != t[:-1]])
+    values = [np.datetime_as_string(t[index].astype('datetime64[s]')).tolist()]
+    for column in columns:
+        v = array[column][order].astype(float)
+        valid = ~np.isnan(v)
+        count = np.add.reduceat(valid, index)
+        total = np.add.reduceat(np.where(valid, v, 0.0), index)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            reduced = {
+                'min': np.fmin.reduceat(v, index),
+                'max': np.fmax.reduceat(v, index),
+                'mean': total / count,
+                'sum': np.where(count > 0, total, np.nan),
+            }
+        for func in funcs:
+            if func == 'count':
+                values.append(count.tolist())
+            else:
+                values.append([None if x != x else x for x in reduced[func].tolist()])
+    return names, list(zip(*values))
+
+
+def _merge_buckets(results, funcs):
+    """Concatenate the aggregated rows of each partition, combining a bucket that spans two partitions."""
+    merged = []
+    for rows in results:
+        if merged and rows and rows[0][0] == merged[-1][0]:
+            merged[-1] = _merge_row(merged[-1], rows[0], funcs)
+            rows = rows[1:]
+        merged.extend(rows)
+    return merged
+
+
+def _merge_row(a, b, funcs):
+    """Combine the aggregated values of the same bucket from two partitions."""
+    n = len(funcs)
+    row = [a[0]]
+    for j in range(1, len(a), n):
+        counts = None
+        if 'count' in funcs:
+            k = j + funcs.index('count')
+            counts = a[k], b[k]
+        for i, func in enumerate(funcs):
+            x, y = a[j + i], b[j + i]
+            if x is None or y is None:
+                row.append(y if x is None else x)
+            elif func == 'min':
+                row.append(min(x, y))
+            elif func == 'max':
+                row.append(max(x, y))
+            elif func == 'mean':
+                row.append((x * counts[0] + y * counts[1]) / (counts[0] + counts[1]))
+            else:  # sum, count
+                row.append(x + y)
+    return tuple(row)
+
+
+def get_lttb(path, column, threshold, start=None, end=None):
+    """Fetch a column of the log records downsampled for plotting.
+
+    Uses the Largest-Triangle-Three-Buckets (LTTB) algorithm, which keeps the
+    visual shape of the data (peaks and troughs) when plotting a long time
+    range with a small number of points.
+
+    Parameters
+    ----------
+    path : :class:`str`
+        The path to the SQLite_ database.
+    column : :class:`str`
+        The name of the column to downsample.
+    threshold : :class:`int`
+        The number of points to return.
+    start : :class:`datetime.datetime` or :class:`str`, optional
+        See :func:`get_data`.
+    end : :class:`datetime.datetime` or :class:`str`, optional
+        See :func:`get_data`.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        A structured array with ``datetime`` and `column` as the field names.
+    """
+    data = get_data(path, start=start, end=end, select=['datetime', column], as_array=True)
+    x = data['datetime'].astype('int64').astype(float)
+    return data[lttb(x, data[column], threshold)]
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets downsampling.
+
+    Parameters
+    ----------
+    x : :class:`numpy.ndarray`
+        The x values, in ascending order.
+    y : :class:`numpy.ndarray`
+        The y values.
+    threshold : :class:`int`
+        The number of points to keep.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        The indices of the points to keep.
+    """
+    import numpy as np
+
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # the first and last points are always kept and the points in
+    # between are split into (threshold - 2) buckets
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(int)
+    indices = np.empty(threshold, dtype=int)
+    indices[0] = 0
+    indices[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_lo, next_hi = edges[i + 1], edges[i + 2]
+        else:
+            next_lo, next_hi = n - 1, n
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        # twice the area of the triangle formed by the previously selected
+        # point, each point in this bucket and the average of the next bucket
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def _connect(path, as_datetime):
+    """Open a read-only connection to the database to read data.
+
+    The journal mode is set by the connection that writes to the database.
+    """
+    if not os.path.isfile(path):
+        raise IOError('Cannot find {}'.format(path))
+
+    detect_types = sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES if as_datetime else 0
+    return connect_read_only(path, timeout=10.0, detect_types=detect_types,
+                             isolation_level=None)  # Open database in Autocommit mode by setting isolation_level to None
+
+
+def _partitions(directory, start, end):
+    """Returns the partitions to query, see :func:`~msl.lab_logger.partitions.find_partitions`.
+
+    If no partition overlaps `start` and `end` then the latest partition is
+    returned, so that a query returns no records (with the usual columns)
+    rather than failing.
+    """
+    paths = find_partitions(directory, start, end) or find_partitions(directory)[-1:]
+    if not paths:
+        raise IOError('Cannot find a partition in {}'.format(directory))
+    return paths
+
+
+def _map_partitions(directory, start, end, func):
+    """Call `func` with the path of each partition in parallel and return the results in time order."""
+    paths = _partitions(directory, start, end)
+    if len(paths) == 1:
+        return [func(paths[0])]
+    with ThreadPoolExecutor(max_workers=min(len(paths), os.cpu_count() or 1)) as executor:
+        return list(executor.map(func, paths))
+
+
+def _is_export(path):
+    """Whether `path` is a file that was exported by :func:`~msl.lab_logger.export.export`."""
+    return os.path.splitext(path)[1].lower() in _EXPORT_EXTENSIONS
+
+
+def _array_to_rows(array, as_datetime):
+    """Convert a structured array to a list of tuples, as a query returns them."""
+    import numpy as np
+
+    rows = array.tolist()
+    if as_datetime or 'datetime' not in array.dtype.names:
+        return rows
+    i = array.dtype.names.index('datetime')
+    if array.dtype['datetime'] == np.dtype('datetime64[ms]'):
+        convert = to_epoch
+    else:
+        def convert(dt):
+            return dt.isoformat(sep='T')
+    return [row[:i] + (None if row[i] is None else convert(row[i]),) + row[i+1:] for row in rows]
+
+
+def _columns(select):
+    """Returns the column(s) to use with the ``SELECT`` SQL command."""
+    if isinstance(select, (list, tuple, set)):
+        return ','.join(select)
+    return select
+
+
+def _table(db, include_rejected):
+    """Returns the table (or subquery) to select the records from."""
+    if not include_rejected:
+        return 'data'
+    if db.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='rejected';").fetchone() is None:
+        return 'data'
+    columns = ', '.join(row[1] for row in db.execute('PRAGMA table_info(data);'))
+    return '(SELECT {0} FROM data UNION ALL SELECT {0} FROM rejected)'.format(columns)
+
+
+def _select_sql(columns, start, end, fmt=ISO, suffix='', table='data'):
+    """Returns the ``SELECT`` SQL command and the parameters to filter by `start` and `end`.
+
+    The `fmt` is the format that the timestamps are stored as and the `suffix`
+    (e.g., a ``GROUP BY`` clause) is appended after the ``WHERE`` clause.
+    """
+    start = query_value(start, fmt)
+    end = query_value(end, fmt)
+    base = 'SELECT {} FROM {}'.format(columns, table)
+
+    if start is None and end is None:
+        return base + suffix + ';', ()
+    if start is not None and end is None:
+        return base + ' WHERE datetime > ?' + suffix + ';', (start,)
+    if start is None and end is not None:
+        return base + ' WHERE datetime < ?' + suffix + ';', (end,)
+    return base + ' WHERE datetime BETWEEN ? AND ?' + suffix + ';', (start, end)
+
+
+def _bucket_seconds(bucket):
+    """Convert a bucket size, e.g., ``'15min'`` or ``'1h'``, to a number of seconds."""
+    if isinstance(bucket, (int, float)):
+        seconds = bucket
+    else:
+        match = re.fullmatch(r'\s*(\d+)\s*([a-z]+)\s*', bucket.lower())
+        if match is None or match.group(2) not in _BUCKET_UNITS:
+            raise ValueError('Invalid bucket size {!r}, must be an integer followed by one '
+                             'of {}'.format(bucket, ', '.join(_BUCKET_UNITS)))
+        seconds = int(match.group(1)) * _BUCKET_UNITS[match.group(2)]
+    if seconds < 1:
+        raise ValueError('The bucket size must be at least 1 second')
+    return int(seconds)
+
+
+_BUCKET_UNITS = {'s': 1, 'sec': 1, 'min': 60, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+# maps the name of an aggregate function to the SQL function
+_AGGREGATES = {'min': 'MIN', 'max': 'MAX', 'mean': 'AVG', 'sum': 'SUM', 'count': 'COUNT'}
+
+
+def _epoch_to_datetime(cursor, rows):
+    """Convert the epoch timestamps in `rows` to :class:`datetime.datetime` objects."""
+    names = [item[0] for item in cursor.description]
+    if 'datetime' not in names:
+        return rows
+    i = names.index('datetime')
+    return [row[:i] + (None if row[i] is None else from_epoch(row[i]),) + row[i+1:] for row in rows]
+
+
+def _array_dtype(cursor, fmt=ISO, schema=None):
+    """Returns the numpy dtype of the structured array for the columns in a query.
+
+    See :meth:`.FieldSchema.array_dtype`. If the `schema` of the database is not
+    specified then all columns except ``pid`` and ``datetime`` are ``float64``.
+    """
+    if schema is None:
+        schema = _NO_FIELDS
+    return schema.array_dtype([item[0] for item in cursor.description], fmt)
+
+
+_NO_FIELDS = FieldSchema((), ())
+
+
+def _to_array(rows, dtype, out=None):
+    """Convert `rows` to a numpy structured array.
+
+    Each column is converted to the field type at once (e.g., the ISO 8601
+    timestamp strings are parsed by numpy rather than one at a time by Python).
+    If `out` is specified then the values are written to it instead.
+    """
+    import numpy as np
+
+    if out is None:
+        out = np.empty(len(rows), dtype=dtype)
+    for k, name in enumerate(dtype.names):
+        if name == 'pid':
+            # the pid of a record in the rejected table can be NULL
+            column = [-1 if row[k] is None else row[k] for row in rows]
+        else:
+            column = [row[k] for row in rows]
+        out[name] = np.asarray(column, dtype=dtype[name])
+    return out
+
+
+def _fill_array(cursor, size, fmt=ISO, chunk_size=100000, schema=None):
+    """Fill a preallocated numpy structured array with the rows from an executed `cursor`."""
+    import numpy as np
+
+    array = np.empty(size, dtype=_array_dtype(cursor, fmt, schema))
+    index = 0
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        n = len(rows)
+        _to_array(rows, array.dtype, out=array[index:index + n])
+        index += n
+    return array[:index]
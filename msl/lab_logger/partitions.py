@@ -0,0 +1,122 @@
+"""
+Split the database of a sensor into one file per month or per year.
+
+A partitioned database is a directory, ``<log_dir>/<serial>/``, that contains
+one SQLite database per time period, named ``YYYY-MM.sqlite3`` (monthly) or
+``YYYY.sqlite3`` (yearly). Each file has the same tables as an unpartitioned
+database, so a partition that is no longer written to can be archived (or
+made read-only) like any other database. A partition can also be replaced
+by a file that :func:`~msl.lab_logger.export.export` wrote, e.g.,
+``2024-01.parquet``, to archive it. If a partition exists as both a database
+and an exported file then the database is used.
+"""
+import os
+import re
+from datetime import datetime
+
+from .timestamps import from_epoch
+
+MONTH = 'month'
+YEAR = 'year'
+
+_NAME_REGEX = re.compile(r'^(\d{4}(?:-\d{2})?)\.(sqlite3|parquet|npz)$')
+
+# if a partition exists in multiple formats, the format with the lowest rank is used
+_RANK = {'sqlite3': 0, 'parquet': 1, 'npz': 2}
+
+
+def partition_name(value, partition):
+    """Returns the name of the partition that a timestamp belongs to.
+
+    Parameters
+    ----------
+    value : :class:`datetime.datetime`, :class:`str` or :class:`int`
+        The timestamp, either as a :class:`~datetime.datetime`, an ISO 8601
+        string or milliseconds since the epoch.
+    partition : :class:`str`
+        Either :data:`MONTH` or :data:`YEAR`.
+
+    Returns
+    -------
+    :class:`str`
+        The name of the partition, e.g., ``2026-10`` or ``2026``.
+    """
+    if isinstance(value, int):
+        value = from_epoch(value)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return value[:7] if partition == MONTH else value[:4]
+
+
+def is_partition(filename):
+    """Returns whether a file name is the name of a partition.
+
+    Parameters
+    ----------
+    filename : :class:`str`
+        The name of the file, e.g., ``2026-10.sqlite3``.
+
+    Returns
+    -------
+    :class:`bool`
+        Whether `filename` is a partition.
+    """
+    return _NAME_REGEX.match(filename) is not None
+
+
+def partition_range(name):
+    """Returns the time range that a partition covers.
+
+    Parameters
+    ----------
+    name : :class:`str`
+        The name of the partition, e.g., ``2026-10`` or ``2026``.
+
+    Returns
+    -------
+    :class:`tuple` of :class:`datetime.datetime`
+        The start (inclusive) and the end (exclusive) of the partition.
+    """
+    if len(name) == 4:
+        year = int(name)
+        return datetime(year, 1, 1), datetime(year + 1, 1, 1)
+    year, month = int(name[:4]), int(name[5:7])
+    if month == 12:
+        return datetime(year, 12, 1), datetime(year + 1, 1, 1)
+    return datetime(year, month, 1), datetime(year, month + 1, 1)
+
+
+def find_partitions(directory, start=None, end=None):
+    """Find the partitions in a directory that overlap a time range.
+
+    Parameters
+    ----------
+    directory : :class:`str`
+        The directory of a partitioned database.
+    start : :class:`datetime.datetime` or :class:`str`, optional
+        The start of the time range. If :class:`str` then in
+        ``yyyy-mm-dd`` or ``yyyy-mm-dd HH:MM:SS`` format.
+    end : :class:`datetime.datetime` or :class:`str`, optional
+        The end of the time range.
+
+    Returns
+    -------
+    :class:`list` of :class:`str`
+        The paths of the partitions, in time order.
+    """
+    if isinstance(start, str):
+        start = datetime.fromisoformat(start)
+    if isinstance(end, str):
+        end = datetime.fromisoformat(end)
+
+    found = {}
+    for filename in os.listdir(directory):
+        match = _NAME_REGEX.match(filename)
+        if match is None:
+            continue
+        name, ext = match.groups()
+        t0, t1 = partition_range(name)
+        if (start is None or t1 > start) and (end is None or t0 <= end):
+            if name not in found or _RANK[ext] < _RANK[found[name][1]]:
+                found[name] = (t0, ext, filename)
+    return [os.path.join(directory, filename) for _, _, filename in sorted(found.values())]
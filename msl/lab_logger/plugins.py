@@ -0,0 +1,54 @@
+"""
+Load the sensors and validators that are registered by other packages.
+
+A package registers its sensors (or validators) with an entry point in the
+``msl.lab_logger.sensors`` (or ``msl.lab_logger.validators``) group that refers
+to the module that contains the decorated classes, e.g., in its ``pyproject.toml``
+
+.. code-block:: toml
+
+    [project.entry-points."msl.lab_logger.sensors"]
+    my_sensors = "my_package.sensors"
+
+The entry points are only loaded if none of the registered sensors (or
+validators) match, so the plugins are not imported unless they are needed.
+"""
+from __future__ import annotations
+
+import importlib
+from typing import Any
+
+from .log import logger
+
+SENSORS = 'msl.lab_logger.sensors'
+VALIDATORS = 'msl.lab_logger.validators'
+
+_loaded: set[str] = set()
+
+
+def import_object(target: str) -> Any:
+    """Import an object from its ``'module:name'`` path."""
+    module, _, name = target.partition(':')
+    return getattr(importlib.import_module(module), name)
+
+
+def load_entry_points(group: str) -> bool:
+    """Load the entry points in `group`, which registers the classes that the plugins define.
+
+    The entry points of a group are only loaded once. A plugin that cannot be
+    loaded is logged and skipped.
+
+    Returns:
+        Whether the entry points were loaded by this call.
+    """
+    if group in _loaded:
+        return False
+    _loaded.add(group)
+
+    from importlib.metadata import entry_points
+    for ep in entry_points(group=group):
+        try:
+            ep.load()
+        except Exception as e:
+            logger.exception(f'Cannot load the {group} plugin {ep.name!r}: {e}')
+    return True
@@ -0,0 +1,111 @@
+"""
+The SQLite PRAGMA settings of the connections that write to and read from a database.
+
+The settings are configured by the ``<sqlite>`` element in a configuration file,
+for example (these are the default values)::
+
+    <sqlite synchronous="NORMAL" cache_size="-16000" mmap_size="268435456" temp_store="MEMORY"
+            page_size="4096" wal_autocheckpoint="1000" checkpoint_interval="300"/>
+
+``page_size`` only has an effect when a database is created, ``checkpoint_interval``
+is the number of seconds between the WAL checkpoints that a background thread runs
+(0 disables the thread) and all other attributes are the values of the PRAGMA
+with the same name. All attributes are optional.
+"""
+from __future__ import annotations
+
+import pathlib
+import re
+import sqlite3
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from msl.equipment import Config
+
+# WAL mode with synchronous=NORMAL is safe from corruption, a power
+# failure can only lose the transactions since the last checkpoint
+DEFAULTS = {
+    'page_size': '4096',
+    'synchronous': 'NORMAL',
+    'cache_size': '-16000',  # negative is KiB, i.e., 16 MB
+    'mmap_size': '268435456',
+    'temp_store': 'MEMORY',
+    'wal_autocheckpoint': '1000',
+}
+
+# the pragmas that also apply to a read-only connection
+READ_ONLY = ('cache_size', 'mmap_size', 'temp_store')
+
+CHECKPOINT_INTERVAL = 300.0
+
+_VALUE_REGEX = re.compile(r'^-?\w+$')
+
+
+def from_config(cfg: Config) -> tuple[dict[str, str], float]:
+    """Returns the pragmas and the checkpoint interval from the ``<sqlite>`` element in a configuration file."""
+    pragmas = dict(DEFAULTS)
+    interval = CHECKPOINT_INTERVAL
+    element = cfg.find('sqlite')
+    if element is not None:
+        attrib = dict(element.attrib)
+        interval = float(attrib.pop('checkpoint_interval', interval))
+        for name, value in attrib.items():
+            if name not in DEFAULTS:
+                raise ValueError(f'Invalid <sqlite> attribute {name!r}, must be one of '
+                                 f'{", ".join(DEFAULTS)} or checkpoint_interval')
+            pragmas[name] = value
+    for name, value in pragmas.items():
+        # the values are formatted into the SQL command
+        if not _VALUE_REGEX.match(str(value)):
+            raise ValueError(f'Invalid value {value!r} for PRAGMA {name}')
+    return pragmas, interval
+
+
+def apply(db: sqlite3.Connection, pragmas: dict[str, str], read_only: bool = False) -> None:
+    """Apply the pragmas to a connection.
+
+    The ``page_size`` is set before the journal mode is changed to WAL, since
+    the page size of a WAL database cannot be changed. A read-only connection
+    does not change the journal mode and only applies the :data:`READ_ONLY` pragmas.
+    """
+    if read_only:
+        for name in READ_ONLY:
+            if name in pragmas:
+                db.execute(f'PRAGMA {name}={pragmas[name]};')
+        return
+
+    if 'page_size' in pragmas:
+        db.execute(f'PRAGMA page_size={pragmas["page_size"]};')
+    # Set sqlite to Write-Ahead Log (WAL) journal mode to allow concurrent read and write connection to the database
+    db.execute('PRAGMA journal_mode=wal;')
+    for name, value in pragmas.items():
+        if name != 'page_size':
+            db.execute(f'PRAGMA {name}={value};')
+
+
+def connect_read_only(path: str, pragmas: dict[str, str] = None, **kwargs) -> sqlite3.Connection:
+    """Open a read-only connection to a database.
+
+    Args:
+        path: The path to the database.
+        pragmas: The pragmas to apply (only the :data:`READ_ONLY` pragmas are used).
+            Default is :data:`DEFAULTS`.
+        **kwargs: Passed to :func:`sqlite3.connect`.
+    """
+    db = sqlite3.connect(read_only_uri(pathlib.Path(path).absolute()), uri=True, **kwargs)
+    apply(db, DEFAULTS if pragmas is None else pragmas, read_only=True)
+    return db
+
+
+def read_only_uri(path: pathlib.PurePath) -> str:
+    """Returns the URI to open a database in read-only mode.
+
+    Args:
+        path: The absolute path to the database.
+    """
+    uri = path.as_uri()
+    if not uri.startswith('file:///'):
+        # a UNC path, \\server\share, is file://server/share but SQLite rejects
+        # an authority other than localhost, it accepts file:////server/share
+        uri = 'file:////' + uri[len('file://'):]
+    return uri + '?mode=ro'
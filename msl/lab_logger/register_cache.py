@@ -0,0 +1,129 @@
+"""
+A local snapshot of the equipment records that are loaded from the equipment registers.
+
+Loading the equipment and connection registers (e.g., Excel files on a network
+share) can take many seconds. The records of the serial numbers that are logged
+are therefore saved to a local file, which is used instead of the registers
+until the path, modification time or size of a register (or of the
+configuration file) changes. If a register cannot be accessed, e.g., the
+network share is unavailable, then the snapshot is used regardless, so the
+logger can still start.
+
+The snapshot is saved to the ``<register_cache>`` file in the configuration
+file, or to ``~/.msl/lab-logger/register-cache-<hash>.pickle`` (where
+``<hash>`` depends on the path of the configuration file) if not specified.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+from datetime import datetime
+
+from msl.equipment import Config
+from msl.equipment import EquipmentRecord
+
+from .log import logger
+
+# the elements of a configuration file that contain the path of a register
+_PATHS = ('registers/register/path', 'register/path', 'connections/connection/path', 'connection/path')
+
+_VERSION = 1
+
+
+def cache_path(cfg: Config) -> str:
+    """Returns the path of the snapshot file of a configuration file."""
+    path = cfg.value('register_cache')
+    if path:
+        return path
+    source = os.path.abspath(getattr(cfg, 'path', None) or '')
+    digest = hashlib.sha1(source.encode()).hexdigest()[:12]
+    return os.path.join(os.path.expanduser('~'), '.msl', 'lab-logger', f'register-cache-{digest}.pickle')
+
+
+def register_key(cfg: Config) -> tuple[list[tuple[str, int, int]], bool]:
+    """Returns the ``(path, mtime, size)`` of each register and whether all registers are available."""
+    paths = []
+    config_path = getattr(cfg, 'path', None)
+    if config_path:
+        paths.append(config_path)
+    for tag in _PATHS:
+        paths.extend(element.text.strip() for element in cfg.findall(tag) if element.text)
+
+    key, available = [], True
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            available = False
+            key.append((path, -1, -1))
+        else:
+            key.append((path, st.st_mtime_ns, st.st_size))
+    return key, available
+
+
+def find_records(cfg: Config, serials: list[str]) -> dict[str, EquipmentRecord | None]:
+    """Find the equipment record of each serial number, from the snapshot if it is up to date.
+
+    Args:
+        cfg: The configuration file.
+        serials: The serial numbers of the equipment.
+
+    Returns:
+        The equipment record of each serial number, or :data:`None` if the
+        registers do not have a record with that serial number.
+    """
+    path = cache_path(cfg)
+    key, available = register_key(cfg)
+    snapshot = _load(path)
+
+    if snapshot is not None:
+        records = snapshot['records']
+        if snapshot['key'] == key and all(s in records for s in serials):
+            return {s: records[s] for s in serials}
+        if not available:
+            logger.warning(f'An equipment register is unavailable, using the snapshot '
+                           f'from {snapshot["created"]:%Y-%m-%d %H:%M:%S} in {path}')
+            return {s: records.get(s) for s in serials}
+
+    database = cfg.database()
+    found = {}
+    for serial in serials:
+        records = database.records(serial=serial)
+        found[serial] = records[0] if records else None
+
+    if available:
+        if snapshot is not None and snapshot['key'] == key:
+            found = {**snapshot['records'], **found}
+        _save(path, {'version': _VERSION, 'key': key, 'created': datetime.now(), 'records': found})
+    return {s: found[s] for s in serials}
+
+
+def _load(path: str) -> dict | None:
+    try:
+        with open(path, mode='rb') as fp:
+            snapshot = pickle.load(fp)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f'Ignoring the equipment-register snapshot {path}: {e!r}')
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get('version') != _VERSION:
+        return None
+    return snapshot
+
+
+def _save(path: str, snapshot: dict) -> None:
+    # write to a temporary file and then rename it, so that the snapshot is never partially written
+    tmp = f'{path}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(tmp, mode='wb') as fp:
+            pickle.dump(snapshot, fp, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except Exception as e:
+        logger.warning(f'Cannot save the equipment-register snapshot {path}: {e!r}')
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
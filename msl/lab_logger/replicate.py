@@ -0,0 +1,361 @@
+"""
+Copy the readings in the databases of all sensors into one central database.
+
+Usage::
+
+    python -m msl.lab_logger.replicate <log_dir> <central.sqlite3> [--target-class module:Class] [--batch-size N]
+
+Each ``<serial>.sqlite3`` database in ``log_dir`` (and each partition of a
+partitioned ``<serial>/`` database, see :mod:`~msl.lab_logger.partitions`)
+is a source. The central database (the target) remembers the largest ``pid``
+that it has of each source (the high-water mark), so each run only copies
+the rows of the data table that were written since the previous run. The
+rows of a batch and the high-water mark are committed together, so a run that
+is interrupted resumes from the last batch and running it again does not
+duplicate readings.
+
+The data table is append-only, except that ``revalidate --reimport`` (see
+:mod:`~msl.lab_logger.revalidate`) moves readings back to the data table with
+their original ``pid``, which can be below the high-water mark. Those ``pid``
+values are added to the ``reimported`` table of the source and the target also
+remembers the largest ``id`` of the ``reimported`` table that it has, so the
+readings that were moved back are copied by the next run.
+
+The central database of the :class:`SQLiteTarget` has the tables
+
+* ``readings`` -- one row per value, ``(source, pid, serial, datetime, field, value)``,
+  where ``datetime`` is milliseconds since the epoch (see :mod:`~msl.lab_logger.timestamps`),
+  with indexes on ``(serial, datetime)`` and ``datetime``. NULL values are not copied.
+* ``sensor`` -- one row per serial number, the latest value of each field
+  in the ``metadata`` table of the latest source (partition) of the sensor
+  and the names of the fields
+* ``sources`` -- the name, serial number and high-water marks of each source
+
+A different central store (e.g., a database server) is supported by a
+subclass of :class:`Target`, which is specified as ``module:Class`` on the
+command line. :class:`MemoryTarget` keeps everything in memory and can be
+used in place of a server to test the replication.
+
+Rows that are deleted from (or moved to the ``rejected`` table of) a source
+after they were copied are not removed from the central database.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import Sequence
+
+from .log import logger
+from .schema import FieldSchema
+from . import partitions
+from . import plugins
+from . import pragmas
+from . import timestamps
+
+# source, pid, serial, datetime (milliseconds since the epoch), field, value
+Reading = tuple[str, int, str, int, str, float]
+
+# the largest pid and the largest id of the reimported table of a source that the target has
+HighWater = tuple[int, int]
+
+
+class Target:
+    """The central store that the readings are copied to.
+
+    A subclass must implement :meth:`.high_water`, :meth:`.write` and :meth:`.update_sensor`.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *ignore) -> None:
+        self.close()
+
+    def high_water(self, source: str) -> HighWater:
+        """Returns the high-water marks of a source, ``(0, 0)`` if the target does not have the source.
+
+        The marks are the largest ``pid`` of the source that the target has
+        and the largest ``id`` of the ``reimported`` table of the source that
+        the target has.
+        """
+        raise NotImplementedError
+
+    def write(self, source: str, serial: str, readings: Sequence[Reading], high_water: HighWater) -> None:
+        """Add readings and set the high-water marks of a source, in one transaction.
+
+        Args:
+            source: The name of the source.
+            serial: The serial number of the sensor.
+            readings: The readings to add. A reading that the target already
+                has (the same source, ``pid`` and field) must be ignored.
+            high_water: The new high-water marks of the source.
+        """
+        raise NotImplementedError
+
+    def update_sensor(self, serial: str, fields: Sequence[str], metadata: dict[str, str]) -> None:
+        """Add (or replace) the information about a sensor.
+
+        Args:
+            serial: The serial number of the sensor.
+            fields: The names of the fields of the sensor.
+            metadata: The latest value of each field in the ``metadata`` table of the source.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Close the connection to the target."""
+
+
+class SQLiteTarget(Target):
+
+    def __init__(self, path: str, timeout: float = 10) -> None:
+        """A central SQLite database.
+
+        Args:
+            path: The path to the database. It is created if it does not exist.
+            timeout: The number of seconds to wait for a lock on the database.
+        """
+        self.path = path
+        self._db = sqlite3.connect(path, timeout=timeout)
+        try:
+            pragmas.apply(self._db, pragmas.DEFAULTS)
+            with self._db:
+                self._db.execute(
+                    'CREATE TABLE IF NOT EXISTS sources ('
+                    'id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL, serial TEXT NOT NULL, '
+                    'high_water INTEGER NOT NULL DEFAULT 0, reimported INTEGER NOT NULL DEFAULT 0)'
+                )
+                if 'reimported' not in [row[1] for row in self._db.execute('PRAGMA table_info(sources);')]:
+                    # created before the reimported readings were tracked
+                    self._db.execute('ALTER TABLE sources ADD COLUMN reimported INTEGER NOT NULL DEFAULT 0')
+                # the primary key makes writing a batch again a no-op
+                self._db.execute(
+                    'CREATE TABLE IF NOT EXISTS readings ('
+                    'source INTEGER NOT NULL, pid INTEGER NOT NULL, serial TEXT NOT NULL, '
+                    'datetime INTEGER NOT NULL, field TEXT NOT NULL, value REAL, '
+                    'PRIMARY KEY (source, pid, field)) WITHOUT ROWID'
+                )
+                self._db.execute('CREATE INDEX IF NOT EXISTS readings_serial_datetime ON readings (serial, datetime)')
+                self._db.execute('CREATE INDEX IF NOT EXISTS readings_datetime ON readings (datetime)')
+                self._db.execute(
+                    'CREATE TABLE IF NOT EXISTS sensor ('
+                    'serial TEXT PRIMARY KEY, manufacturer TEXT, model TEXT, description TEXT, '
+                    'fields TEXT, metadata TEXT, updated DATETIME)'
+                )
+        except:
+            self._db.close()
+            raise
+        self._ids = {}
+
+    def _source_id(self, source: str, serial: str) -> int:
+        if source not in self._ids:
+            row = self._db.execute('SELECT id FROM sources WHERE name = ?;', (source,)).fetchone()
+            if row is None:
+                cursor = self._db.execute('INSERT INTO sources (name, serial) VALUES (?, ?);', (source, serial))
+                row = (cursor.lastrowid,)
+            self._ids[source] = row[0]
+        return self._ids[source]
+
+    def high_water(self, source: str) -> HighWater:
+        row = self._db.execute('SELECT high_water, reimported FROM sources WHERE name = ?;', (source,)).fetchone()
+        return (0, 0) if row is None else row
+
+    def write(self, source: str, serial: str, readings: Sequence[Reading], high_water: HighWater) -> None:
+        try:
+            with self._db:
+                sid = self._source_id(source, serial)
+                self._db.executemany(
+                    'INSERT OR IGNORE INTO readings VALUES (?, ?, ?, ?, ?, ?);',
+                    ((sid, *reading[1:]) for reading in readings)
+                )
+                self._db.execute('UPDATE sources SET high_water = ?, reimported = ? WHERE id = ?;', (*high_water, sid))
+        except:
+            # the id of a new source was rolled back
+            self._ids.pop(source, None)
+            raise
+
+    def update_sensor(self, serial: str, fields: Sequence[str], metadata: dict[str, str]) -> None:
+        with self._db:
+            self._db.execute(
+                'INSERT OR REPLACE INTO sensor VALUES (?, ?, ?, ?, ?, ?, ?);',
+                (serial, metadata.get('manufacturer'), metadata.get('model'), metadata.get('description'),
+                 ','.join(fields), json.dumps(metadata), datetime.now().replace(microsecond=0).isoformat(sep='T'))
+            )
+
+    def close(self) -> None:
+        try:
+            self._db.execute('PRAGMA optimize;')
+        finally:
+            self._db.close()
+
+
+class MemoryTarget(Target):
+
+    def __init__(self) -> None:
+        """A central store that keeps everything in memory, e.g., to test the replication."""
+        self.high_waters: dict[str, HighWater] = {}
+        self.readings: dict[tuple[str, int, str], Reading] = {}
+        self.sensors: dict[str, tuple[list[str], dict[str, str]]] = {}
+
+    def high_water(self, source: str) -> HighWater:
+        return self.high_waters.get(source, (0, 0))
+
+    def write(self, source: str, serial: str, readings: Sequence[Reading], high_water: HighWater) -> None:
+        for reading in readings:
+            self.readings.setdefault((source, reading[1], reading[4]), reading)
+        self.high_waters[source] = tuple(high_water)
+
+    def update_sensor(self, serial: str, fields: Sequence[str], metadata: dict[str, str]) -> None:
+        self.sensors[serial] = (list(fields), dict(metadata))
+
+
+def find_sources(log_dir: str) -> list[tuple[str, str, str]]:
+    """Find the databases in a directory.
+
+    Args:
+        log_dir: The directory that the databases are in.
+
+    Returns:
+        The name (the path relative to `log_dir`), serial number and path of each database.
+    """
+    sources = []
+    for filename in sorted(os.listdir(log_dir)):
+        path = os.path.join(log_dir, filename)
+        if filename.endswith('.sqlite3') and os.path.isfile(path):
+            sources.append((filename, filename[:-len('.sqlite3')], path))
+        elif os.path.isdir(path):
+            for p in partitions.find_partitions(path):
+                if p.endswith('.sqlite3'):
+                    sources.append((f'{filename}/{os.path.basename(p)}', filename, p))
+    return sources
+
+
+def replicate(log_dir: str, target: Target | str, batch_size: int = 100000) -> int:
+    """Copy the readings that were written since the previous replication to the target.
+
+    Args:
+        log_dir: The directory that the databases are in.
+        target: The target, or the path to a central SQLite database.
+        batch_size: The maximum number of rows of a source to copy in each transaction.
+
+    Returns:
+        The number of rows (of the data tables) that were copied.
+    """
+    if isinstance(target, str):
+        with SQLiteTarget(target) as t:
+            return replicate(log_dir, t, batch_size=batch_size)
+
+    exclude = getattr(target, 'path', None)
+    exclude = None if exclude is None else os.path.abspath(exclude)
+
+    sources = [s for s in find_sources(log_dir) if os.path.abspath(s[2]) != exclude]
+    # the information about a sensor is from its latest source, the partitions are in time order
+    latest = {serial: name for name, serial, _ in sources}
+
+    total = 0
+    for name, serial, path in sources:
+        db = pragmas.connect_read_only(path)
+        try:
+            schema = FieldSchema.from_database(db)
+            if not schema.names:
+                # not the database of a sensor, e.g., the target is in log_dir
+                continue
+            if latest[serial] == name:
+                _update_sensor(db, serial, schema, target)
+            n = _replicate_source(db, name, serial, schema, target, batch_size)
+        except sqlite3.Error as e:
+            logger.error(f'Cannot replicate {path}: {e}')
+            continue
+        finally:
+            db.close()
+        if n:
+            logger.info(f'Replicated {n} rows from {path}')
+        total += n
+    return total
+
+
+def _replicate_source(db: sqlite3.Connection,
+                      name: str,
+                      serial: str,
+                      schema: FieldSchema,
+                      target: Target,
+                      batch_size: int) -> int:
+    datetime_sql = timestamps.epoch_sql('datetime', timestamps.timestamp_format(db))
+    fields = ', '.join(schema.names)
+    sql = (f'SELECT pid, pid, {datetime_sql}, {fields} FROM data '
+           f'WHERE pid > ? ORDER BY pid LIMIT {int(batch_size)};')
+    # the readings that were moved back to the data table, the id of a reading that was
+    # moved to the rejected table again is still selected, to move the mark past it
+    reimported_sql = (f'SELECT reimported.id, data.pid, {datetime_sql}, {fields} FROM reimported '
+                      f'LEFT JOIN data ON data.pid = reimported.pid '
+                      f'WHERE reimported.id > ? ORDER BY reimported.id LIMIT {int(batch_size)};')
+
+    pid_mark, reimported_mark = target.high_water(name)
+    n = 0
+    while True:
+        rows = db.execute(sql, (pid_mark,)).fetchall()
+        if not rows:
+            break
+        pid_mark = rows[-1][0]
+        n += _write(target, name, serial, schema, rows, (pid_mark, reimported_mark))
+
+    if db.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='reimported';").fetchone() is None:
+        return n
+    while True:
+        rows = db.execute(reimported_sql, (reimported_mark,)).fetchall()
+        if not rows:
+            return n
+        reimported_mark = rows[-1][0]
+        n += _write(target, name, serial, schema, rows, (pid_mark, reimported_mark))
+
+
+def _write(target: Target,
+           name: str,
+           serial: str,
+           schema: FieldSchema,
+           rows: list[tuple],
+           high_water: HighWater) -> int:
+    """Write the ``(mark, pid, datetime, *fields)`` rows to the target and returns the number of rows."""
+    readings = [
+        (name, pid, serial, timestamp, field, value)
+        for _, pid, timestamp, *values in rows
+        if pid is not None
+        for field, value in zip(schema.names, values)
+        if value is not None
+    ]
+    target.write(name, serial, readings, high_water)
+    return sum(1 for row in rows if row[1] is not None)
+
+
+def _update_sensor(db: sqlite3.Connection, serial: str, schema: FieldSchema, target: Target) -> None:
+    metadata = {}
+    # the latest value of a field has the largest rowid (see Database), so it is kept
+    for field, value in db.execute('SELECT field, value FROM metadata ORDER BY rowid;'):
+        metadata[field] = value
+    target.update_sensor(serial, schema.names, metadata)
+
+
+def main(*args) -> None:
+    p = argparse.ArgumentParser(description='Copy the readings of all sensors into one central database.')
+    p.add_argument('log_dir', help='the directory that the <serial>.sqlite3 databases are in')
+    p.add_argument('target', help='the path to the central SQLite database (or the argument '
+                                  'that is passed to the --target-class)')
+    p.add_argument('--target-class', metavar='module:Class',
+                   help='the subclass of Target to copy the readings to, default is SQLiteTarget')
+    p.add_argument('--batch-size', type=int, default=100000, help='the number of rows to copy at a time')
+    args = p.parse_args(args)
+
+    cls = SQLiteTarget if args.target_class is None else plugins.import_object(args.target_class)
+    t0 = time.perf_counter()
+    with cls(args.target) as target:
+        n = replicate(args.log_dir, target, batch_size=args.batch_size)
+    logger.info(f'Replicated {n} rows in {time.perf_counter() - t0:.1f} seconds')
+
+
+if __name__ == '__main__':
+    import sys
+    main(*sys.argv[1:])
@@ -0,0 +1,126 @@
+"""
+Retry a failing call with exponential backoff and pause a failing sensor with a circuit breaker.
+"""
+from __future__ import annotations
+
+import random
+import time
+from typing import Callable, TypeVar, TYPE_CHECKING
+
+from .log import logger
+
+if TYPE_CHECKING:
+    from msl.equipment import Config
+
+T = TypeVar('T')
+
+
+class RetryPolicy:
+
+    def __init__(self,
+                 attempts: int = 3,
+                 delay: float = 1.0,
+                 max_delay: float = 30.0,
+                 backoff: float = 2.0,
+                 jitter: float = 0.1) -> None:
+        """How many times, and how long to wait between attempts, to call a function that fails.
+
+        Args:
+            attempts: The maximum number of attempts.
+            delay: The number of seconds to wait after the first failed attempt.
+            max_delay: The maximum number of seconds to wait between attempts.
+            backoff: The factor that the delay is multiplied by after each failed attempt.
+            jitter: The delay is randomly changed by up to this fraction so that
+                sensors that fail at the same time do not retry in lockstep.
+        """
+        self.attempts = max(1, int(attempts))
+        self.delay = float(delay)
+        self.max_delay = float(max_delay)
+        self.backoff = float(backoff)
+        self.jitter = float(jitter)
+
+    def delay_for(self, attempt: int) -> float:
+        """Returns the number of seconds to wait after `attempt` (starting from 1) failed."""
+        delay = min(self.max_delay, self.delay * self.backoff ** (attempt - 1))
+        return max(0.0, delay * (1.0 + random.uniform(-self.jitter, self.jitter)))
+
+    def call(self, func: Callable[[], T], name: str = '') -> T:
+        """Call `func` until it succeeds or the maximum number of attempts is reached.
+
+        Returns:
+            The value that `func` returns.
+
+        Raises:
+            The exception from the last attempt.
+        """
+        attempt = 1
+        while True:
+            try:
+                return func()
+            except Exception as exc:
+                if attempt >= self.attempts:
+                    raise
+                delay = self.delay_for(attempt)
+                logger.warning(f'{name} attempt {attempt} of {self.attempts} failed, '
+                               f'retrying in {delay:.1f} seconds: {exc!r}')
+                time.sleep(delay)
+                attempt += 1
+
+
+class CircuitBreaker:
+
+    def __init__(self, threshold: int = 5, cooldown: float = 300.0) -> None:
+        """Stop calling a function that keeps failing, then try it again after a cooldown.
+
+        Args:
+            threshold: The number of consecutive failures that opens the circuit.
+            cooldown: The number of seconds that the circuit stays open before
+                a single trial call is allowed.
+        """
+        self.threshold = max(1, int(threshold))
+        self.cooldown = float(cooldown)
+        self.failures = 0
+        self._opened_at = None
+
+    @property
+    def is_open(self) -> bool:
+        """Whether calls are currently paused."""
+        return self._opened_at is not None and time.monotonic() - self._opened_at < self.cooldown
+
+    def allow(self) -> bool:
+        """Whether a call is allowed now."""
+        return not self.is_open
+
+    def success(self) -> None:
+        """Record that a call succeeded, which closes the circuit."""
+        self.failures = 0
+        self._opened_at = None
+
+    def failure(self) -> bool:
+        """Record that a call failed.
+
+        Returns:
+            Whether the circuit was opened (or re-opened, if the trial call
+            after the cooldown failed).
+        """
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self._opened_at = time.monotonic()
+            return True
+        return False
+
+
+def from_config(cfg: Config) -> tuple[RetryPolicy, CircuitBreaker]:
+    """Create a retry policy and a circuit breaker from the ``<retry>`` element in a configuration file.
+
+    For example::
+
+        <retry attempts="3" delay="1" max_delay="30" backoff="2" jitter="0.1" threshold="5" cooldown="300"/>
+
+    where the ``threshold`` and ``cooldown`` attributes are for the :class:`.CircuitBreaker` and
+    all other attributes are for the :class:`.RetryPolicy`. All attributes are optional.
+    """
+    element = cfg.find('retry')
+    kwargs = dict(element.attrib) if element is not None else {}
+    breaker = CircuitBreaker(threshold=kwargs.pop('threshold', 5), cooldown=kwargs.pop('cooldown', 300))
+    return RetryPolicy(**kwargs), breaker
@@ -0,0 +1,240 @@
+"""
+Re-validate the readings in an existing database.
+
+Usage::
+
+    python -m msl.lab_logger.revalidate <config.xml> <database> [--serial SERIAL] [--keep] [--reimport] [--chunk-size N]
+
+The ``<database>`` is a ``<serial>.sqlite3`` file, a partition of a
+partitioned database, ``<serial>/YYYY-MM.sqlite3``, or the ``<serial>``
+directory of a partitioned database, in which case every partition is
+re-validated.
+
+The readings in the data table are passed through the validators in the
+``<validators>`` element of the configuration file. Each reading that is
+rejected is moved to the ``rejected`` table (or copied, if ``--keep``),
+together with the name of the validator that rejected it. With
+``--reimport``, the readings in the ``rejected`` table that all validators
+now accept (e.g., after the bounds were changed) are moved back to the
+data table. A reading that is moved back keeps its ``pid``, which is also
+added to the ``reimported`` table, so that :mod:`~msl.lab_logger.replicate`
+copies the reading again even though its ``pid`` is not new.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import time
+
+import numpy as np
+from msl.equipment import Config
+from msl.equipment import EquipmentRecord
+
+from .database import create_rejected_table
+from .get_data import iter_data
+from .log import logger
+from .partitions import find_partitions
+from .partitions import is_partition
+from .register_cache import find_records
+from .schema import DatabaseTypes
+from .schema import FieldSchema
+from .sensors import Sensor
+from .validators import Validator
+
+
+class ArchivedSensor(Sensor):
+
+    def __init__(self, config: Config, record: EquipmentRecord, path: str) -> None:
+        """A sensor whose fields are the columns of an existing database.
+
+        It does not communicate with the equipment.
+        """
+        super().__init__(config, record)
+        db = sqlite3.connect(path)
+        try:
+            self.schema = FieldSchema.from_database(db)
+        finally:
+            db.close()
+        self._fields = dict(zip(self.schema.names, self.schema.types))
+
+    @property
+    def fields(self) -> dict[str, DatabaseTypes]:
+        return self._fields
+
+
+def _first_failure(validators: list[Validator], values: np.ndarray) -> np.ndarray:
+    """Returns the index of the first validator that rejects each reading (-1 if accepted)."""
+    failed = np.full(len(values), -1)
+    for i, v in enumerate(validators):
+        undecided = failed == -1
+        if not undecided.any():
+            break
+        ok = v.validate_many(values[undecided])
+        idx = np.flatnonzero(undecided)[~ok]
+        failed[idx] = i
+    return failed
+
+
+def revalidate(path: str, validators: list[Validator], keep: bool = False, chunk_size: int = 100000) -> int:
+    """Move (or copy) the readings in the data table that a validator rejects to the rejected table.
+
+    Args:
+        path: The path to the database.
+        validators: The validators to apply.
+        keep: Whether to keep the rejected readings in the data table.
+        chunk_size: The number of readings to validate and write at a time.
+
+    Returns:
+        The number of readings that were rejected.
+    """
+    fields = validators[0].field_names if validators else ()
+    db = sqlite3.connect(path, timeout=10)
+    total = 0
+    try:
+        create_rejected_table(db)
+        db.commit()
+        columns = ', '.join(f'data.{name}' for _, name, *_ in db.execute('PRAGMA table_info(data);'))
+        # the pids of a chunk are inserted into a temporary table so that the rows can be copied
+        # and deleted with one statement each. A reading that is already in the rejected table
+        # (e.g., from a previous run with keep=True) is not copied again.
+        db.execute('CREATE TEMP TABLE IF NOT EXISTS chunk (pid INTEGER PRIMARY KEY, validator TEXT);')
+        copy_sql = (f'INSERT INTO rejected SELECT {columns}, chunk.validator FROM chunk '
+                    f'JOIN data ON data.pid = chunk.pid '
+                    f'WHERE NOT EXISTS (SELECT 1 FROM rejected WHERE rejected.pid = chunk.pid);')
+        for chunk in iter_data(path, select=['pid', *fields], as_array=True, chunk_size=chunk_size):
+            values = np.column_stack([chunk[name] for name in fields])
+            failed = _first_failure(validators, values)
+            rejected = np.flatnonzero(failed >= 0)
+            if not len(rejected):
+                continue
+            pids = chunk['pid'][rejected].tolist()
+            names = [validators[i].name for i in failed[rejected]]
+            with db:
+                db.executemany('INSERT INTO chunk VALUES (?, ?);', zip(pids, names))
+                db.execute(copy_sql)
+                if not keep:
+                    db.execute('DELETE FROM data WHERE pid IN (SELECT pid FROM chunk);')
+                db.execute('DELETE FROM chunk;')
+            total += len(pids)
+    finally:
+        db.close()
+    return total
+
+
+def reimport(path: str, validators: list[Validator], chunk_size: int = 100000) -> int:
+    """Move the readings in the rejected table that all validators accept back to the data table.
+
+    The ``pid`` of each reading that had a ``pid`` is added to the ``reimported`` table.
+
+    Args:
+        path: The path to the database.
+        validators: The validators to apply.
+        chunk_size: The number of readings to validate and write at a time.
+
+    Returns:
+        The number of readings that were moved.
+    """
+    fields = validators[0].field_names if validators else ()
+    reader = sqlite3.connect(path, timeout=10)
+    db = sqlite3.connect(path, timeout=10)
+    total = 0
+    try:
+        create_rejected_table(db)
+        # the id increases with each reading that is moved back, see replicate
+        db.execute('CREATE TABLE IF NOT EXISTS reimported (id INTEGER PRIMARY KEY AUTOINCREMENT, pid INTEGER NOT NULL)')
+        db.commit()
+        columns = ', '.join(name for _, name, *_ in db.execute('PRAGMA table_info(data);'))
+        db.execute('CREATE TEMP TABLE IF NOT EXISTS chunk (id INTEGER PRIMARY KEY);')
+        copy_sql = (f'INSERT OR IGNORE INTO data ({columns}) SELECT {columns} FROM rejected '
+                    f'WHERE rowid IN (SELECT id FROM chunk);')
+        cursor = reader.execute(f'SELECT rowid, {", ".join(fields)} FROM rejected;')
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            array = np.array(rows, dtype=float)
+            accepted = _first_failure(validators, array[:, 1:]) == -1
+            rowids = [(int(rowid),) for rowid in array[accepted, 0]]
+            if not rowids:
+                continue
+            with db:
+                db.executemany('INSERT INTO chunk VALUES (?);', rowids)
+                db.execute('INSERT INTO reimported (pid) SELECT pid FROM rejected '
+                           'WHERE rowid IN (SELECT id FROM chunk) AND pid IS NOT NULL;')
+                db.execute(copy_sql)
+                db.execute('DELETE FROM rejected WHERE rowid IN (SELECT id FROM chunk);')
+                db.execute('DELETE FROM chunk;')
+            total += len(rowids)
+    finally:
+        reader.close()
+        db.close()
+    return total
+
+
+def find_databases(path: str, serial: str | None = None) -> tuple[str, list[str]]:
+    """Find the databases of a sensor.
+
+    Args:
+        path: The path to a ``<serial>.sqlite3`` database, to a partition of a
+            partitioned database or to the directory of a partitioned database.
+        serial: The serial number of the sensor. By default, the serial number
+            is the name of the database, or of the directory of a partition.
+
+    Returns:
+        The serial number and the paths of the databases, in time order.
+    """
+    path = os.path.abspath(path)
+    if os.path.isdir(path):
+        databases = [p for p in find_partitions(path) if p.endswith('.sqlite3')]
+        if not databases:
+            raise FileNotFoundError(f'There are no partitions in {path}')
+        default = os.path.basename(path)
+    elif not os.path.isfile(path):
+        raise FileNotFoundError(f'Cannot find {path}')
+    else:
+        databases = [path]
+        filename = os.path.basename(path)
+        if is_partition(filename):
+            default = os.path.basename(os.path.dirname(path))
+        else:
+            default = os.path.splitext(filename)[0]
+    return serial or default, databases
+
+
+def main(*args) -> None:
+    p = argparse.ArgumentParser(description='Re-validate the readings in an existing database.')
+    p.add_argument('config', help='the path to the configuration file that has the <validators>')
+    p.add_argument('database', help='the path to the <serial>.sqlite3 database, to a partition '
+                                    'or to the <serial> directory of a partitioned database')
+    p.add_argument('--serial', help='the serial number of the sensor, if it is not the name of the database')
+    p.add_argument('--keep', action='store_true', help='keep the rejected readings in the data table')
+    p.add_argument('--reimport', action='store_true', help='move the readings in the rejected '
+                                                           'table that are now valid back to the data table')
+    p.add_argument('--chunk-size', type=int, default=100000, help='the number of readings to process at a time')
+    args = p.parse_args(args)
+
+    cfg = Config(args.config)
+    serial, databases = find_databases(args.database, args.serial)
+    record = find_records(cfg, [serial])[serial]
+    if record is None:
+        raise ValueError(f'Cannot find an equipment record with serial {serial}')
+
+    for path in databases:
+        sensor = ArchivedSensor(cfg, record, path)
+        validators = Validator.from_config(sensor)
+        if not validators:
+            raise ValueError(f'There are no <validators> in {args.config}')
+
+        t0 = time.perf_counter()
+        n = revalidate(path, validators, keep=args.keep, chunk_size=args.chunk_size)
+        logger.info(f'{n} readings in {path} were rejected in {time.perf_counter() - t0:.1f} seconds')
+        if args.reimport:
+            t0 = time.perf_counter()
+            n = reimport(path, validators, chunk_size=args.chunk_size)
+            logger.info(f'{n} readings in {path} were re-imported in {time.perf_counter() - t0:.1f} seconds')
+
+
+if __name__ == '__main__':
+    import sys
+    main(*sys.argv[1:])
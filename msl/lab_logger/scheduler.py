@@ -0,0 +1,211 @@
+"""
+Run periodic jobs concurrently in a pool of threads.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from .log import logger
+
+
+SKIP = 'skip'
+CATCH_UP = 'catch-up'
+
+
+class LatencyStats:
+
+    def __init__(self) -> None:
+        """Statistics of how late a job started compared to its deadline.
+
+        The jitter is the standard deviation of the latency.
+        """
+        self.count = 0
+        self.skipped = 0
+        self.mean = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._m2 = 0.0
+
+    def __repr__(self) -> str:
+        return (f'LatencyStats(count={self.count}, skipped={self.skipped}, mean={self.mean:.6f}, '
+                f'jitter={self.jitter:.6f}, min={self.min:.6f}, max={self.max:.6f})')
+
+    @property
+    def jitter(self) -> float:
+        """The standard deviation of the latency, in seconds."""
+        if self.count < 2:
+            return 0.0
+        return math.sqrt(self._m2 / (self.count - 1))
+
+    def add(self, latency: float) -> None:
+        """Add the latency, in seconds, of a sample."""
+        # Welford's online algorithm
+        self.count += 1
+        delta = latency - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (latency - self.mean)
+        self.min = min(self.min, latency)
+        self.max = max(self.max, latency)
+
+
+class Job:
+
+    def __init__(self,
+                 name: str,
+                 func: Callable[[], None],
+                 interval: float,
+                 report: Callable[[LatencyStats], None] = None) -> None:
+        """A function that is called periodically by a :class:`.Scheduler`.
+
+        Args:
+            name: A name to use in log messages.
+            func: The function to call. It takes no arguments.
+            interval: The number of seconds between calls.
+            report: The function to call with the latency statistics of the
+                samples since the previous report, every ``stats_interval``
+                seconds of the :class:`.Scheduler`.
+        """
+        self.name = name
+        self.func = func
+        self.interval = float(interval)
+        self.report = report
+        self.latency = LatencyStats()
+        self.window = LatencyStats()
+        self.window_t0 = 0.0
+        self.t_start = 0.0
+        self.n = 0
+
+    @property
+    def deadline(self) -> float:
+        """The :func:`time.monotonic` value that the current sample is due at."""
+        return self.t_start + self.n * self.interval
+
+
+class Scheduler:
+
+    def __init__(self, max_workers: int = None, overrun: str = SKIP, stats_interval: float = 3600) -> None:
+        """Call each :class:`.Job` every `interval` seconds in a pool of threads.
+
+        A job is due at the absolute deadlines ``t_start + n*interval`` so the
+        samples do not drift when a call takes a variable amount of time. A job
+        is never called again while its previous call is still running and an
+        exception that a job raises is logged but does not affect the other jobs.
+
+        Args:
+            max_workers: The maximum number of threads in the pool.
+            overrun: What to do if a call takes longer than the interval and
+                deadlines are missed. Either ``skip``, to wait for the next
+                deadline that has not passed, or ``catch-up``, to call the job
+                immediately for each missed deadline.
+            stats_interval: The number of seconds between the latency statistics
+                that are logged (and passed to the `report` function) of each
+                job. The statistics cover the samples since the previous time
+                that they were logged. Set to 0 to only log the statistics of
+                all samples when the scheduler stops.
+        """
+        if overrun not in (SKIP, CATCH_UP):
+            raise ValueError(f'Invalid overrun policy {overrun!r}, must be {SKIP!r} or {CATCH_UP!r}')
+        self.max_workers = max_workers
+        self.overrun = overrun
+        self.stats_interval = float(stats_interval)
+        self._jobs: list[Job] = []
+        self._queue: list[tuple[float, int, Job]] = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+
+    def add(self,
+            name: str,
+            func: Callable[[], None],
+            interval: float,
+            report: Callable[[LatencyStats], None] = None) -> Job:
+        """Add a job, see :class:`.Job` for the arguments."""
+        job = Job(name, func, interval, report=report)
+        self._jobs.append(job)
+        return job
+
+    @property
+    def jobs(self) -> list[Job]:
+        """The jobs that have been added."""
+        return list(self._jobs)
+
+    def stop(self) -> None:
+        """Stop calling jobs. This is safe to call from any thread."""
+        self._stopped.set()
+        self._wakeup.set()
+
+    def run(self) -> None:
+        """Call the jobs until :meth:`.stop` is called.
+
+        Jobs that are running when :meth:`.stop` is called are allowed to finish.
+        """
+        now = time.monotonic()
+        with self._lock:
+            for job in self._jobs:
+                job.t_start = now
+                job.n = 0
+                job.window_t0 = now
+                self._push(job)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='lab-logger') as executor:
+            while not self._stopped.is_set():
+                with self._lock:
+                    now = time.monotonic()
+                    while self._queue and self._queue[0][0] <= now:
+                        _, _, job = heapq.heappop(self._queue)
+                        executor.submit(self._call, job)
+                    timeout = self._queue[0][0] - now if self._queue else None
+                    self._wakeup.clear()
+                self._wakeup.wait(timeout)
+
+        for job in self._jobs:
+            logger.info(f'{job.name} latency: {job.latency}')
+
+    def _call(self, job: Job) -> None:
+        latency = time.monotonic() - job.deadline
+        job.latency.add(latency)
+        job.window.add(latency)
+        try:
+            job.func()
+        except Exception as exc:
+            logger.exception(f'{job.name}: {exc}')
+
+        with self._lock:
+            job.n += 1
+            late = time.monotonic() - job.deadline
+            if late > 0 and self.overrun == SKIP:
+                missed = math.floor(late / job.interval) + 1
+                job.n += missed
+                job.latency.skipped += missed
+                job.window.skipped += missed
+                logger.warning(f'{job.name} overran its interval, skipped {missed} sample(s)')
+
+            window = None
+            now = time.monotonic()
+            if self.stats_interval > 0 and now - job.window_t0 >= self.stats_interval:
+                window, job.window, job.window_t0 = job.window, LatencyStats(), now
+            self._push(job)
+        self._wakeup.set()
+
+        if window is not None:
+            self._report(job, window)
+
+    @staticmethod
+    def _report(job: Job, stats: LatencyStats) -> None:
+        logger.info(f'{job.name} latency: {stats}')
+        if job.report is None:
+            return
+        try:
+            job.report(stats)
+        except Exception as exc:
+            logger.warning(f'{job.name}: cannot report the latency statistics: {exc!r}')
+
+    def _push(self, job: Job) -> None:
+        heapq.heappush(self._queue, (job.deadline, next(self._counter), job))
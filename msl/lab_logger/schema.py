@@ -0,0 +1,118 @@
+"""
+The columns of the data table of a sensor's database.
+"""
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+from enum import Enum
+from functools import cached_property
+from typing import Mapping, Sequence
+
+from .timestamps import EPOCH
+from .timestamps import ISO
+
+
+class DatabaseTypes(Enum):
+    """SQLite data types."""
+    NULL = 'NULL'
+    INTEGER = 'INTEGER'
+    REAL = 'REAL'
+    TEXT = 'TEXT'
+    BLOB = 'BLOB'
+    DATETIME = 'DATETIME'
+    FLOAT = 'REAL'
+
+
+# the numpy type of a column in a structured array, columns of any other type are objects
+_NUMPY_TYPES = {
+    DatabaseTypes.INTEGER: 'int64',
+    DatabaseTypes.REAL: 'float64',
+}
+
+
+@dataclass(frozen=True)
+class FieldSchema:
+    """The names and types of the fields (the columns after ``pid`` and ``datetime``) of a sensor.
+
+    A schema is immutable and the values that are derived from it (e.g., the SQL
+    to insert a row and the numpy dtype) are only computed once, so the same
+    schema can be shared by a :class:`~msl.lab_logger.database.Database`, the
+    validators of the sensor and :func:`~msl.lab_logger.get_data.get_data`.
+    """
+    names: tuple[str, ...]
+    types: tuple[DatabaseTypes, ...]
+
+    @classmethod
+    def from_fields(cls, fields: Mapping[str, DatabaseTypes]) -> FieldSchema:
+        """Create the schema from the :attr:`~msl.lab_logger.sensors.Sensor.fields` of a sensor."""
+        return cls(tuple(fields), tuple(fields.values()))
+
+    @classmethod
+    def from_database(cls, db: sqlite3.Connection, table: str = 'data') -> FieldSchema:
+        """Create the schema from the columns of a table in an existing database.
+
+        A column with a type that is not a :class:`.DatabaseTypes` is a ``REAL`` column.
+        """
+        names, types = [], []
+        for _, name, typ, *_ in db.execute(f'PRAGMA table_info({table});'):
+            if name in ('pid', 'datetime'):
+                continue
+            try:
+                typ = DatabaseTypes(typ.upper())
+            except ValueError:
+                typ = DatabaseTypes.REAL
+            names.append(name)
+            types.append(typ)
+        return cls(tuple(names), tuple(types))
+
+    @cached_property
+    def columns(self) -> tuple[str, ...]:
+        """The names of all columns in the data table."""
+        return ('pid', 'datetime') + self.names
+
+    @cached_property
+    def definitions(self) -> str:
+        """The definitions of the fields to use in a ``CREATE TABLE`` SQL command."""
+        return ', '.join(f'{name} {typ.name}' for name, typ in zip(self.names, self.types))
+
+    @cached_property
+    def insert_sql(self) -> str:
+        """The SQL command to insert a ``(datetime, *fields)`` row into the data table."""
+        return f'INSERT INTO data VALUES (NULL, {", ".join("?" * (len(self.names) + 1))});'
+
+    @cached_property
+    def reject_sql(self) -> str:
+        """The SQL command to insert a ``(datetime, *fields, validator)`` row into the rejected table."""
+        return f'INSERT INTO rejected VALUES (NULL, {", ".join("?" * (len(self.names) + 2))});'
+
+    @cached_property
+    def dtype(self):
+        """The numpy dtype of a structured array of the fields."""
+        import numpy as np
+        return np.dtype([(name, _NUMPY_TYPES.get(typ, object)) for name, typ in zip(self.names, self.types)])
+
+    def array_dtype(self, columns: Sequence[str], fmt: str = ISO):
+        """Returns the numpy dtype of a structured array of the columns in a query.
+
+        The ``pid`` is ``int64``, the ``datetime`` is ``datetime64[s]``
+        (``datetime64[ms]`` if `fmt` is ``epoch``), the fields have the
+        type in :attr:`.dtype` and any other column (e.g., an aggregate)
+        is ``float64``. An ``INTEGER`` field is also ``float64``, so that
+        a ``NULL`` value is ``NaN`` rather than an arbitrary integer.
+        """
+        import numpy as np
+
+        fields = self.dtype.fields
+        dtype = []
+        for name in columns:
+            if name == 'datetime':
+                dtype.append((name, 'datetime64[ms]' if fmt == EPOCH else 'datetime64[s]'))
+            elif name == 'pid':
+                dtype.append((name, 'int64'))
+            elif name in fields:
+                typ = fields[name][0]
+                dtype.append((name, 'float64' if typ.kind == 'i' else typ))
+            else:
+                dtype.append((name, 'float64'))
+        return np.dtype(dtype)
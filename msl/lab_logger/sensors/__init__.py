@@ -1,14 +1,21 @@
 from __future__ import annotations
 
 import re
-import numpy as np
-from typing import TypeVar, Sequence, TYPE_CHECKING
+import socket
+import threading
+from contextlib import contextmanager
+from functools import cached_property
+from typing import Any, Callable, Iterator, TypeVar, Sequence, TYPE_CHECKING
 
 from msl.equipment import Config
 from msl.equipment import EquipmentRecord
 
+from .. import plugins
+from ..schema import DatabaseTypes
+from ..schema import FieldSchema
+
 if TYPE_CHECKING:
-    from ..database import DatabaseTypes
+    import numpy as np
 
 
 class Sensor:
@@ -21,9 +28,55 @@ class Sensor:
     def fields(self) -> dict[str, DatabaseTypes]:
         raise NotImplementedError('Subclass should implement this')
 
+    @cached_property
+    def schema(self) -> FieldSchema:
+        """The schema of the :attr:`.fields`, which is only created once.
+
+        Use the schema (rather than :attr:`.fields`) wherever the fields are
+        needed for each reading.
+        """
+        return FieldSchema.from_fields(self.fields)
+
     def acquire(self) -> Sequence[float]:
-        raise NotImplementedError('Subclass should implement this, including'
-                                  'connection = self.record.connect()')
+        raise NotImplementedError('Subclass should implement this, including '
+                                  'with self.connect() as cxn:')
+
+    def connect(self) -> Iterator[Any]:
+        """Borrow the open connection to the sensor.
+
+        The connection is opened the first time that it is borrowed and it stays
+        open after the `with` block exits, so that the next reading does not
+        have to connect again. If an exception is raised in the `with` block
+        then the connection is closed and it is re-opened the next time that
+        it is borrowed. Usage::
+
+            with self.connect() as cxn:
+                return cxn.read()
+        """
+        return _pool.borrow(self.record, check=self.check_connection, opener=self.open_connection)
+
+    def open_connection(self) -> Any:
+        """Open a new connection to the sensor, which the connection pool keeps open.
+
+        The default implementation calls :meth:`EquipmentRecord.connect`.
+        """
+        return self.record.connect()
+
+    def check_connection(self, connection: Any) -> bool:
+        """Check whether a pooled connection is still usable before it is borrowed.
+
+        The default implementation is :func:`.connection_alive`. A subclass may
+        override this method to, e.g., query the device. If :data:`False` is
+        returned then the connection is closed and a new connection is opened.
+        """
+        return connection_alive(connection)
+
+    def disconnect(self) -> None:
+        """Close the connection to the sensor (if it is open).
+
+        Call this if the sensor, rather than the connection, was reset.
+        """
+        _pool.discard(self.record)
 
     def apply_calibration(self, data_values: np.array) -> np.array:
         # numpy structured array with fields as names
@@ -31,24 +84,170 @@ class Sensor:
 
     @staticmethod
     def find(config: Config, record: EquipmentRecord) -> Sensor:
-        for s in _sensors:
-            if s.matches(record):
-                print(s.cls, record)
-                return s.cls(config, record)
-        raise ValueError(f'Cannot find sensor matching {record}')
+        """Create the registered sensor that matches `record`.
+
+        Only the module of the sensor that matches is imported. If no registered
+        sensor matches then the sensors of the plugins are loaded, see
+        :mod:`msl.lab_logger.plugins`.
+        """
+        while True:
+            for s in _sensors:
+                if s.matches(record):
+                    return s.cls(config, record)
+            if not plugins.load_entry_points(plugins.SENSORS):
+                raise ValueError(f'Cannot find sensor matching {record}')
+
+
+class ConnectionPool:
+
+    def __init__(self) -> None:
+        """Keeps one open connection for each equipment record.
+
+        A connection is only used by one thread at a time.
+        """
+        self._lock = threading.Lock()
+        self._entries: dict[tuple, _PoolEntry] = {}
+
+    @staticmethod
+    def _key(record: EquipmentRecord) -> tuple:
+        return record.manufacturer, record.model, record.serial
+
+    def _entry(self, record: EquipmentRecord) -> _PoolEntry:
+        with self._lock:
+            key = self._key(record)
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _PoolEntry()
+            return entry
+
+    @contextmanager
+    def borrow(self,
+               record: EquipmentRecord,
+               check: Callable[[Any], bool] = None,
+               opener: Callable[[], Any] = None) -> Iterator[Any]:
+        """Borrow the connection for `record`, see :meth:`.Sensor.connect`.
+
+        If `check` is specified then it is called with an existing connection
+        and the connection is re-opened if `check` does not return :data:`True`.
+        A new connection is opened by calling `opener` (default is
+        :meth:`EquipmentRecord.connect`).
+        """
+        entry = self._entry(record)
+        with entry.lock:
+            if entry.connection is not None and check is not None:
+                try:
+                    healthy = check(entry.connection)
+                except Exception:
+                    healthy = False
+                if not healthy:
+                    entry.close()
+            if entry.connection is None:
+                entry.connection = record.connect() if opener is None else opener()
+            try:
+                yield entry.connection
+            except:
+                entry.close()
+                raise
+
+    def discard(self, record: EquipmentRecord) -> None:
+        """Close the connection for `record`."""
+        entry = self._entry(record)
+        with entry.lock:
+            entry.close()
+
+    def close(self) -> None:
+        """Close all connections."""
+        with self._lock:
+            entries = list(self._entries.values())
+        for entry in entries:
+            with entry.lock:
+                entry.close()
+
+
+def connection_alive(connection: Any) -> bool:
+    """Check, without communicating with the device, whether a connection is still usable.
+
+    A socket connection (the connection has a ``socket`` attribute, e.g., the
+    iTHX) is not usable if the device closed it or if there are bytes waiting
+    to be read, since a reply that was not read means that the next reply would
+    not match its request. Likewise, a serial connection (the connection has a
+    ``serial`` attribute, e.g., the PTU300 and the milliK) is not usable if the
+    port is closed or if there are bytes waiting to be read. Any other connection
+    is assumed to be usable.
+    """
+    sock = getattr(connection, 'socket', None)
+    if isinstance(sock, socket.socket):
+        if sock.fileno() == -1:
+            return False
+        timeout = sock.gettimeout()
+        try:
+            sock.setblocking(False)
+            # b'' if the device closed the connection, otherwise unread bytes
+            sock.recv(1, socket.MSG_PEEK)
+        except (BlockingIOError, InterruptedError):
+            return True
+        except OSError:
+            return False
+        finally:
+            sock.settimeout(timeout)
+        return False
+
+    serial = getattr(connection, 'serial', None)
+    if serial is not None and hasattr(serial, 'is_open'):
+        try:
+            return bool(serial.is_open) and not serial.in_waiting
+        except Exception:
+            return False
+
+    return True
+
+
+class _PoolEntry:
+
+    def __init__(self) -> None:
+        self.lock = threading.RLock()
+        self.connection = None
+
+    def close(self) -> None:
+        if self.connection is not None:
+            try:
+                self.connection.disconnect()
+            except Exception:
+                pass
+            finally:
+                self.connection = None
 
 
 class SensorMatcher:
 
     def __init__(self,
-                 cls: type[Sensor],
+                 cls: type[Sensor] | str,
                  manufacturer: str = None,
                  model: str = None,
                  flags: int = 0) -> None:
-        self.cls = cls
+        """Matches an equipment record to a sensor.
+
+        Args:
+            cls: The sensor class, or its ``'module:name'`` path, in which case the
+                module is only imported when :attr:`.cls` is first accessed.
+            manufacturer: The name of the manufacturer. Can be a regex pattern.
+            model: The model number of the equipment. Can be a regex pattern.
+            flags: The flags to use to compile the regex patterns.
+        """
+        if isinstance(cls, str):
+            self.target, self._cls = cls, None
+        else:
+            self.target, self._cls = f'{cls.__module__}:{cls.__qualname__}', cls
         self.manufacturer = re.compile(manufacturer, flags=flags) if manufacturer else None
         self.model = re.compile(model, flags=flags) if model else None
 
+    @property
+    def cls(self) -> type[Sensor]:
+        """The sensor class."""
+        if self._cls is None:
+            self._cls = plugins.import_object(self.target)
+        return self._cls
+
     def matches(self, record: EquipmentRecord) -> bool:
         """Checks if `record` is a match.
 
@@ -82,15 +281,51 @@ def sensor(*, manufacturer: str = None, model: str = None, flags: int = 0):
     def decorate(cls: type[DecoratedSensor]) -> type[DecoratedSensor]:
         if not issubclass(cls, Sensor):
             raise TypeError(f'{cls} is not a subclass of {Sensor}')
-        _sensors.append(SensorMatcher(cls, manufacturer, model, flags))
+        matcher = SensorMatcher(cls, manufacturer, model, flags)
+        for m in _sensors:
+            if m.target == matcher.target:
+                # the sensor was registered by register_sensor() before its module was imported
+                m._cls = cls
+                return cls
+        _sensors.append(matcher)
         #logger.debug(f'added {cls.__name__!r} to the sensor registry')
         return cls
     return decorate
 
 
+def register_sensor(target: str, *, manufacturer: str = None, model: str = None, flags: int = 0) -> None:
+    """Register a sensor without importing its module.
+
+    The module is only imported when :meth:`.Sensor.find` selects the sensor.
+
+    Args:
+        target: The ``'module:name'`` path of the sensor class.
+        manufacturer: The name of the manufacturer. Can be a regex pattern.
+        model: The model number of the equipment. Can be a regex pattern.
+        flags: The flags to use to compile the regex patterns.
+    """
+    _sensors.append(SensorMatcher(target, manufacturer, model, flags))
+
+
+def __getattr__(name: str) -> Any:
+    # e.g., ``from msl.lab_logger.sensors import iTHX`` imports the module of the sensor
+    for m in _sensors:
+        if m.target.endswith(f':{name}'):
+            return m.cls
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
 _sensors: list[SensorMatcher] = []
 
-from .ithx import iTHX
-from .milli_k import milliK
-from .vaisala_ptu300 import PTU300
+_pool = ConnectionPool()
+
+# the manifest of the built-in sensors
+register_sensor('msl.lab_logger.sensors.ithx:iTHX',
+                manufacturer=r'OMEGA', model=r'iTHX-[2DMSW][3D]?', flags=re.IGNORECASE)
+register_sensor('msl.lab_logger.sensors.milli_k:milliK',
+                manufacturer='IsoTech', model='milliK', flags=re.IGNORECASE)
+register_sensor('msl.lab_logger.sensors.vaisala_ptu300:PTU300',
+                manufacturer='Vaisala', model='PTU300', flags=re.IGNORECASE)
+register_sensor('msl.lab_logger.sensors.simulator:Simulator',
+                manufacturer=r'MSL', model=r'Simulator', flags=re.IGNORECASE)
 
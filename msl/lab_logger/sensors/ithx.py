@@ -1,11 +1,17 @@
+from __future__ import annotations
+
 import re
+from functools import cached_property
+from typing import TYPE_CHECKING
 
-import numpy as np
 from msl.equipment import Config
 from msl.equipment import EquipmentRecord
 from . import Sensor
 from . import sensor
-from ..database import DatabaseTypes
+from ..schema import DatabaseTypes
+
+if TYPE_CHECKING:
+    import numpy as np
 
 
 @sensor(manufacturer=r'OMEGA', model=r'iTHX-[2DMSW][3D]?', flags=re.IGNORECASE)
@@ -20,13 +26,13 @@ class iTHX(Sensor):
         self.celsius = props.get('celsius', True)
 
     def acquire(self) -> tuple[float, ...]:
-        with self.record.connect() as cxn:
+        with self.connect() as cxn:
             data = cxn.temperature_humidity_dewpoint(probe=1, celsius=self.celsius, nbytes=self.nbytes)
             if self.nprobes == 2:
                 data += cxn.temperature_humidity_dewpoint(probe=2, celsius=self.celsius, nbytes=self.nbytes)
             return data
 
-    @property
+    @cached_property
     def fields(self) -> dict[str, DatabaseTypes]:
         if self.nprobes == 2:
             return {
@@ -1,9 +1,10 @@
 import re
+from functools import cached_property
 from msl.equipment import Config
 from msl.equipment import EquipmentRecord
 from . import Sensor
 from . import sensor
-from ..database import DatabaseTypes
+from ..schema import DatabaseTypes
 
 
 @sensor(manufacturer='IsoTech', model='milliK', flags=re.IGNORECASE)
@@ -15,10 +16,10 @@ class milliK(Sensor):
         self.channel = self.connection.properties['channel']
 
     def acquire(self) -> tuple[float, ...]:
-        with self.record.connect() as cxn:
+        with self.connect() as cxn:
             return cxn.read_all_channels()
 
-    @property
+    @cached_property
     def fields(self) -> dict[str, DatabaseTypes]:
         dict = {}
         for channel in self.connected_devices:
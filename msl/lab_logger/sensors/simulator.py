@@ -0,0 +1,82 @@
+"""
+A simulated sensor, to run the logger without hardware.
+
+The simulator is configured by the properties of the connection record
+(the equipment record must have manufacturer ``MSL`` and model ``Simulator``),
+all of which are optional:
+
+* ``channels`` -- the number of channels (default 3)
+* ``mean`` -- the mean value of each channel (default 20)
+* ``noise`` -- the standard deviation of the noise (default 0.1)
+* ``dropout`` -- the probability that a reading fails with a :exc:`TimeoutError` (default 0)
+* ``latency`` -- the number of seconds that a reading takes (default 0)
+* ``seed`` -- the seed of the random number generator (default is random)
+
+A reading is taken through a simulated connection that is borrowed from the
+connection pool, like the connection to a real sensor, see :meth:`.Sensor.connect`.
+"""
+from __future__ import annotations
+
+import random
+import re
+import time
+from functools import cached_property
+
+from msl.equipment import Config
+from msl.equipment import EquipmentRecord
+from . import Sensor
+from . import sensor
+from ..schema import DatabaseTypes
+
+
+@sensor(manufacturer=r'MSL', model=r'Simulator', flags=re.IGNORECASE)
+class Simulator(Sensor):
+
+    def __init__(self, config: Config, record: EquipmentRecord) -> None:
+        super().__init__(config, record)
+
+        props = record.connection.properties if record.connection is not None else {}
+        self.channels = int(props.get('channels', 3))
+        self.mean = float(props.get('mean', 20))
+        self.noise = float(props.get('noise', 0.1))
+        self.dropout = float(props.get('dropout', 0))
+        self.latency = float(props.get('latency', 0))
+        self._random = random.Random(props.get('seed'))
+
+    def acquire(self) -> tuple[float, ...]:
+        with self.connect() as cxn:
+            return cxn.read()
+
+    def open_connection(self) -> SimulatedConnection:
+        return SimulatedConnection(self)
+
+    def check_connection(self, connection: SimulatedConnection) -> bool:
+        # the pool is shared by simulators that have the same equipment record
+        return connection.sensor is self
+
+    @cached_property
+    def fields(self) -> dict[str, DatabaseTypes]:
+        return {f'channel{i}': DatabaseTypes.FLOAT for i in range(1, self.channels + 1)}
+
+
+class SimulatedConnection:
+
+    def __init__(self, sensor: Simulator) -> None:
+        """A connection to a :class:`Simulator`.
+
+        The attributes of the sensor (e.g., the dropout) are read for each
+        reading, so they can be changed while the connection is open.
+        """
+        self.sensor = sensor
+
+    def read(self) -> tuple[float, ...]:
+        s = self.sensor
+        if s.latency > 0:
+            time.sleep(s.latency)
+        if s.dropout > 0 and s._random.random() < s.dropout:
+            raise TimeoutError(f'Simulated dropout of {s.record.alias}')
+        gauss = s._random.gauss
+        return tuple(gauss(s.mean, s.noise) for _ in range(s.channels))
+
+    def disconnect(self) -> None:
+        pass
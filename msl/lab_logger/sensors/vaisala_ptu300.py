@@ -1,9 +1,10 @@
 import re
+from functools import cached_property
 from msl.equipment import Config
 from msl.equipment import EquipmentRecord
 from . import Sensor
 from . import sensor
-from ..database import DatabaseTypes
+from ..schema import DatabaseTypes
 
 
 @sensor(manufacturer='Vaisala', model='PTU300', flags=re.IGNORECASE)
@@ -20,16 +21,16 @@ class PTU300(Sensor):
 
         desired_format = '4.3 P " " 3.3 T " " 3.3 RH #r #n'
 
-        with self.record.connect() as cxn:
+        with self.connect() as cxn:
             cxn.set_units(desired_units=desired_units)
             self.sensor_units = cxn.units
             cxn.set_format(format=desired_format)
 
     def acquire(self) -> tuple[float, ...]:
-        with self.record.connect() as cxn:
+        with self.connect() as cxn:
             rdgstr = cxn.get_reading_str()
             return tuple(map(float, rdgstr.split()))
 
-    @property
+    @cached_property
     def fields(self) -> dict[str, DatabaseTypes]:
         return {key: DatabaseTypes.FLOAT for key in self.sensor_units}
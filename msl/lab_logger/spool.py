@@ -0,0 +1,306 @@
+"""
+A local, append-only file that the readings are written to before they are written to a database.
+
+If ``log_dir`` is on a network share (or a folder that is synchronised to the
+cloud) then writing to a database can be slow or fail. When the ``<spool>``
+element is in a configuration file, each reading is first appended to the
+spool file ``<spool>/<serial>.spool`` on a local disk. The spool is emptied
+each time the database has all of its readings. If the database cannot be
+written to, the readings are only appended to the spool and they are written
+to the database in large batches (a replay) once the database is available
+again. A spool that was not emptied, e.g., because the process was killed,
+is replayed the next time that logging starts. The readings are appended by
+the thread of the :class:`~msl.lab_logger.writer.BackgroundWriter` when it
+takes them from its queue, so the readings that are still in the queue are
+not in the spool if the process is killed. For example::
+
+    <spool fsync_batch="100" fsync_interval="1">C:\\lab-logger\\spool</spool>
+
+where ``fsync_batch`` is the number of readings and ``fsync_interval`` is the
+number of seconds (the default values are shown) after which the appended
+readings are flushed to the disk with :func:`os.fsync`, so that a power
+failure loses at most those readings.
+
+A spool file has a header followed by fixed-size records, one per reading.
+Each record has a CRC-32 checksum, so a record that was partially written
+(or corrupted) is detected and skipped. Each record stores the timestamp as
+milliseconds since the epoch and each field as a 64-bit float (``REAL``) or
+integer (``INTEGER``), with a bit mask of the fields that are NULL. A rejected
+reading also stores (up to 64 bytes of) the name of the validator. A replay
+skips the readings that are already in the database. A reading that is newer
+than the latest timestamp in the database (the watermark) is written. An older
+reading is only skipped if the database has a row with the same timestamp and
+values, since the timestamps are local time and, e.g., the readings of the hour
+that repeats when daylight saving time ends are older than the watermark.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+import time
+import zlib
+from datetime import datetime
+from typing import Iterator
+from typing import TYPE_CHECKING
+
+from .log import logger
+from .schema import DatabaseTypes
+from .schema import FieldSchema
+from . import partitions
+from . import timestamps
+
+if TYPE_CHECKING:
+    from msl.equipment import Config
+    from .database import Database
+
+DATA = 0
+REJECTED = 1
+
+_MAGIC = b'MSLSPOOL'
+_VERSION = 1
+# magic, version, record size, digest of the schema
+_HEADER = struct.Struct('<8sHI16s')
+# checksum, kind (DATA or REJECTED), milliseconds since the epoch
+_PREFIX = struct.Struct('<IBq')
+_VALIDATOR_SIZE = 64
+
+_FORMATS = {
+    DatabaseTypes.REAL: 'd',
+    DatabaseTypes.INTEGER: 'q',
+}
+
+
+class Spool:
+
+    def __init__(self,
+                 path: str,
+                 schema: FieldSchema,
+                 *,
+                 fsync_batch: int = 100,
+                 fsync_interval: float = 1.0) -> None:
+        """A local, append-only file of readings.
+
+        Args:
+            path: The path of the spool file. It is created if it does not exist.
+            schema: The schema of the fields of the sensor. Only ``REAL`` and
+                ``INTEGER`` fields are supported.
+            fsync_batch: The number of appended readings after which the file
+                is flushed to the disk.
+            fsync_interval: The number of seconds after which the appended
+                readings are flushed to the disk.
+        """
+        formats = []
+        for name, typ in zip(schema.names, schema.types):
+            if typ not in _FORMATS:
+                raise ValueError(f'A spool does not support the {typ.name} field {name!r}, '
+                                 f'only REAL and INTEGER fields are supported')
+            formats.append(_FORMATS[typ])
+
+        self.path = path
+        self.schema = schema
+        self.fsync_batch = max(1, int(fsync_batch))
+        self.fsync_interval = float(fsync_interval)
+
+        n = len(schema.names)
+        self._mask_size = (n + 7) // 8
+        self._body = struct.Struct(f'<{self._mask_size}s{"".join(formats)}{_VALIDATOR_SIZE}s')
+        self.record_size = _PREFIX.size + self._body.size
+        self._header = _HEADER.pack(_MAGIC, _VERSION, self.record_size,
+                                    hashlib.md5(schema.definitions.encode()).digest())
+
+        self._unsynced = 0
+        self._synced_t = time.monotonic()
+        self._file = self._open()
+
+    @staticmethod
+    def from_config(database: Database, cfg: Config) -> Spool | None:
+        """Create the spool of a database from the ``<spool>`` element in a configuration file.
+
+        Returns :data:`None` if the configuration file does not have a ``<spool>`` element.
+        """
+        element = cfg.find('spool')
+        if element is None or not (element.text or '').strip():
+            return None
+        directory = element.text.strip()
+        os.makedirs(directory, exist_ok=True)
+        return Spool(os.path.join(directory, f'{database.serial}.spool'), database.schema, **element.attrib)
+
+    def __len__(self) -> int:
+        """The number of records in the spool."""
+        return (self._file.seek(0, os.SEEK_END) - _HEADER.size) // self.record_size
+
+    def _open(self):
+        """Open the spool file, recovering from a header that does not match and a partially-written record."""
+        file = open(self.path, mode='a+b', buffering=0)
+        size = file.seek(0, os.SEEK_END)
+        if size == 0:
+            file.write(self._header)
+            return file
+
+        file.seek(0)
+        if file.read(_HEADER.size) != self._header:
+            # e.g., the fields of the sensor changed, keep the file for a person to look at
+            file.close()
+            orphan = f'{self.path}.{datetime.now():%Y%m%dT%H%M%S}.orphan'
+            os.replace(self.path, orphan)
+            logger.warning(f'The header of {self.path} does not match the sensor, moved it to {orphan}')
+            return self._open()
+
+        extra = (size - _HEADER.size) % self.record_size
+        if extra:
+            # the process was killed while a record was being appended
+            logger.warning(f'Removing a partially-written record ({extra} bytes) from {self.path}')
+            file.truncate(size - extra)
+        return file
+
+    def append(self, items: list[tuple]) -> None:
+        """Append readings to the spool.
+
+        Args:
+            items: The readings, each is ``(DATA, row)`` or ``(REJECTED, row, validator)``,
+                where ``row`` is the timestamp followed by the value of each field.
+        """
+        if not items:
+            return
+        self._file.write(b''.join(self._pack(item) for item in items))
+        self._unsynced += len(items)
+        if self._unsynced >= self.fsync_batch or time.monotonic() - self._synced_t >= self.fsync_interval:
+            self.sync()
+
+    def sync(self) -> None:
+        """Flush the appended readings to the disk."""
+        if self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        self._synced_t = time.monotonic()
+
+    def truncate(self) -> None:
+        """Remove all records from the spool, e.g., after the database has all readings."""
+        if self._file.seek(0, os.SEEK_END) > _HEADER.size:
+            self._file.truncate(_HEADER.size)
+        self._unsynced = 0
+
+    def close(self, remove: bool = False) -> None:
+        """Flush the appended readings to the disk and close the spool file.
+
+        Args:
+            remove: Whether to remove the spool file if it has no records.
+        """
+        if self._file.closed:
+            return
+        try:
+            self.sync()
+            empty = len(self) == 0
+        finally:
+            self._file.close()
+        if remove and empty:
+            os.remove(self.path)
+
+    def records(self, size: int = 1000) -> Iterator[list[tuple]]:
+        """Read the records in the spool, skipping the records that are corrupt.
+
+        Args:
+            size: The maximum number of records to yield at a time.
+
+        Yields:
+            The readings, in the same format that they were appended with,
+            except that the timestamp is milliseconds since the epoch.
+        """
+        n = self.record_size
+        self._file.seek(_HEADER.size)
+        while True:
+            chunk = self._file.read(n * size)
+            if not chunk:
+                return
+            items = []
+            for offset in range(0, len(chunk) - n + 1, n):
+                item = self._unpack(chunk[offset:offset + n])
+                if item is not None:
+                    items.append(item)
+            yield items
+
+    def replay(self, database: Database, size: int = 1000) -> tuple[int, int]:
+        """Write the readings in the spool to a database and then empty the spool.
+
+        A reading is skipped if the database already has it, i.e., if its
+        timestamp is not later than the watermark of the database and the
+        database has a row with the same timestamp and values (that was not
+        already matched by a skipped reading). A reading that is older than
+        the watermark but is not in the database (e.g., after the clock went
+        back) is written and a warning is logged. If writing fails then the
+        spool is not emptied and the exception is raised, so the replay can
+        be tried again.
+
+        Args:
+            database: The database to write to.
+            size: The number of readings to write at a time.
+
+        Returns:
+            The number of readings that were written and the number that were skipped.
+        """
+        written = skipped = older = 0
+        watermarks = {}
+        # the number of rows in the database that are equal to a reading and were not matched yet
+        remaining = {}
+        for items in self.records(size):
+            rows, rejected = [], []
+            for kind, ms, *values in items:
+                timestamp = database.timestamp(timestamps.from_epoch(ms))
+                table = 'rejected' if kind == REJECTED else 'data'
+                row = (timestamp, *values[0], values[1]) if kind == REJECTED else (timestamp, *values[0])
+                key = table if database.partition is None else \
+                    (table, partitions.partition_name(timestamp, database.partition))
+                if key not in watermarks:
+                    watermarks[key] = database.watermark(timestamp, table)[0]
+                latest = watermarks[key]
+                if latest is not None and timestamp <= latest:
+                    if (table, row) not in remaining:
+                        remaining[table, row] = database.count_rows(row, table)
+                    if remaining[table, row] > 0:
+                        remaining[table, row] -= 1
+                        skipped += 1
+                        continue
+                    older += 1
+                if kind == REJECTED:
+                    rejected.append((row[:-1], row[-1]))
+                else:
+                    rows.append(row)
+            database.write_many(rows, rejected)
+            written += len(rows) + len(rejected)
+        database.flush()
+        self.truncate()
+        if older:
+            logger.warning(f'Wrote {older} reading(s) from {self.path} to {database.path} that are older '
+                           f'than the latest reading in the database, e.g., the clock went back')
+        return written, skipped
+
+    def _pack(self, item: tuple) -> bytes:
+        timestamp, *values = item[1]
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp)
+        if isinstance(timestamp, datetime):
+            timestamp = timestamps.to_epoch(timestamp)
+
+        mask = 0
+        for i, value in enumerate(values):
+            if value is None:
+                mask |= 1 << i
+                values[i] = 0
+        validator = item[2].encode()[:_VALIDATOR_SIZE] if item[0] == REJECTED else b''
+        body = self._body.pack(mask.to_bytes(self._mask_size, 'little'), *values, validator)
+        kind_time = struct.pack('<Bq', item[0], timestamp)
+        return struct.pack('<I', zlib.crc32(kind_time + body)) + kind_time + body
+
+    def _unpack(self, record: bytes) -> tuple | None:
+        checksum, kind, ms = _PREFIX.unpack_from(record)
+        if zlib.crc32(record[4:]) != checksum:
+            logger.warning(f'Skipping a corrupt record in {self.path}')
+            return None
+        mask, *values, validator = self._body.unpack_from(record, _PREFIX.size)
+        mask = int.from_bytes(mask, 'little')
+        if mask:
+            values = [None if mask & (1 << i) else v for i, v in enumerate(values)]
+        if kind == REJECTED:
+            return kind, ms, tuple(values), validator.rstrip(b'\x00').decode(errors='replace')
+        return kind, ms, tuple(values)
@@ -1,71 +1,161 @@
-import time
+"""
+Start logging the sensors in a configuration file.
+
+Usage::
+
+    python -m msl.lab_logger.start_logging <config.xml> [serial ...]
+
+If no serial numbers are specified then every serial number in the
+``<serials>`` element and every ``serial`` attribute of an ``<equipment>``
+element in the configuration file is logged. Each sensor is polled
+every ``<wait>`` seconds from a pool of ``<max_workers>`` threads. If reading
+a sensor takes longer than ``<wait>`` seconds then ``<overrun>`` decides
+whether the missed readings are skipped (``skip``) or taken immediately
+(``catch-up``). Every ``<stats_interval>`` seconds (default 3600, 0 to
+disable) the statistics of how late the readings of each sensor were taken
+are logged and written to the ``latency`` table of its database. A sensor
+that fails is retried according to the ``<retry>`` element, see
+:func:`msl.lab_logger.retry.from_config`. The equipment records
+are loaded from a local snapshot of the equipment registers while the registers
+are unchanged, see :mod:`msl.lab_logger.register_cache`.
+"""
+import signal
 import sys
-from datetime import datetime
 import traceback
 
 from msl.equipment import Config
+from msl.equipment import EquipmentRecord
 
 from .sensors import Sensor
 from .validators import Validator
 from .database import Database
+from .writer import BackgroundWriter
+from .scheduler import Scheduler
+from . import alerts
+from . import register_cache
+from . import retry
 
 from .log import logger
 
 
-# path, serial = sys.argv[1:]
-path = r'C:\Users\r.hawke\PycharmProjects\msl-lab-logger\msl\examples\lab_logger\ithx_config.xml'
-serial = '8060940'
-# path = r'C:\Users\rebecca.hawke\PycharmProjects\msl-lab-logger\msl\examples\lab_logger\millik_config.xml'
-# serial = '411776.1'
-# path = r'C:\Users\rebecca.hawke\PycharmProjects\msl-lab-logger\msl\examples\lab_logger\vaisala_config.xml'
-# serial = 'P4040154'
-print(path, serial)
-
-cfg = Config(path)
-record = cfg.database().records(serial=serial)[0]
-
-wait = cfg.value('wait', 60)
-
-sensor = Sensor.find(cfg, record)
-database = Database(sensor)
-
-validators = []
-validator_element = cfg.find('validators')
-if validator_element:
-    for val in validator_element:
-        kwargs = val.attrib
-        # print(kwargs)
-        validators.append(Validator.find(sensor, **kwargs))
-# print("validators", validators)
-
-while True:
+class SensorLogger:
+
+    def __init__(self, cfg: Config, record: EquipmentRecord) -> None:
+        """Acquire, validate and write the data from one sensor to its database.
+
+        The data is written by a :class:`~msl.lab_logger.writer.BackgroundWriter`,
+        so that writing to the database does not delay the next reading.
+        """
+        self.sensor = Sensor.find(cfg, record)
+        self.database = Database(self.sensor)
+        self.writer = BackgroundWriter.from_config(self.database, cfg)
+        self.wait = cfg.value('wait', 60)
+        self.retry, self.breaker = retry.from_config(cfg)
+        self.validators = Validator.from_config(self.sensor)
+
+    def log(self) -> None:
+        """Acquire a reading and write it to the data table if all validators pass, otherwise to the rejected table."""
+        alias = self.sensor.record.alias
+        if not self.breaker.allow():
+            return
+
+        try:
+            data = self.retry.call(self.sensor.acquire, name=alias)
+        except Exception as exc:
+            if self.breaker.failure():
+                logger.error(f'{alias} failed {self.breaker.failures} times in a row, pausing '
+                             f'for {self.breaker.cooldown} seconds: {exc!r}')
+            else:
+                logger.error(f'{alias} failed, will try again at the next interval: {exc!r}')
+            return
+
+        self.breaker.success()
+
+        logger.info(f'{alias} readings: {data}')
+        timestamp = self.database.timestamp()
+
+        results = [timestamp]
+        results.extend(data)
+        for validator in self.validators:
+            if not validator.validate(data):
+                # keep the rejected data to be able to diagnose a faulty sensor
+                self.writer.write_rejected(results, validator.name)
+                return
+
+        self.writer.write(results)
+
+    def close(self) -> None:
+        """Write the queued readings, close the database and disconnect from the sensor."""
+        try:
+            self.writer.close()
+        finally:
+            self.sensor.disconnect()
+
+
+def find_serials(cfg: Config) -> list[str]:
+    """Returns the serial numbers to log from a configuration file."""
+    serials = []
+    element = cfg.find('serials')
+    if element is not None and element.text:
+        serials.extend(element.text.split())
+    for element in cfg.findall('equipment'):
+        serial = element.attrib.get('serial')
+        if serial and serial not in serials:
+            serials.append(serial)
+    return serials
+
+
+def _terminate(signum, frame):
+    # raise SystemExit so that the buffered rows are written when the loggers are closed
+    sys.exit(0)
+
+
+def main(*args) -> None:
+    if not args:
+        sys.exit('Usage: python -m msl.lab_logger.start_logging <config.xml> [serial ...]')
+
+    path, serials = args[0], list(args[1:])
+    cfg = Config(path)
+    if not serials:
+        serials = find_serials(cfg)
+
+    records = register_cache.find_records(cfg, serials)
+    loggers = []
+    for serial in serials:
+        try:
+            if records[serial] is None:
+                raise ValueError('no equipment record has this serial number')
+            loggers.append(SensorLogger(cfg, records[serial]))
+        except Exception as exc:
+            # a sensor that cannot be set up must not prevent the other sensors from logging
+            logger.exception(f'Cannot log serial {serial}: {exc}')
+
+    if not loggers:
+        sys.exit(f'There are no sensors to log in {path}')
+
+    scheduler = Scheduler(max_workers=cfg.value('max_workers', min(32, len(loggers))),
+                          overrun=cfg.value('overrun', 'skip'),
+                          stats_interval=cfg.value('stats_interval', 3600))
+    for sensor_logger in loggers:
+        scheduler.add(sensor_logger.sensor.record.alias, sensor_logger.log, sensor_logger.wait,
+                      report=sensor_logger.database.write_latency)
+
+    signal.signal(signal.SIGTERM, _terminate)
     try:
-        t0 = time.monotonic()
-
-        while True:
+        scheduler.run()
+    finally:
+        scheduler.stop()
+        for sensor_logger in loggers:
             try:
-                data = sensor.acquire()
-                logger.info(f'{sensor.record.alias} readings: {data}')
-                break
-            except Exception as exc:
-                logger.exception(exc)  # log what happened
-
-        timestamp = datetime.now().replace(microsecond=0).isoformat(sep='T')
-
-        add_it = True
-        for validator in validators:
-            if not validator.validate(data):
-                add_it = False
-                break
-
-        if add_it:
-            results = [timestamp]
-            results.extend(data)
-            database.write(results)
+                sensor_logger.close()
+            except Exception:
+                traceback.print_exc(file=sys.stderr)
+        alerts.close()
 
-        dt = time.monotonic() - t0
-        time.sleep(max(0, wait - dt))
 
-    except:
+if __name__ == '__main__':
+    try:
+        main(*sys.argv[1:])
+    except Exception:
         traceback.print_exc(file=sys.stderr)
         input('Press <ENTER> to close ...')
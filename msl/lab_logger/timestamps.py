@@ -0,0 +1,154 @@
+"""
+Conversions between the formats that timestamps are stored as in a database.
+
+A timestamp is either stored as an ISO 8601 string (``DATETIME`` column) or as
+an integer number of milliseconds since 1970-01-01T00:00:00 (``INTEGER`` column).
+In both formats the timestamp is the local (naive) time of the computer that
+logged the data, i.e., an epoch value is computed as though the local time was
+UTC so that both formats sort, bucket and convert identically.
+"""
+import sqlite3
+from datetime import datetime
+from datetime import timedelta
+
+ISO = 'iso'
+EPOCH = 'epoch'
+
+_EPOCH_ORIGIN = datetime(1970, 1, 1)
+_ONE_MS = timedelta(milliseconds=1)
+
+
+def to_epoch(dt):
+    """Convert a naive :class:`~datetime.datetime` to milliseconds since the epoch."""
+    return (dt - _EPOCH_ORIGIN) // _ONE_MS
+
+
+def from_epoch(ms):
+    """Convert milliseconds since the epoch to a naive :class:`~datetime.datetime`."""
+    return _EPOCH_ORIGIN + ms * _ONE_MS
+
+
+def timestamp_format(db):
+    """Returns the format that the timestamps in the data table are stored as.
+
+    Parameters
+    ----------
+    db : :class:`sqlite3.Connection`
+        A connection to the database.
+
+    Returns
+    -------
+    :class:`str`
+        Either :data:`ISO` or :data:`EPOCH`.
+    """
+    for row in db.execute('PRAGMA table_info(data);'):
+        if row[1] == 'datetime':
+            return EPOCH if row[2].upper() == 'INTEGER' else ISO
+    return ISO
+
+
+def query_value(value, fmt):
+    """Convert a `start` or `end` value of a query to the format that is stored in the database.
+
+    Parameters
+    ----------
+    value : :class:`datetime.datetime` or :class:`str` or :data:`None`
+        The value to convert. If a :class:`str` then in ``yyyy-mm-dd``
+        or ``yyyy-mm-dd HH:MM:SS`` format.
+    fmt : :class:`str`
+        Either :data:`ISO` or :data:`EPOCH`.
+    """
+    if value is None:
+        return None
+    # a string is parsed (rather than compared as is) so that, e.g., 'yyyy-mm-dd HH:MM:SS'
+    # is compared with the stored 'yyyy-mm-ddTHH:MM:SS' the same way for both formats
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if fmt == EPOCH:
+        return to_epoch(value)
+    return value.isoformat(sep='T')
+
+
+# converts an ISO 8601 string to milliseconds since the epoch (as though the string was UTC)
+_ISO_TO_EPOCH_SQL = "CAST(ROUND((julianday({}) - 2440587.5) * 86400000) AS INTEGER)"
+
+
+def epoch_sql(column, fmt):
+    """Returns the SQL expression that selects a timestamp column as milliseconds since the epoch.
+
+    Parameters
+    ----------
+    column : :class:`str`
+        The name of the column.
+    fmt : :class:`str`
+        The format that the column stores, either :data:`ISO` or :data:`EPOCH`.
+    """
+    return column if fmt == EPOCH else _ISO_TO_EPOCH_SQL.format(column)
+
+
+def _convert_table(db, table):
+    # rebuild a table with an INTEGER datetime column and then recreate its indexes
+    indexes = [row[0] for row in db.execute(
+        "SELECT sql FROM sqlite_master WHERE type='index' AND tbl_name=? AND sql IS NOT NULL;", (table,))]
+    columns = db.execute(f'PRAGMA table_info({table});').fetchall()
+    names = [c[1] for c in columns]
+    definitions = []
+    for c in columns:
+        if c[1] == 'pid' and table == 'data':
+            definitions.append('pid INTEGER PRIMARY KEY AUTOINCREMENT')
+        elif c[1] == 'datetime':
+            definitions.append('datetime INTEGER')
+        else:
+            definitions.append(f'{c[1]} {c[2]}')
+    selected = [epoch_sql(n, ISO) if n == 'datetime' else n for n in names]
+
+    db.execute(f'CREATE TABLE {table}_epoch ({", ".join(definitions)});')
+    db.execute(f'INSERT INTO {table}_epoch ({", ".join(names)}) SELECT {", ".join(selected)} FROM {table};')
+    db.execute(f'DROP TABLE {table};')
+    db.execute(f'ALTER TABLE {table}_epoch RENAME TO {table};')
+    for sql in indexes:
+        db.execute(sql)
+
+
+def convert_to_epoch(path, vacuum=True):
+    """Convert the ISO 8601 timestamps in a database to epoch milliseconds.
+
+    The ``data`` table and, if they exist, the ``rejected`` and ``latency``
+    tables are rewritten in place in a single transaction. Databases that
+    already store epoch timestamps are not modified.
+
+    Parameters
+    ----------
+    path : :class:`str`
+        The path to the SQLite database.
+    vacuum : :class:`bool`, optional
+        Whether to ``VACUUM`` the database afterwards to reclaim the space
+        that the ISO 8601 strings used.
+
+    Returns
+    -------
+    :class:`bool`
+        Whether the database was converted.
+    """
+    db = sqlite3.connect(path, isolation_level=None)
+    try:
+        db.execute('BEGIN IMMEDIATE;')
+        if timestamp_format(db) == EPOCH:
+            db.execute('ROLLBACK;')
+            return False
+
+        tables = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type='table';")}
+        for table in ('data', 'rejected', 'latency'):
+            if table in tables:
+                _convert_table(db, table)
+        db.execute('CREATE INDEX IF NOT EXISTS data_datetime ON data (datetime);')
+        db.execute('COMMIT;')
+        if vacuum:
+            db.execute('VACUUM;')
+        return True
+    except:
+        if db.in_transaction:
+            db.execute('ROLLBACK;')
+        raise
+    finally:
+        db.close()
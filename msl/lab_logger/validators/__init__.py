@@ -1,55 +1,134 @@
 from __future__ import annotations
 
-from typing import TypeVar, Sequence
-
-from msl.io import send_email
+from typing import Any, TypeVar, Sequence, TYPE_CHECKING
 
 from ..sensors import Sensor
 from ..log import logger
+from .. import alerts
+from .. import plugins
+
+if TYPE_CHECKING:
+    import numpy as np
 
 
 class Validator:
     """
     A Validator validates the data before the data is inserted into a database.
     All custom-written validators should inherit from the :class:`.Validator` class
-    and override the :meth:`~.Validator.validate` method.
+    and either set the :attr:`.lower` and :attr:`.upper` bounds of each field or
+    override the :meth:`~.Validator.validate` method.
     """
     name = ""
 
     def __init__(self, sensor: Sensor, **kwargs) -> None:
         self.config = sensor.config
         self.sensor = sensor
+        self.field_names = sensor.schema.names
+
+        # the lower and upper bound of each field, in the same order as field_names
+        self.lower: np.ndarray | None = None
+        self.upper: np.ndarray | None = None
 
     def validate(self, data: Sequence[float], ) -> bool:
-        raise NotImplementedError('Subclass should implement this')
+        """Validate one reading.
+
+        The default implementation checks that each value is within the
+        :attr:`.lower` and :attr:`.upper` bounds of its field and logs a
+        warning for each value that is not.
+        """
+        if self.lower is None or self.upper is None:
+            raise NotImplementedError('Subclass should implement this')
+
+        import numpy as np
+        values = np.asarray(data, dtype=float)
+        ok = (values >= self.lower) & (values <= self.upper)
+        if ok.all():
+            return True
+
+        for i in np.flatnonzero(~ok):
+            self.log_warning(
+                f'{self.field_names[i]} value of {values[i]} is out of range '
+                f'[{self.lower[i]}, {self.upper[i]}] for {self.sensor.record.alias}'
+            )
+        return False
+
+    def validate_many(self, array: np.ndarray) -> np.ndarray:
+        """Validate many readings at once, e.g., the readings in an existing database.
+
+        Nothing is logged and no other side effects (e.g., sending an email) occur.
+
+        Args:
+            array: Either a 2D array with one reading per row and one field per
+                column or a structured array that has the field names of the sensor.
+
+        Returns:
+            A boolean array that is :data:`True` for each reading that is valid.
+        """
+        import numpy as np
+
+        values = self._as_2d(array)
+        if self.lower is None or self.upper is None:
+            return np.fromiter((self.validate(row) for row in values), dtype=bool, count=len(values))
+        return ((values >= self.lower) & (values <= self.upper)).all(axis=1)
+
+    def _as_2d(self, array: np.ndarray) -> np.ndarray:
+        """Convert `array` to a 2D float array with the columns in the order of the field names."""
+        import numpy as np
+        array = np.asarray(array)
+        if array.dtype.names:
+            return np.column_stack([array[name].astype(float) for name in self.field_names])
+        return np.atleast_2d(array.astype(float, copy=False))
+
+    def _bounds(self, limits) -> None:
+        """Set the :attr:`.lower` and :attr:`.upper` bounds from one ``(lower, upper)`` pair per field."""
+        import numpy as np
+        self.lower = np.array([lo for lo, _ in limits], dtype=float)
+        self.upper = np.array([hi for _, hi in limits], dtype=float)
 
     def send_email(self,
                    body: str,
                    *,
                    subject: str = '[MSL-Lab-Logger] Validator warning') -> bool:
-        smtp = self.config.find('smtp')
-        if smtp is None:
-            return False
-        settings = smtp.find('settings')
-        if settings is None:
-            return False
-        recipients = smtp.findall('recipients')
-        if recipients is None:
+        """Send an alert (an email, unless configured otherwise) from a background thread.
+
+        This method does not wait for the alert to be sent and alerts from the
+        same sensor and validator are rate limited, see :mod:`msl.lab_logger.alerts`.
+
+        Returns:
+            Whether the alert will be sent.
+        """
+        dispatcher = alerts.from_config(self.config)
+        if dispatcher is None:
             return False
+        return dispatcher.submit(self.sensor.record.alias, self.name, subject, body)
 
-        try:
-            send_email(settings, recipients, sender=None, subject=subject, body=body)
-        except Exception as e:
-            logger.exception(e)
+    @staticmethod
+    def from_config(sensor: Sensor) -> list[Validator]:
+        """Create the validators in the ``<validators>`` element of the sensor's configuration file."""
+        validators = []
+        validator_element = sensor.config.find('validators')
+        if validator_element:
+            for val in validator_element:
+                kwargs = val.attrib
+                validators.append(Validator.find(sensor, **kwargs))
+        return validators
 
     @staticmethod
     def find(sensor: Sensor, name: str, **kwargs) -> Validator:
-        for v in _validators:
-            if v.matches(name):
-                val = v.cls(sensor, **kwargs)
-                val.name = name
-                return val
-        raise ValueError(f'Cannot find validator matching {name}')
+        """Create the registered validator called `name`.
+
+        Only the module of the validator that matches is imported. If no registered
+        validator matches then the validators of the plugins are loaded, see
+        :mod:`msl.lab_logger.plugins`.
+        """
+        while True:
+            for v in _validators:
+                if v.matches(name):
+                    val = v.cls(sensor, **kwargs)
+                    val.name = name
+                    return val
+            if not plugins.load_entry_points(plugins.VALIDATORS):
+                raise ValueError(f'Cannot find validator matching {name}')
 
     @staticmethod
     def log_debug(msg, *args, **kwargs):
@@ -95,11 +174,28 @@ class Validator:
 class ValidatorMatcher:
 
     def __init__(self,
-                 cls: type[Validator],
+                 cls: type[Validator] | str,
                  name: str) -> None:
-        self.cls = cls
+        """Matches a name to a validator.
+
+        Args:
+            cls: The validator class, or its ``'module:name'`` path, in which case the
+                module is only imported when :attr:`.cls` is first accessed.
+            name: The name of the validator.
+        """
+        if isinstance(cls, str):
+            self.target, self._cls = cls, None
+        else:
+            self.target, self._cls = f'{cls.__module__}:{cls.__qualname__}', cls
         self.name = name.lower()
 
+    @property
+    def cls(self) -> type[Validator]:
+        """The validator class."""
+        if self._cls is None:
+            self._cls = plugins.import_object(self.target)
+        return self._cls
+
     def matches(self, name) -> bool:
         """Checks if `name` is a match.
 
@@ -124,12 +220,42 @@ def validator(name: str):
     def decorate(cls: type[DecoratedValidator]) -> type[DecoratedValidator]:
         if not issubclass(cls, Validator):
             raise TypeError(f'{cls} is not a subclass of {Validator}')
-        _validators.append(ValidatorMatcher(cls, name))
+        matcher = ValidatorMatcher(cls, name)
+        for m in _validators:
+            if m.target == matcher.target:
+                # the validator was registered by register_validator() before its module was imported
+                m._cls = cls
+                return cls
+        _validators.append(matcher)
         #logger.debug(f'added {cls.__name__!r} to the validator registry')
         return cls
     return decorate
 
 
+def register_validator(target: str, name: str) -> None:
+    """Register a validator without importing its module.
+
+    The module is only imported when :meth:`.Validator.find` selects the validator.
+
+    Args:
+        target: The ``'module:name'`` path of the validator class.
+        name: The name of the validator, e.g. range-checker
+    """
+    _validators.append(ValidatorMatcher(target, name))
+
+
+def __getattr__(name: str) -> Any:
+    # e.g., ``from msl.lab_logger.validators import simpleRange`` imports the module of the validator
+    for m in _validators:
+        if m.target.endswith(f':{name}'):
+            return m.cls
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
 _validators: list[ValidatorMatcher] = []
 
-from .range_checker import *
+# the manifest of the built-in validators
+register_validator('msl.lab_logger.validators.range_checker:simpleRange', 'simple-range')
+register_validator('msl.lab_logger.validators.range_checker:sendEmail', 'send-email')
+register_validator('msl.lab_logger.validators.range_checker:ithxRangeChecker', 'ithx-range-checker')
+register_validator('msl.lab_logger.validators.range_checker:ithxWithReset', 'ithx-with-reset')
@@ -43,18 +43,7 @@ class simpleRange(Validator):
         """
         self.vmin = float(vmin)
         self.vmax = float(vmax)
-
-    def validate(self, data):
-        fields = self.sensor.fields.keys()
-        flag = True  # assume the data is okay to insert into the database
-        for f, v in zip(fields, data):
-            if not (self.vmin <= v <= self.vmax):
-                self.log_warning(
-                    f'{f} value of {v} is out of range [{self.vmin}, {self.vmax}] for {self.sensor.record.alias}'
-                )
-                flag = False  # the data is not okay to insert into the database
-
-        return flag
+        self._bounds([(self.vmin, self.vmax)] * len(self.field_names))
 
 
 @validator(name='send-email')
@@ -75,6 +64,11 @@ class sendEmail(Validator):
             self.send_email(
                 body=f'Received {data} from {self.sensor.record.alias}'
             )
+            return False
+        return True
+
+    def validate_many(self, array):
+        return self.simplerange.validate_many(array)
 
 
 @validator(name='ithx-range-checker')  # existing code uses simple-range
@@ -112,41 +106,20 @@ class ithxRangeChecker(Validator):
         self.dmin = float(dmin)
         self.dmax = float(dmax)
 
-    def validate(self, data):
-        if len(data) == 3:
-            t1, h1, d1 = data
-            temperatures = [t1]
-            humidities = [h1]
-            dewpoints = [d1]
-        else:
-            t1, h1, d1, t2, h2, d2 = data
-            temperatures = [t1, t2]
-            humidities = [h1, h2]
-            dewpoints = [d1, d2]
-
-        for t in temperatures:
-            if not (self.tmin <= t <= self.tmax):
-                self.log_warning(
-                    f'Temperature value of {t} is out of range [{self.tmin}, {self.tmax}] for {self.sensor.record.alias}'
-                )
-                return False
-
-        for h in humidities:
-            if not (self.hmin <= h <= self.hmax):
-                self.log_warning(
-                    f'Humidity value of {h} is out of range [{self.hmin}, {self.hmax}] for {self.sensor.record.alias}'
-                )
-                return False
-
-        for d in dewpoints:
-            if not (self.dmin <= d <= self.dmax):
-                self.log_warning(
-                    f'Dewpoint value of {d} is out of range [{self.dmin}, {self.dmax}] for {self.sensor.record.alias}'
-                )
-                return False
-
-        # the data is okay, return True to insert the data into the database
-        return True
+        limits = {
+            'temperature': (self.tmin, self.tmax),
+            'humidity': (self.hmin, self.hmax),
+            'dewpoint': (self.dmin, self.dmax),
+        }
+        # the field names of a 2-probe iTHX end with the probe number, e.g., temperature2
+        bounds = []
+        for name in self.field_names:
+            key = name.rstrip('0123456789')
+            if key not in limits:
+                raise ValueError(f'The {self.__class__.__name__} validator cannot check the {name!r} field '
+                                 f'of {sensor.record.alias}, the fields must be temperature, humidity or dewpoint')
+            bounds.append(limits[key])
+        self._bounds(bounds)
 
 
 @validator(name='ithx-with-reset')
@@ -181,9 +154,14 @@ class ithxWithReset(Validator):
             self.log_warning(
                 f'The {self.sensor.record.alias} Omega iServer will reset due to {self.reset_criterion} bad readings.'
             )
-            with self.sensor.record.connect() as cxn:
+            with self.sensor.connect() as cxn:
                 cxn.reset(wait=True, password=None, port=2002, timeout=10)
+            # the iServer rebooted, so the pooled connection to it is no longer valid
+            self.sensor.disconnect()
             self.counter = 0
 
         return False
 
+    def validate_many(self, array):
+        return self.simplerange.validate_many(array)
+
@@ -0,0 +1,355 @@
+"""
+Write the readings to a database from a background thread.
+
+The thread that acquires a reading puts it in a bounded queue and a single
+thread per database drains the queue in batches, so a slow disk or a locked
+database does not delay the next reading. The writer is configured by the
+``<writer>`` element in a configuration file, for example (these are the
+default values)::
+
+    <writer maxsize="10000" batch_size="1000" policy="block"/>
+
+where ``policy`` decides what happens when the queue is full, either
+
+* ``block`` -- wait until the writer has made space in the queue
+* ``drop-oldest`` -- discard the oldest reading in the queue
+* ``spill`` -- append the reading to ``<database>.spill``, which the writer
+  reads back once the queue is empty. Until then, the readings that follow are
+  also spilled, so that the readings are written in the order they were taken.
+  A spill that was not written (e.g., the process was killed) is written when
+  the writer starts.
+
+If the configuration file has a ``<spool>`` element then the writer appends
+each reading to the :class:`~msl.lab_logger.spool.Spool` before it is written
+to the database and, while the database cannot be written to, the readings
+are only appended to the spool (see :mod:`~msl.lab_logger.spool`). A reading
+is appended to the spool by the writer thread, when it is taken from the
+queue, so that the thread that acquires the readings never waits for the
+spool (e.g., while the spool is replayed). The readings that are waiting in
+the queue, at most ``maxsize``, are therefore lost if the process is killed.
+"""
+from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+import time
+from typing import Sequence, TYPE_CHECKING
+
+from .database import Database
+from .log import logger
+from .spool import DATA
+from .spool import REJECTED
+from .spool import Spool
+
+if TYPE_CHECKING:
+    from msl.equipment import Config
+
+BLOCK = 'block'
+DROP_OLDEST = 'drop-oldest'
+SPILL = 'spill'
+
+# the number of seconds to wait for a reading before checking if the buffer
+# of the database is due to be flushed (or if a failed flush should be retried)
+_IDLE = 1.0
+
+
+class WriterStats:
+
+    def __init__(self) -> None:
+        """Counters of a :class:`.BackgroundWriter`.
+
+        The readings that were written are the readings that the database
+        (or the spool) accepted, a batch that could not be written is an error.
+        """
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.max_depth = 0
+        self.errors = 0
+
+    def __repr__(self) -> str:
+        return (f'WriterStats(queued={self.queued}, written={self.written}, dropped={self.dropped}, '
+                f'spilled={self.spilled}, max_depth={self.max_depth}, errors={self.errors})')
+
+
+class BackgroundWriter:
+
+    def __init__(self,
+                 database: Database,
+                 *,
+                 maxsize: int = 10000,
+                 batch_size: int = 1000,
+                 policy: str = BLOCK,
+                 spool: Spool = None) -> None:
+        """Write the readings to a database from a background thread.
+
+        Args:
+            database: The database to write to. It is closed by :meth:`.close`.
+            maxsize: The maximum number of readings in the queue.
+            batch_size: The maximum number of readings to take from the queue
+                and to add to the database at a time.
+            policy: What to do when the queue is full, either ``block``,
+                ``drop-oldest`` or ``spill``.
+            spool: The spool to append the readings to before they are written
+                to the database. It is replayed (if it has readings) when the
+                thread starts and it is closed by :meth:`.close`.
+        """
+        if policy not in (BLOCK, DROP_OLDEST, SPILL):
+            raise ValueError(f'Invalid writer policy {policy!r}, must be '
+                             f'{BLOCK!r}, {DROP_OLDEST!r} or {SPILL!r}')
+        self.database = database
+        self.batch_size = max(1, int(batch_size))
+        self.policy = policy
+        self.stats = WriterStats()
+        self.spill_path = f'{database.path}.spill'
+        self.replay_path = f'{self.spill_path}.replay'
+        self.spool = spool
+        # whether there are readings in the spool that are not in the database
+        self._backlog = spool is not None and len(spool) > 0
+        self._replay_t = 0.0
+        self._queue: queue.Queue[tuple | None] = queue.Queue(maxsize=max(1, int(maxsize)))
+        self._spill_lock = threading.Lock()
+        # whether readings are being spilled, rather than queued, until the spill is replayed
+        self._spilling = os.path.isfile(self.spill_path) or os.path.isfile(self.replay_path)
+        # whether the readings in the replay file were added to the buffer of the database
+        self._replayed = False
+        self._closing = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'writer-{os.path.basename(database.path)}', daemon=True)
+        self._thread.start()
+
+    @property
+    def depth(self) -> int:
+        """The number of readings in the queue."""
+        return self._queue.qsize()
+
+    @staticmethod
+    def from_config(database: Database, cfg: Config) -> BackgroundWriter:
+        """Create a writer from the ``<writer>`` element in a configuration file."""
+        element = cfg.find('writer')
+        kwargs = dict(element.attrib) if element is not None else {}
+        return BackgroundWriter(database, spool=Spool.from_config(database, cfg), **kwargs)
+
+    def write(self, data: Sequence[float]) -> None:
+        """Queue a reading to write to the data table, see :meth:`.Database.write`."""
+        self._put((DATA, tuple(data)))
+
+    def write_rejected(self, data: Sequence[float], validator: str) -> None:
+        """Queue a reading to write to the rejected table, see :meth:`.Database.write_rejected`."""
+        self._put((REJECTED, tuple(data), validator))
+
+    def close(self) -> None:
+        """Write the queued readings, stop the background thread and close the database."""
+        self._closing.set()
+        self._queue.put(None)
+        self._thread.join()
+        try:
+            self._replay_spill()
+            if self._backlog:
+                self._replay_spool(force=True)
+            self.database.close()
+            self._written()
+            self._spill_written()
+        finally:
+            try:
+                if self.spool is not None:
+                    self.spool.close(remove=True)
+            finally:
+                logger.info(f'{self.database.path} writer: {self.stats}')
+
+    def _put(self, item: tuple) -> None:
+        stats = self.stats
+        stats.queued += 1
+        if self.policy == BLOCK:
+            self._queue.put(item)
+        elif self.policy == SPILL:
+            with self._spill_lock:
+                if not self._spilling:
+                    try:
+                        self._queue.put_nowait(item)
+                    except queue.Full:
+                        self._spilling = True
+                if self._spilling:
+                    self._spill(item)
+        else:
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                self._drop_oldest(item)
+        stats.max_depth = max(stats.max_depth, self._queue.qsize())
+
+    def _drop_oldest(self, item: tuple) -> None:
+        while True:
+            try:
+                self._queue.get_nowait()
+                self.stats.dropped += 1
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                continue
+
+    def _spill(self, item: tuple) -> None:
+        # the caller must hold the spill lock
+        with open(self.spill_path, mode='at', encoding='utf-8') as fp:
+            fp.write(json.dumps(item) + '\n')
+        self.stats.spilled += 1
+
+    def _run(self) -> None:
+        # a spill that was not written when the writer last stopped is older than any queued reading
+        self._try_replay_spill()
+        while True:
+            if self._spilling and self._queue.empty():
+                # the queued readings are written, the spilled readings are next
+                self._try_replay_spill()
+            if self._backlog:
+                self._replay_spool()
+            if self.database.pending >= self._queue.maxsize:
+                # the database cannot be written to, stop taking readings from the
+                # queue (so that the policy applies) until the buffer is written
+                self._flush()
+                if self.database.pending >= self._queue.maxsize and not self._closing.wait(_IDLE):
+                    continue
+            try:
+                item = self._queue.get(timeout=_IDLE)
+            except queue.Empty:
+                self._flush(due=True)
+                if self.spool is not None:
+                    self.spool.sync()
+                continue
+
+            stop = item is None
+            batch = [] if stop else [item]
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                else:
+                    batch.append(item)
+
+            self._write(batch)
+            if stop:
+                return
+
+    def _write(self, batch: list[tuple]) -> None:
+        if self.spool is not None:
+            self.spool.append(batch)
+            # the readings in the spool are written to the database, if not now then by a replay
+            self.stats.written += len(batch)
+            if self._backlog:
+                return
+        rows = [item[1] for item in batch if item[0] == DATA]
+        rejected = [(item[1], item[2]) for item in batch if item[0] == REJECTED]
+        try:
+            self.database.write_many(rows, rejected)
+        except Exception as e:
+            self._failed(e)
+        else:
+            if self.spool is None:
+                self.stats.written += len(batch)
+            self._written()
+
+    def _flush(self, due: bool = False) -> None:
+        try:
+            if due:
+                self.database.flush_if_due()
+            else:
+                self.database.flush()
+        except Exception as e:
+            self._failed(e)
+        else:
+            self._written()
+
+    def _failed(self, error: Exception) -> None:
+        # without a spool, the rows are kept in the buffer of the database and written by the next
+        # flush, with a spool, the rows are discarded from the buffer and written by the next replay
+        self.stats.errors += 1
+        logger.error(f'Cannot write to {self.database.path}, will try again: {error!r}')
+        if self.spool is not None:
+            self.database.clear_buffer()
+            self._backlog = True
+            self._replay_t = time.monotonic()
+
+    def _written(self) -> None:
+        # the spool is emptied (and the replay file is removed) once the database has all of its readings
+        if self.database.pending:
+            return
+        if self.spool is not None and not self._backlog:
+            self.spool.truncate()
+        if self._replayed:
+            os.remove(self.replay_path)
+            self._replayed = False
+
+    def _replay_spool(self, force: bool = False) -> None:
+        """Write the readings in the spool to the database, at most every :data:`_IDLE` seconds."""
+        if not force and time.monotonic() - self._replay_t < _IDLE:
+            return
+        self.database.clear_buffer()
+        try:
+            written, skipped = self.spool.replay(self.database, self.batch_size)
+        except Exception as e:
+            self._failed(e)
+        else:
+            self._backlog = False
+            logger.info(f'Replayed {self.spool.path} into {self.database.path}: '
+                        f'{written} readings written, {skipped} already in the database')
+
+    def _try_replay_spill(self) -> None:
+        try:
+            self._replay_spill()
+        except Exception as e:
+            logger.error(f'Cannot replay {self.spill_path}: {e!r}')
+
+    def _replay_spill(self) -> None:
+        """Write the readings that were spilled to disk, in the order that they were spilled.
+
+        The spill is renamed to the replay file, which is read once and removed when
+        the database has written its readings. While the database cannot be written
+        to, the readings stay in the buffer of the database and the replay file is not
+        read again, so a reading is never added to the buffer twice.
+        """
+        while True:
+            if not self._spill_written():
+                return
+            with self._spill_lock:
+                if not os.path.isfile(self.replay_path):
+                    if not os.path.isfile(self.spill_path):
+                        self._spilling = False
+                        return
+                    os.replace(self.spill_path, self.replay_path)
+
+            batch = []
+            with open(self.replay_path, encoding='utf-8') as fp:
+                for line in fp:
+                    try:
+                        item = json.loads(line)
+                    except json.JSONDecodeError:
+                        # e.g., the last line if the process was killed while spilling
+                        logger.warning(f'Ignoring an invalid line in {self.replay_path}: {line!r}')
+                        continue
+                    batch.append((item[0], tuple(item[1]), *item[2:]))
+                    if len(batch) >= self.batch_size:
+                        self._write(batch)
+                        batch.clear()
+            self._write(batch)
+            self._replayed = True
+            self._flush()
+
+    def _spill_written(self) -> bool:
+        """Remove the replay file if the database has written its readings.
+
+        Returns whether the readings of the replay file are no longer in the buffer.
+        """
+        if self._replayed and self.database.pending:
+            self._flush()
+        if self._replayed and not self.database.pending:
+            os.remove(self.replay_path)
+            self._replayed = False
+        return not self._replayed
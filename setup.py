@@ -150,7 +150,7 @@ install_requires = [
 ]
 
 # specify the packages that are needed for running the tests
-tests_require = ['pytest', 'pytest-cov']
+tests_require = ['pytest', 'pytest-benchmark', 'pytest-cov']
 
 # specify the packages that are needed for building the docs
 docs_require = ['sphinx', 'sphinx-rtd-theme']
@@ -0,0 +1,158 @@
+import socket
+import threading
+
+import pytest
+from msl.equipment import Config
+from msl.equipment import ConnectionRecord
+from msl.equipment import EquipmentRecord
+
+from msl.lab_logger.schema import DatabaseTypes
+from msl.lab_logger.sensors import Sensor
+
+
+@pytest.fixture
+def make_config(tmp_path):
+    """Returns a function that writes a configuration file (log_dir is tmp_path by default) and loads it.
+
+    The keyword arguments are the elements to add, e.g., make_config(buffer_size=100).
+    An element whose value is a :class:`dict` has the dict as its attributes.
+    """
+    def _make_config(*xml: str, **elements) -> Config:
+        elements.setdefault('log_dir', tmp_path)
+        lines = []
+        for tag, value in elements.items():
+            if isinstance(value, dict):
+                attrib = ' '.join(f'{k}="{v}"' for k, v in value.items())
+                lines.append(f'<{tag} {attrib}/>')
+            else:
+                lines.append(f'<{tag}>{value}</{tag}>')
+        lines.extend(xml)
+        path = tmp_path / 'config.xml'
+        path.write_text('<?xml version="1.0" encoding="utf-8"?>\n<msl>\n  ' + '\n  '.join(lines) + '\n</msl>\n')
+        return Config(str(path))
+    return _make_config
+
+
+@pytest.fixture
+def simulator(make_config):
+    """Returns a function that creates a simulated sensor, see :mod:`msl.lab_logger.sensors.simulator`.
+
+    The keyword arguments are the properties of the connection record.
+    """
+    def _simulator(cfg: Config = None, *, serial: str = 'SIM-1', **properties) -> Sensor:
+        properties.setdefault('seed', 1)
+        connection = ConnectionRecord(manufacturer='MSL', model='Simulator', serial=serial, properties=properties)
+        record = EquipmentRecord(alias=serial, manufacturer='MSL', model='Simulator', serial=serial,
+                                 connection=connection)
+        return Sensor.find(make_config() if cfg is None else cfg, record)
+    return _simulator
+
+
+class FakeDevice:
+
+    def __init__(self) -> None:
+        """A TCP server that replies to READ with three values, like a networked sensor."""
+        self.server = socket.create_server(('127.0.0.1', 0))
+        self.port = self.server.getsockname()[1]
+        self.connections = 0
+        self.clients = []
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                client, _ = self.server.accept()
+            except OSError:
+                return
+            self.connections += 1
+            self.clients.append(client)
+            threading.Thread(target=self._serve, args=(client,), daemon=True).start()
+
+    @staticmethod
+    def _serve(client: socket.socket) -> None:
+        with client:
+            buffer = b''
+            while True:
+                try:
+                    data = client.recv(64)
+                except OSError:
+                    return
+                if not data:
+                    return
+                buffer += data
+                while b'\n' in buffer:
+                    line, buffer = buffer.split(b'\n', 1)
+                    if line == b'READ':
+                        client.sendall(b'20.1,45.2,8.3\n')
+
+    def send_to_clients(self, data: bytes) -> None:
+        """Send bytes that the clients did not request."""
+        for client in self.clients:
+            client.sendall(data)
+
+    def close_clients(self) -> None:
+        """Close the connections, as a device that was restarted does."""
+        for client in self.clients:
+            try:
+                client.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass  # the client already closed the connection
+            client.close()
+        self.clients.clear()
+
+    def close(self) -> None:
+        self.close_clients()
+        self.server.close()
+
+
+class FakeConnection:
+
+    def __init__(self, port: int) -> None:
+        """A connection to a :class:`FakeDevice`."""
+        self.socket = socket.create_connection(('127.0.0.1', port), timeout=5)
+
+    def read(self) -> tuple[float, ...]:
+        self.socket.sendall(b'READ\n')
+        reply = b''
+        while not reply.endswith(b'\n'):
+            data = self.socket.recv(64)
+            if not data:
+                raise ConnectionError('The device closed the connection')
+            reply += data
+        return tuple(float(v) for v in reply.split(b','))
+
+    def disconnect(self) -> None:
+        self.socket.close()
+
+
+class FakeSensor(Sensor):
+
+    def open_connection(self) -> FakeConnection:
+        return FakeConnection(self.record.connection.properties['port'])
+
+    def acquire(self) -> tuple[float, ...]:
+        with self.connect() as cxn:
+            return cxn.read()
+
+    @property
+    def fields(self) -> dict[str, DatabaseTypes]:
+        return {'temperature': DatabaseTypes.FLOAT, 'humidity': DatabaseTypes.FLOAT, 'dewpoint': DatabaseTypes.FLOAT}
+
+
+@pytest.fixture
+def fake_device():
+    device = FakeDevice()
+    yield device
+    device.close()
+
+
+@pytest.fixture
+def fake_sensor(make_config, fake_device):
+    """A sensor that reads the :class:`FakeDevice` through the connection pool."""
+    serial = f'fake-{fake_device.port}'
+    connection = ConnectionRecord(manufacturer='MSL', model='Fake', serial=serial,
+                                  properties={'port': fake_device.port})
+    record = EquipmentRecord(alias=serial, manufacturer='MSL', model='Fake', serial=serial, connection=connection)
+    sensor = FakeSensor(make_config(), record)
+    yield sensor
+    sensor.disconnect()
@@ -0,0 +1,98 @@
+import gc
+import threading
+import time
+
+from msl.lab_logger import alerts
+from msl.lab_logger.alerts import AlertDispatcher
+from msl.lab_logger.alerts import FileTransport
+from msl.lab_logger.alerts import Transport
+
+
+class ListTransport(Transport):
+
+    def __init__(self, block: threading.Event = None) -> None:
+        self.sent = []
+        self.block = block
+
+    def send(self, subject: str, body: str) -> None:
+        if self.block is not None:
+            self.block.wait()
+        self.sent.append((subject, body))
+
+
+def test_digest():
+    transport = ListTransport()
+    dispatcher = AlertDispatcher(transport, min_interval=0, digest=0.2)
+    assert dispatcher.submit('SIM-1', 'range', 'too hot', 'T=30')
+    assert dispatcher.submit('SIM-2', 'range', 'too cold', 'T=10')
+    dispatcher.close(timeout=5)
+    assert len(transport.sent) == 1
+    subject, body = transport.sent[0]
+    assert subject == '[MSL-Lab-Logger] 2 alerts'
+    assert 'SIM-1 (range): too hot' in body
+    assert 'SIM-2 (range): too cold' in body
+
+
+def test_rate_limit():
+    transport = ListTransport()
+    dispatcher = AlertDispatcher(transport, min_interval=0.2, digest=0)
+    assert dispatcher.submit('SIM-1', 'range', 'too hot', 'T=30')
+    assert not dispatcher.submit('SIM-1', 'range', 'too hot', 'T=31')
+    assert dispatcher.submit('SIM-1', 'rate', 'too fast', 'dT=5')
+    time.sleep(0.25)
+    assert dispatcher.submit('SIM-1', 'range', 'too hot', 'T=32')
+    dispatcher.close(timeout=5)
+    assert [s for s, _ in transport.sent] == ['too hot', 'too fast', 'too hot']
+    assert transport.sent[-1][1].endswith('1 similar alert(s) were suppressed since the previous alert.')
+
+
+def test_close_does_not_block_when_the_queue_is_full():
+    block = threading.Event()
+    transport = ListTransport(block)
+    dispatcher = AlertDispatcher(transport, min_interval=0, digest=0, maxsize=1)
+    assert dispatcher.submit('SIM-1', 'range', 'first', '')
+    while dispatcher._queue.qsize():
+        time.sleep(0.01)  # wait for the thread to be stuck sending the first alert
+    assert dispatcher.submit('SIM-1', 'rate', 'second', '')
+    assert not dispatcher.submit('SIM-1', 'other', 'dropped', '')
+
+    t0 = time.monotonic()
+    dispatcher.close(timeout=0.1)
+    assert time.monotonic() - t0 < 1
+    assert dispatcher._thread.is_alive()
+
+    # the alert that was waiting is still sent when the transport recovers
+    block.set()
+    dispatcher._thread.join(5)
+    assert not dispatcher._thread.is_alive()
+    assert [s for s, _ in transport.sent] == ['first', 'second']
+
+
+def test_from_config(make_config, tmp_path):
+    path = tmp_path / 'alerts.log'
+    cfg = make_config(alerts={'file': path, 'digest': 0})
+    dispatcher = alerts.from_config(cfg)
+    assert isinstance(dispatcher.transport, FileTransport)
+    assert alerts.from_config(cfg) is dispatcher
+    assert dispatcher.submit('SIM-1', 'range', 'too hot', 'T=30')
+    alerts.close()
+    assert 'too hot\nT=30' in path.read_text()
+
+    assert alerts.from_config(make_config()) is None
+
+
+def test_from_config_is_per_config_object(make_config, tmp_path):
+    cfg = make_config(alerts={'file': tmp_path / 'alerts.log', 'digest': 0})
+    other = make_config(alerts={'file': tmp_path / 'alerts.log', 'digest': 0})
+    dispatcher = alerts.from_config(cfg)
+    assert alerts.from_config(other) is not dispatcher
+
+    # the dispatcher of a Config that was garbage collected is not returned for a
+    # new Config (which could have the same id), but it is still closed
+    del cfg
+    gc.collect()
+    assert len(alerts._dispatchers) == 1
+    assert dispatcher._thread.is_alive()
+    alerts.close()
+    assert not dispatcher._thread.is_alive()
+    assert len(alerts._dispatchers) == 0
@@ -0,0 +1,254 @@
+"""
+Benchmarks of the logging pipeline, run with pytest-benchmark.
+
+The benchmarks use the simulated sensor (or a fake TCP device, see conftest.py),
+so they do not need hardware. The rows/sec and the latency per row of a
+benchmark are in its ``extra_info``. Run only the benchmarks (and compare the
+groups) with::
+
+    python -m pytest tests/test_benchmarks.py --benchmark-only --benchmark-group-by=group
+"""
+import shutil
+import sqlite3
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+from msl.equipment import Config
+from msl.equipment import ConnectionRecord
+from msl.equipment import EquipmentRecord
+
+from msl.lab_logger import pragmas
+from msl.lab_logger.database import Database
+from msl.lab_logger.get_data import get_data
+from msl.lab_logger.revalidate import revalidate
+from msl.lab_logger.sensors import Sensor
+from msl.lab_logger.start_logging import SensorLogger
+from msl.lab_logger.validators import Validator
+
+ROWS = 1000
+
+
+def _rows(db, sensor, n=ROWS):
+    t0 = datetime(2026, 1, 1)
+    return [(db.timestamp(t0 + timedelta(seconds=i)), *sensor.acquire()) for i in range(n)]
+
+
+# the number of rows in the large database that get_data() is benchmarked with
+LARGE = 200000
+
+VALIDATORS = '<validators><validator name="simple-range" vmin="0" vmax="60"/></validators>'
+
+
+def _rows_per_second(benchmark, n=ROWS):
+    # the per-sample latency is the time, in microseconds, to process one row
+    if benchmark.stats is not None:
+        mean = benchmark.stats.stats.mean
+        benchmark.extra_info['rows/sec'] = round(n / mean)
+        benchmark.extra_info['latency/row (us)'] = round(1e6 * mean / n, 1)
+
+
+@pytest.mark.benchmark(group='write')
+def test_write_persistent_connection(benchmark, simulator):
+    sensor = simulator()
+    with Database(sensor) as db:
+        rows = _rows(db, sensor)
+
+        def write():
+            for row in rows:
+                db.write(row)
+
+        benchmark(write)
+    _rows_per_second(benchmark)
+
+
+@pytest.mark.benchmark(group='write')
+def test_write_connect_per_row(benchmark, simulator):
+    # how Database.write used to write each row, to compare with the persistent connection
+    sensor = simulator()
+    with Database(sensor) as db:
+        rows = _rows(db, sensor)
+        path, timeout, sql = db.path, db.timeout, db.schema.insert_sql
+
+    def write():
+        for row in rows:
+            cxn = sqlite3.connect(path, timeout=timeout)
+            try:
+                with cxn:
+                    cxn.execute(sql, row)
+            finally:
+                cxn.close()
+
+    benchmark(write)
+    _rows_per_second(benchmark)
+
+
+@pytest.mark.benchmark(group='connection')
+def test_acquire_pooled_connection(benchmark, fake_sensor):
+    def acquire():
+        for _ in range(100):
+            fake_sensor.acquire()
+
+    benchmark(acquire)
+    _rows_per_second(benchmark, 100)
+
+
+@pytest.mark.benchmark(group='connection')
+def test_acquire_connect_per_reading(benchmark, fake_sensor):
+    # how a sensor used to be read, opening a new connection for each reading
+    def acquire():
+        for _ in range(100):
+            fake_sensor.acquire()
+            fake_sensor.disconnect()
+
+    benchmark(acquire)
+    _rows_per_second(benchmark, 100)
+
+
+@pytest.mark.benchmark(group='pipeline')
+def test_pipeline(benchmark, make_config, simulator):
+    # acquire -> validators -> Database.write, in the thread that takes the readings
+    cfg = make_config(VALIDATORS)
+    sensor = simulator(cfg)
+    validators = Validator.from_config(sensor)
+    assert validators
+    with Database(sensor) as db:
+        def pipeline():
+            for _ in range(ROWS):
+                data = sensor.acquire()
+                row = (db.timestamp(), *data)
+                for validator in validators:
+                    if not validator.validate(data):
+                        db.write_rejected(row, validator.name)
+                        break
+                else:
+                    db.write(row)
+
+        benchmark(pipeline)
+    _rows_per_second(benchmark)
+
+
+@pytest.mark.benchmark(group='pipeline')
+def test_pipeline_buffered(benchmark, make_config, simulator):
+    # as above, with the rows written to the database in batches
+    cfg = make_config(VALIDATORS, buffer_size=100)
+    sensor = simulator(cfg)
+    validators = Validator.from_config(sensor)
+    with Database(sensor) as db:
+        def pipeline():
+            for _ in range(ROWS):
+                data = sensor.acquire()
+                if all(v.validate(data) for v in validators):
+                    db.write((db.timestamp(), *data))
+
+        benchmark(pipeline)
+    _rows_per_second(benchmark)
+
+
+@pytest.mark.benchmark(group='pipeline')
+def test_pipeline_sensor_logger(benchmark, make_config, simulator):
+    # SensorLogger.log() queues the row for the BackgroundWriter, so the latency
+    # is how long the next reading is delayed rather than how long a write takes
+    cfg = make_config(VALIDATORS)
+    sensor_logger = SensorLogger(cfg, simulator(cfg).record)
+    try:
+        def log():
+            for _ in range(ROWS):
+                sensor_logger.log()
+
+        benchmark(log)
+    finally:
+        sensor_logger.close()
+    assert len(get_data(sensor_logger.database.path)) >= ROWS
+    _rows_per_second(benchmark)
+
+
+@pytest.fixture(scope='module', params=['iso', 'epoch'])
+def large_database(request, tmp_path_factory):
+    """The path to a database with :data:`LARGE` rows, one row per second."""
+    directory = tmp_path_factory.mktemp(f'large-{request.param}')
+    path = directory / 'config.xml'
+    path.write_text(f'<msl><log_dir>{directory}</log_dir><timestamp_format>{request.param}</timestamp_format>'
+                    f'<buffer_size>{LARGE}</buffer_size></msl>')
+    connection = ConnectionRecord(manufacturer='MSL', model='Simulator', serial='LARGE', properties={'seed': 1})
+    record = EquipmentRecord(alias='LARGE', manufacturer='MSL', model='Simulator', serial='LARGE',
+                             connection=connection)
+    sensor = Sensor.find(Config(str(path)), record)
+    with Database(sensor) as db:
+        t0 = datetime(2026, 1, 1)
+        db.write_many([(db.timestamp(t0 + timedelta(seconds=i)), *sensor.acquire()) for i in range(LARGE)])
+    sensor.disconnect()
+    return db.path
+
+
+@pytest.mark.benchmark(group='get_data')
+def test_get_data_all(benchmark, large_database):
+    data = benchmark(get_data, large_database)
+    assert len(data) == LARGE
+    _rows_per_second(benchmark, LARGE)
+
+
+@pytest.mark.benchmark(group='get_data')
+def test_get_data_all_as_array(benchmark, large_database):
+    data = benchmark(get_data, large_database, as_array=True)
+    assert len(data) == LARGE
+    _rows_per_second(benchmark, LARGE)
+
+
+@pytest.mark.benchmark(group='get_data')
+def test_get_data_one_hour(benchmark, large_database):
+    # a range query, which uses the index on the datetime column (BETWEEN includes both ends)
+    data = benchmark(get_data, large_database, start='2026-01-01 12:00:00', end='2026-01-01 13:00:00')
+    assert len(data) == 3601
+    _rows_per_second(benchmark, len(data))
+
+
+@pytest.mark.benchmark(group='pragmas-write')
+@pytest.mark.parametrize('synchronous', ['NORMAL', 'FULL'])
+def test_write_synchronous(benchmark, make_config, simulator, synchronous):
+    # synchronous=NORMAL (the default) does not sync the WAL file for each transaction
+    sensor = simulator(make_config(sqlite={'synchronous': synchronous, 'checkpoint_interval': 0}))
+    with Database(sensor) as db:
+        rows = _rows(db, sensor)
+
+        def write():
+            for row in rows:
+                db.write(row)
+
+        benchmark(write)
+    _rows_per_second(benchmark)
+
+
+@pytest.mark.benchmark(group='pragmas-read')
+@pytest.mark.parametrize('read_only', [True, False])
+def test_read_pragmas(benchmark, large_database, read_only):
+    # a read-only connection with the READ_ONLY pragmas compared to SQLite's defaults
+    def read():
+        if read_only:
+            db = pragmas.connect_read_only(large_database)
+        else:
+            db = sqlite3.connect(large_database)
+        try:
+            return db.execute('SELECT * FROM data;').fetchall()
+        finally:
+            db.close()
+
+    assert len(benchmark(read)) == LARGE
+    _rows_per_second(benchmark, LARGE)
+
+
+@pytest.mark.benchmark(group='revalidate')
+@pytest.mark.parametrize('keep', [False, True])
+def test_revalidate(benchmark, simulator, large_database, tmp_path, keep):
+    # about 7% of the readings are outside the range and are moved (or copied) to the rejected table
+    validators = [Validator.find(simulator(), 'simple-range', vmin=0, vmax=20.2)]
+    copies = iter(range(1000))
+
+    def setup():
+        path = str(tmp_path / f'revalidate-{next(copies)}.sqlite3')
+        shutil.copyfile(large_database, path)
+        return (path, validators), {'keep': keep}
+
+    n = benchmark.pedantic(revalidate, setup=setup, rounds=3)
+    assert 0 < n < LARGE // 10
+    _rows_per_second(benchmark, LARGE)
@@ -0,0 +1,108 @@
+import sqlite3
+import time
+from datetime import datetime
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from msl.lab_logger.database import Database
+from msl.lab_logger.get_data import _select_sql
+from msl.lab_logger.get_data import get_data
+
+
+def test_persistent_connection(simulator):
+    sensor = simulator()
+    with Database(sensor) as db:
+        cxn = db._connect()
+        for i in range(10):
+            db.write((db.timestamp(datetime(2026, 1, 1) + timedelta(seconds=i)), *sensor.acquire()))
+            assert db._connect() is cxn
+    assert db._db is None
+    assert len(get_data(db.path)) == 10
+
+
+def test_reconnect_after_close(simulator):
+    sensor = simulator()
+    db = Database(sensor)
+    db.close()
+    db.write((db.timestamp(datetime(2026, 1, 1)), *sensor.acquire()))
+    db.close()
+    assert len(get_data(db.path)) == 1
+
+
+def test_flush_when_the_buffer_is_full(make_config, simulator):
+    sensor = simulator(make_config(buffer_size=3))
+    with Database(sensor) as db:
+        for i in range(5):
+            db.write((db.timestamp(datetime(2026, 1, 1) + timedelta(seconds=i)), *sensor.acquire()))
+            assert db.pending == (i + 1) % 3
+            assert len(get_data(db.path)) == 3 * ((i + 1) // 3)
+    assert len(get_data(db.path)) == 5
+
+
+def test_flush_when_the_interval_has_passed(make_config, simulator):
+    sensor = simulator(make_config(buffer_size=100, flush_interval=0.1))
+    with Database(sensor) as db:
+        db.write((db.timestamp(datetime(2026, 1, 1)), *sensor.acquire()))
+        db.write((db.timestamp(datetime(2026, 1, 1, second=1)), *sensor.acquire()))
+        assert db.pending == 2
+        assert len(get_data(db.path)) == 0
+        time.sleep(0.15)
+        db.write((db.timestamp(datetime(2026, 1, 1, second=2)), *sensor.acquire()))
+        assert db.pending == 0
+        assert len(get_data(db.path)) == 3
+
+
+def test_buffer_is_written_when_an_exception_occurs(make_config, simulator):
+    sensor = simulator(make_config(buffer_size=100))
+    with pytest.raises(RuntimeError):
+        with Database(sensor) as db:
+            for i in range(5):
+                db.write((db.timestamp(datetime(2026, 1, 1) + timedelta(seconds=i)), *sensor.acquire()))
+            assert len(get_data(db.path)) == 0
+            raise RuntimeError('the sensor failed')
+    assert db.pending == 0
+    assert len(get_data(db.path)) == 5
+
+
+@pytest.mark.parametrize('timestamp_format', ['iso', 'epoch'])
+@pytest.mark.parametrize('start, end', [('2026-01-01 00:10:00', None),
+                                        (None, '2026-01-01 00:10:00'),
+                                        ('2026-01-01 00:10:00', '2026-01-01 00:20:00')])
+def test_range_query_uses_datetime_index(make_config, simulator, timestamp_format, start, end):
+    sensor = simulator(make_config(timestamp_format=timestamp_format))
+    with Database(sensor) as db:
+        for i in range(100):
+            db.write((db.timestamp(datetime(2026, 1, 1) + timedelta(minutes=i)), *sensor.acquire()))
+
+    cxn = sqlite3.connect(db.path)
+    try:
+        sql, parameters = _select_sql('*', start, end, timestamp_format)
+        plan = ' '.join(row[-1] for row in cxn.execute('EXPLAIN QUERY PLAN ' + sql, parameters))
+    finally:
+        cxn.close()
+    assert 'USING INDEX data_datetime' in plan
+
+
+def test_array_null_values(tmp_path):
+    path = str(tmp_path / 'nulls.sqlite3')
+    cxn = sqlite3.connect(path)
+    try:
+        with cxn:
+            cxn.execute('CREATE TABLE data (pid INTEGER PRIMARY KEY AUTOINCREMENT, datetime DATETIME, '
+                        'temperature REAL, count INTEGER)')
+            cxn.execute('CREATE TABLE rejected (pid INTEGER, datetime DATETIME, '
+                        'temperature REAL, count INTEGER, validator TEXT)')
+            cxn.executemany('INSERT INTO data VALUES (NULL, ?, ?, ?)',
+                            [('2026-01-01T00:00:00', 20.1, 5), ('2026-01-01T00:01:00', None, None)])
+            cxn.execute("INSERT INTO rejected VALUES (NULL, '2026-01-01T00:02:00', 99.0, 7, 'range')")
+    finally:
+        cxn.close()
+
+    array = get_data(path, as_array=True, include_rejected=True)
+    assert array['pid'].tolist() == [1, 2, -1]
+    assert array['count'].dtype == np.float64
+    assert array['count'][[0, 2]].tolist() == [5.0, 7.0]
+    assert np.isnan(array['count'][1])
+    assert np.isnan(array['temperature'][1])
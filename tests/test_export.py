@@ -0,0 +1,123 @@
+import sqlite3
+from datetime import datetime
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from msl.lab_logger.database import Database
+from msl.lab_logger.export import export
+from msl.lab_logger.export import iter_export
+from msl.lab_logger.export import read_export
+from msl.lab_logger.get_data import get_aggregated
+from msl.lab_logger.get_data import get_data
+
+T0 = datetime(2026, 1, 31, 23)
+
+
+def _parquet():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return pytest.param('.parquet', marks=pytest.mark.skip(reason='pyarrow is not installed'))
+    return '.parquet'
+
+
+EXTENSIONS = ['.npz', _parquet()]
+
+
+@pytest.fixture(params=['iso', 'epoch'])
+def database(request, make_config, simulator):
+    sensor = simulator(make_config(timestamp_format=request.param), channels=2)
+    with Database(sensor) as db:
+        for i in range(250):
+            db.write((db.timestamp(T0 + timedelta(seconds=30 * i, milliseconds=i)), *sensor.acquire()))
+    return db.path
+
+
+@pytest.mark.parametrize('ext', EXTENSIONS)
+def test_round_trip(database, tmp_path, ext):
+    out = str(tmp_path / f'export{ext}')
+    assert export(database, out, chunk_size=100) == 250
+
+    expected = get_data(database, as_array=True)
+    array = read_export(out)
+    assert array.dtype == expected.dtype
+    assert np.array_equal(array, expected)
+
+    assert [len(chunk) for chunk in iter_export(out)] == [100, 100, 50]
+    assert read_export(out, select='datetime, channel2').dtype.names == ('datetime', 'channel2')
+
+    for start, end in [('2026-02-01', None), (None, '2026-02-01'), ('2026-01-31 23:30:00', '2026-02-01 00:30:00')]:
+        expected = get_data(database, start=start, end=end, as_datetime=False)
+        assert len(expected) > 0
+        assert get_data(out, start=start, end=end, as_datetime=False) == expected
+
+    for bucket in ['10min', '1h']:
+        a = get_aggregated(out, bucket=bucket, funcs=('min', 'max', 'mean', 'count'), as_array=True)
+        b = get_aggregated(database, bucket=bucket, funcs=('min', 'max', 'mean', 'count'), as_array=True)
+        assert a.dtype == b.dtype
+        assert np.array_equal(a['datetime'], b['datetime'])
+        for name in a.dtype.names[1:]:
+            assert np.allclose(a[name], b[name])
+
+
+@pytest.mark.parametrize('ext', EXTENSIONS)
+def test_empty(database, tmp_path, ext):
+    out = str(tmp_path / f'export{ext}')
+    assert export(database, out, start='2027-01-01') == 0
+    array = read_export(out)
+    assert len(array) == 0
+    assert array.dtype == get_data(database, as_array=True).dtype
+
+
+@pytest.mark.parametrize('ext', EXTENSIONS)
+def test_partitions_with_different_timestamp_formats(make_config, simulator, tmp_path, ext):
+    # January stores ISO timestamps and February stores epoch timestamps
+    log_dir = tmp_path / 'logs'
+    for fmt, t0 in [('iso', datetime(2026, 1, 31, 23, 59)), ('epoch', datetime(2026, 2, 1))]:
+        sensor = simulator(make_config(log_dir=log_dir, partition='month', timestamp_format=fmt), channels=1)
+        with Database(sensor) as db:
+            for i in range(3):
+                db.write((db.timestamp(t0 + timedelta(seconds=i, milliseconds=250)), 20.0 + i))
+    directory = str(log_dir / 'SIM-1')
+    assert get_data(directory + '/2026-01.sqlite3', as_array=True).dtype['datetime'] == 'datetime64[s]'
+
+    out = str(tmp_path / f'export{ext}')
+    assert export(directory, out, chunk_size=2) == 6
+    assert [chunk.dtype['datetime'] for chunk in iter_export(out)] == [np.dtype('datetime64[ms]')] * 4
+    array = read_export(out)
+    assert array['datetime'].tolist() == [
+        datetime(2026, 1, 31, 23, 59, 0), datetime(2026, 1, 31, 23, 59, 1), datetime(2026, 1, 31, 23, 59, 2),
+        datetime(2026, 2, 1, 0, 0, 0, 250000), datetime(2026, 2, 1, 0, 0, 1, 250000),
+        datetime(2026, 2, 1, 0, 0, 2, 250000)]
+    assert array['channel1'].tolist() == [20.0, 21.0, 22.0] * 2
+
+
+@pytest.fixture
+def text_database(tmp_path):
+    path = str(tmp_path / 'text.sqlite3')
+    cxn = sqlite3.connect(path)
+    try:
+        with cxn:
+            cxn.execute('CREATE TABLE data (pid INTEGER PRIMARY KEY AUTOINCREMENT, datetime DATETIME, '
+                        'temperature REAL, status TEXT)')
+            cxn.executemany('INSERT INTO data VALUES (NULL, ?, ?, ?)',
+                            [('2026-01-01T00:00:00', 20.1, 'ok'), ('2026-01-01T00:01:00', 20.2, 'drift')])
+    finally:
+        cxn.close()
+    return path
+
+
+def test_text_field_npz(text_database, tmp_path):
+    out = tmp_path / 'text.npz'
+    with pytest.raises(ValueError, match=r'TEXT or BLOB column\(s\) status'):
+        export(text_database, str(out))
+    assert not out.exists()
+
+
+@pytest.mark.parametrize('ext', EXTENSIONS[1:])
+def test_text_field_parquet(text_database, tmp_path, ext):
+    out = str(tmp_path / f'text{ext}')
+    assert export(text_database, out) == 2
+    assert read_export(out)['status'].tolist() == ['ok', 'drift']
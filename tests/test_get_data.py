@@ -0,0 +1,118 @@
+import math
+from datetime import datetime
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from msl.lab_logger.database import Database
+from msl.lab_logger.get_data import get_aggregated
+from msl.lab_logger.get_data import get_data
+from msl.lab_logger.get_data import get_lttb
+from msl.lab_logger.get_data import lttb
+from msl.lab_logger.timestamps import from_epoch
+from msl.lab_logger.timestamps import to_epoch
+
+# 2 hours before and 2 hours after the start of February, one reading every 7 seconds
+T0 = datetime(2026, 1, 31, 22)
+N = 4 * 3600 // 7
+
+
+def _rows():
+    rng = np.random.default_rng(1)
+    values = rng.normal(20, 1, size=(N, 2))
+    values[::50, 1] = np.nan  # a NULL value
+    return [(T0 + timedelta(seconds=7 * i), *[None if math.isnan(v) else v for v in row])
+            for i, row in enumerate(values.tolist())]
+
+
+def _log(make_config, simulator, rows, **elements):
+    sensor = simulator(make_config(**elements), channels=2)
+    with Database(sensor) as db:
+        db.write_many([(db.timestamp(t), *values) for t, *values in rows])
+    return db.path
+
+
+def _reference(rows, seconds):
+    """The min, max and mean of each bucket of each column, computed with numpy."""
+    keys = np.array([to_epoch(t) // 1000 // seconds * seconds for t, *_ in rows])
+    values = np.array([r[1:] for r in rows], dtype=float)
+    expected = []
+    for key in np.unique(keys):
+        bucket = values[keys == key]
+        row = [from_epoch(int(key) * 1000)]
+        for column in bucket.T:
+            row.extend([np.nanmin(column), np.nanmax(column), np.nanmean(column)])
+        expected.append(row)
+    return expected
+
+
+def _assert_equal(rows, expected):
+    assert len(rows) == len(expected)
+    for row, e in zip(rows, expected):
+        assert row[0] == e[0]
+        assert np.allclose(row[1:], e[1:])
+
+
+@pytest.mark.parametrize('timestamp_format', ['iso', 'epoch'])
+@pytest.mark.parametrize('bucket, seconds', [('15min', 900), ('1h', 3600), (420, 420)])
+def test_aggregated(make_config, simulator, timestamp_format, bucket, seconds):
+    rows = _rows()
+    path = _log(make_config, simulator, rows, timestamp_format=timestamp_format)
+    _assert_equal(get_aggregated(path, bucket=bucket), _reference(rows, seconds))
+
+    array = get_aggregated(path, bucket=bucket, funcs='count', as_array=True)
+    assert array.dtype.names == ('datetime', 'channel1_count', 'channel2_count')
+    assert array['channel1_count'].sum() == N
+    assert array['channel2_count'].sum() == N - len(range(0, N, 50))
+
+
+@pytest.mark.parametrize('timestamp_format', ['iso', 'epoch'])
+def test_aggregated_across_partitions(make_config, simulator, tmp_path, timestamp_format):
+    # a 7-minute bucket starts at 2026-01-31T23:59:00 and ends in the February partition
+    rows = _rows()
+    directory = tmp_path / 'logs'
+    _log(make_config, simulator, rows, log_dir=directory, partition='month', timestamp_format=timestamp_format)
+    directory /= 'SIM-1'
+    assert sorted(p.name for p in directory.iterdir() if p.suffix == '.sqlite3') == \
+           ['2026-01.sqlite3', '2026-02.sqlite3']
+
+    expected = _reference(rows, 420)
+    assert datetime(2026, 1, 31, 23, 59) in [e[0] for e in expected]
+    _assert_equal(get_aggregated(str(directory), bucket='7min'), expected)
+
+    # the count of a bucket is combined, and is used to combine the mean
+    counts = get_aggregated(str(directory), bucket='7min', funcs=('count', 'mean'), select='channel1')
+    assert sum(c for _, c, _ in counts) == N
+    assert [len(row) for row in counts] == [3] * len(expected)
+
+
+def test_lttb():
+    x = np.arange(1000, dtype=float)
+    y = np.sin(x / 50) + np.random.default_rng(1).normal(0, 0.1, size=1000)
+    y[500] = 10.0  # a peak is kept
+    indices = lttb(x, y, 50)
+    assert len(indices) == 50
+    assert indices[0] == 0
+    assert indices[-1] == 999
+    assert np.all(np.diff(indices) > 0)
+    assert 500 in indices
+
+
+@pytest.mark.parametrize('threshold', [2, 10, 11])
+def test_lttb_threshold_not_less_than_the_data(threshold):
+    # every point is kept if the threshold is at least the number of points (or less than 3)
+    x = np.arange(10, dtype=float)
+    assert lttb(x, x ** 2, threshold).tolist() == list(range(10))
+
+
+def test_get_lttb(make_config, simulator):
+    rows = _rows()
+    path = _log(make_config, simulator, rows, timestamp_format='epoch')
+    data = get_lttb(path, 'channel1', 100)
+    assert data.dtype.names == ('datetime', 'channel1')
+    assert len(data) == 100
+    everything = get_data(path, select=['datetime', 'channel1'], as_array=True)
+    assert data[0] == everything[0]
+    assert data[-1] == everything[-1]
+    assert len(get_lttb(path, 'channel1', N + 1)) == N
@@ -0,0 +1,51 @@
+"""
+The import-time budget of the modules that every process (or every user of get_data) imports.
+
+The import time is measured with ``python -X importtime`` in a new process.
+"""
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+# the maximum cumulative import time, in milliseconds, of a module. The budget
+# is generous (a few times the typical value) so that a slow CI runner does
+# not fail, the modules that must not be imported are checked exactly
+BUDGET = 300
+
+# the modules that are only imported when they are used
+LAZY = ('numpy', 'msl.io', 'pyarrow',
+        'msl.lab_logger.sensors.ithx', 'msl.lab_logger.sensors.milli_k',
+        'msl.lab_logger.sensors.vaisala_ptu300', 'msl.lab_logger.validators.range_checker')
+
+_LINE_REGEX = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)$')
+
+
+def _import_times(module):
+    # returns the cumulative import time, in microseconds, of each module that was imported
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, env=env, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        match = _LINE_REGEX.match(line)
+        if match:
+            times[match.group(4)] = int(match.group(2))
+    return times
+
+
+@pytest.mark.parametrize('module, lazy', [
+    ('msl.lab_logger.get_data', LAZY + ('msl.equipment',)),
+    ('msl.lab_logger.start_logging', LAZY),
+    ('msl.lab_logger.retry', LAZY + ('msl.equipment',)),
+    ('msl.lab_logger.alerts', LAZY + ('msl.equipment',)),
+])
+def test_import_time(module, lazy):
+    # the fastest of a few imports, since the first import also compiles or reads the .pyc files
+    runs = [_import_times(module) for _ in range(3)]
+    imported = [name for name in lazy if name in runs[0]]
+    assert not imported, f'importing {module} also imports {imported}'
+    ms = min(times[module] for times in runs) / 1000
+    assert ms < BUDGET, f'importing {module} took {ms:.0f} ms, the budget is {BUDGET} ms'
@@ -0,0 +1,79 @@
+import os
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+
+from msl.lab_logger import partitions
+from msl.lab_logger.database import Database
+from msl.lab_logger.get_data import get_data
+from msl.lab_logger.get_data import iter_data
+from msl.lab_logger.timestamps import to_epoch
+
+T0 = datetime(2026, 1, 31, 23)
+
+
+@pytest.mark.parametrize('value', [datetime(2026, 1, 31, 23, 59, 59), '2026-01-31T23:59:59',
+                                   to_epoch(datetime(2026, 1, 31, 23, 59, 59))])
+def test_partition_name(value):
+    assert partitions.partition_name(value, partitions.MONTH) == '2026-01'
+    assert partitions.partition_name(value, partitions.YEAR) == '2026'
+
+
+def test_partition_range():
+    assert partitions.partition_range('2026-01') == (datetime(2026, 1, 1), datetime(2026, 2, 1))
+    assert partitions.partition_range('2026-12') == (datetime(2026, 12, 1), datetime(2027, 1, 1))
+    assert partitions.partition_range('2026') == (datetime(2026, 1, 1), datetime(2027, 1, 1))
+
+
+def test_find_partitions(tmp_path):
+    for filename in ['2025-12.npz', '2026-01.sqlite3', '2026-01.parquet', '2026-02.npz',
+                     '2026-02.parquet', '2026-03.npz', 'SIM-1.sqlite3', '2026-01.sqlite3-wal']:
+        (tmp_path / filename).touch()
+
+    # a database is used before an exported file, and Parquet before .npz
+    found = [os.path.basename(p) for p in partitions.find_partitions(str(tmp_path))]
+    assert found == ['2025-12.npz', '2026-01.sqlite3', '2026-02.parquet', '2026-03.npz']
+
+    found = [os.path.basename(p) for p in partitions.find_partitions(str(tmp_path), '2026-01-15', '2026-02-01')]
+    assert found == ['2026-01.sqlite3', '2026-02.parquet']
+    assert partitions.find_partitions(str(tmp_path), start='2027-01-01') == []
+
+
+@pytest.fixture
+def partitioned(make_config, simulator, tmp_path):
+    # 3 hours of readings, 1 hour in January and 2 hours in February
+    sensor = simulator(make_config(log_dir=tmp_path / 'logs', partition='month'), channels=1)
+    with Database(sensor) as db:
+        for i in range(180):
+            db.write((db.timestamp(T0 + timedelta(minutes=i)), float(i)))
+    return str(tmp_path / 'logs' / 'SIM-1')
+
+
+def test_partition_is_created_when_written_to(partitioned):
+    # the partition of the current month is not created
+    assert sorted(os.listdir(partitioned)) == ['2026-01.sqlite3', '2026-02.sqlite3']
+
+
+def test_get_data(partitioned):
+    data = get_data(partitioned, as_datetime=False)
+    assert [r[2] for r in data] == [float(i) for i in range(180)]
+    assert data[0][1] == '2026-01-31T23:00:00'
+    assert data[-1][1] == '2026-02-01T01:59:00'
+
+    data = get_data(partitioned, start='2026-01-31 23:58:00', end='2026-02-01 00:01:00')
+    assert [r[2] for r in data] == [58.0, 59.0, 60.0, 61.0]
+
+    # only a start is exclusive
+    array = get_data(partitioned, start='2026-02-01 01:00:00', as_array=True)
+    assert array['channel1'].tolist() == [float(i) for i in range(121, 180)]
+
+
+def test_iter_data(partitioned):
+    chunks = list(iter_data(partitioned, chunk_size=50))
+    # a chunk does not span two partitions
+    assert [len(c) for c in chunks] == [50, 10, 50, 50, 20]
+    assert [r[2] for c in chunks for r in c] == [float(i) for i in range(180)]
+
+    chunks = list(iter_data(partitioned, end='2026-01-31 23:30:00', as_array=True, chunk_size=50))
+    assert [len(c) for c in chunks] == [30]
@@ -0,0 +1,67 @@
+import pathlib
+import sqlite3
+
+import pytest
+
+from msl.lab_logger import pragmas
+
+
+def _create(path):
+    db = sqlite3.connect(path)
+    try:
+        pragmas.apply(db, pragmas.DEFAULTS)
+        with db:
+            db.execute('CREATE TABLE data (value REAL);')
+            db.execute('INSERT INTO data VALUES (1.5);')
+    finally:
+        db.close()
+
+
+def test_read_only_uri():
+    path = pathlib.PureWindowsPath(r'C:\logs\SIM 1.sqlite3')
+    assert pragmas.read_only_uri(path) == 'file:///C:/logs/SIM%201.sqlite3?mode=ro'
+    path = pathlib.PureWindowsPath(r'\\server\share\logs\SIM-1.sqlite3')
+    assert pragmas.read_only_uri(path) == 'file:////server/share/logs/SIM-1.sqlite3?mode=ro'
+
+
+def test_uri_without_authority(tmp_path):
+    # SQLite rejects the authority of the URI that pathlib creates for a UNC
+    # path, the authority-free form (which a UNC path is converted to) is
+    # accepted and, on POSIX, //tmp/... is the same file as /tmp/...
+    path = tmp_path / 'unc.sqlite3'
+    _create(path)
+    with pytest.raises(sqlite3.OperationalError, match='authority'):
+        sqlite3.connect('file://server' + path.as_posix() + '?mode=ro', uri=True)
+
+    uri = pragmas.read_only_uri(pathlib.PurePosixPath('/' + path.as_posix()))
+    assert uri.startswith('file:////')
+    db = sqlite3.connect(uri, uri=True)
+    try:
+        assert db.execute('SELECT value FROM data;').fetchall() == [(1.5,)]
+    finally:
+        db.close()
+
+
+def test_connect_read_only(tmp_path):
+    path = tmp_path / 'ro.sqlite3'
+    _create(path)
+    db = pragmas.connect_read_only(str(path))
+    try:
+        assert db.execute('SELECT value FROM data;').fetchall() == [(1.5,)]
+        assert db.execute('PRAGMA cache_size;').fetchone() == (int(pragmas.DEFAULTS['cache_size']),)
+        with pytest.raises(sqlite3.OperationalError, match='readonly'):
+            db.execute('INSERT INTO data VALUES (2.5);')
+    finally:
+        db.close()
+
+
+def test_from_config(make_config):
+    values, interval = pragmas.from_config(make_config(sqlite={'synchronous': 'FULL', 'checkpoint_interval': 0}))
+    assert values['synchronous'] == 'FULL'
+    assert values['cache_size'] == pragmas.DEFAULTS['cache_size']
+    assert interval == 0
+
+    with pytest.raises(ValueError, match='Invalid <sqlite> attribute'):
+        pragmas.from_config(make_config(sqlite={'journal_mode': 'DELETE'}))
+    with pytest.raises(ValueError, match='Invalid value'):
+        pragmas.from_config(make_config(sqlite={'synchronous': 'OFF; DROP TABLE data'}))
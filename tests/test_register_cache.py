@@ -0,0 +1,102 @@
+import logging
+import os
+
+import pytest
+from msl.equipment import EquipmentRecord
+
+from msl.lab_logger import register_cache
+
+
+class Register:
+
+    def __init__(self, *serials: str) -> None:
+        """A stand-in for the equipment database of a Config, that counts how often it was loaded."""
+        self.by_serial = {s: EquipmentRecord(alias=s, manufacturer='MSL', model='Model', serial=s) for s in serials}
+        self.loaded = 0
+
+    def __call__(self):
+        self.loaded += 1
+        return self
+
+    def records(self, serial):
+        return [self.by_serial[serial]] if serial in self.by_serial else []
+
+
+@pytest.fixture
+def register(tmp_path):
+    path = tmp_path / 'register.xlsx'
+    path.write_bytes(b'register')
+    return path
+
+
+@pytest.fixture
+def config(make_config, register, tmp_path):
+    def _config(database):
+        cfg = make_config(f'<registers><register><path>{register}</path></register></registers>',
+                          register_cache=tmp_path / 'cache.pickle')
+        cfg.database = database
+        return cfg
+    return _config
+
+
+def _unavailable():
+    raise OSError('the register is on a network share that is unavailable')
+
+
+def _serials(found):
+    return {s: None if r is None else r.serial for s, r in found.items()}
+
+
+def test_snapshot_is_used(config, tmp_path):
+    database = Register('A', 'B')
+    cfg = config(database)
+    assert _serials(register_cache.find_records(cfg, ['A', 'C'])) == {'A': 'A', 'C': None}
+    assert database.loaded == 1
+    assert os.path.isfile(tmp_path / 'cache.pickle')
+
+    assert _serials(register_cache.find_records(cfg, ['A'])) == {'A': 'A'}
+    assert database.loaded == 1
+
+    # a serial that is not in the snapshot is looked up in the register
+    assert _serials(register_cache.find_records(cfg, ['A', 'B'])) == {'A': 'A', 'B': 'B'}
+    assert database.loaded == 2
+
+
+def test_snapshot_is_used_if_the_register_is_unavailable(config, register, caplog):
+    cfg = config(Register('A'))
+    register_cache.find_records(cfg, ['A'])
+
+    register.unlink()
+    cfg.database = _unavailable
+    with caplog.at_level(logging.WARNING, logger='msl-lab-logger'):
+        assert _serials(register_cache.find_records(cfg, ['A', 'B'])) == {'A': 'A', 'B': None}
+    assert 'An equipment register is unavailable' in caplog.text
+
+
+@pytest.mark.parametrize('change', ['mtime', 'size'])
+def test_snapshot_is_invalidated(config, register, change):
+    database = Register('A')
+    cfg = config(database)
+    register_cache.find_records(cfg, ['A'])
+    assert database.loaded == 1
+
+    st = register.stat()
+    if change == 'mtime':
+        os.utime(register, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    else:
+        register.write_bytes(b'a larger register')
+        os.utime(register, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert register_cache.register_key(cfg)[0][-1] != (str(register), st.st_mtime_ns, st.st_size)
+
+    database.by_serial['A'] = EquipmentRecord(alias='A', manufacturer='MSL', model='Model', serial='A2')
+    assert _serials(register_cache.find_records(cfg, ['A'])) == {'A': 'A2'}
+    assert database.loaded == 2
+
+
+def test_corrupt_snapshot_is_ignored(config, tmp_path, caplog):
+    (tmp_path / 'cache.pickle').write_bytes(b'not a pickle')
+    database = Register('A')
+    with caplog.at_level(logging.WARNING, logger='msl-lab-logger'):
+        assert _serials(register_cache.find_records(config(database), ['A'])) == {'A': 'A'}
+    assert 'Ignoring the equipment-register snapshot' in caplog.text
+    assert database.loaded == 1
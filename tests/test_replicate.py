@@ -0,0 +1,141 @@
+import sqlite3
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+from msl.equipment import ConnectionRecord
+from msl.equipment import EquipmentRecord
+
+from msl.lab_logger.database import Database
+from msl.lab_logger.partitions import find_partitions
+from msl.lab_logger.replicate import MemoryTarget
+from msl.lab_logger.replicate import SQLiteTarget
+from msl.lab_logger.replicate import replicate
+from msl.lab_logger.revalidate import reimport
+from msl.lab_logger.revalidate import revalidate
+from msl.lab_logger.sensors import Sensor
+from msl.lab_logger.validators import Validator
+
+
+def _log(db, values, t0=datetime(2026, 1, 1)):
+    for i, value in enumerate(values):
+        db.write((db.timestamp(t0 + timedelta(minutes=i)), value))
+    db.flush()
+
+
+def _pids(target, source):
+    return sorted({pid for s, pid, _ in target.readings if s == source})
+
+
+@pytest.fixture
+def sensor(make_config, simulator, tmp_path):
+    (tmp_path / 'logs').mkdir()
+    return simulator(make_config(log_dir=tmp_path / 'logs'), channels=1)
+
+
+@pytest.mark.parametrize('timestamp_format', ['iso', 'epoch'])
+def test_replicate(make_config, simulator, tmp_path, timestamp_format):
+    (tmp_path / 'logs').mkdir()
+    sensor = simulator(make_config(log_dir=tmp_path / 'logs', timestamp_format=timestamp_format))
+    with Database(sensor) as db:
+        for i in range(5):
+            db.write((db.timestamp(datetime(2026, 1, 1) + timedelta(minutes=i)), 20.0 + i, 30.0, None))
+        db.flush()
+
+    central = str(tmp_path / 'central.sqlite3')
+    assert replicate(str(tmp_path / 'logs'), central, batch_size=2) == 5
+    assert replicate(str(tmp_path / 'logs'), central) == 0
+
+    cxn = sqlite3.connect(central)
+    try:
+        # the NULL values are not copied
+        assert cxn.execute('SELECT COUNT(*) FROM readings;').fetchone() == (10,)
+        assert cxn.execute("SELECT value FROM readings WHERE pid = 5 AND field = 'channel1';").fetchone() == (24.0,)
+        assert cxn.execute('SELECT MIN(datetime) FROM readings;').fetchone() == (1767225600000,)
+        assert cxn.execute('SELECT name, high_water, reimported FROM sources;').fetchall() == [('SIM-1.sqlite3', 5, 0)]
+        assert cxn.execute('SELECT serial, fields FROM sensor;').fetchall() == [('SIM-1', 'channel1,channel2,channel3')]
+    finally:
+        cxn.close()
+
+
+def test_reimported_readings_are_replicated(sensor, tmp_path):
+    with Database(sensor) as db:
+        _log(db, [20.0] * 6 + [50.0] * 4)
+        path = db.path
+    revalidate(path, [Validator.find(sensor, 'simple-range', vmin=0, vmax=30)])
+
+    with Database(sensor) as db:
+        _log(db, [20.0, 20.0], t0=datetime(2026, 1, 2))
+    target = MemoryTarget()
+    assert replicate(str(tmp_path / 'logs'), target) == 8
+    assert _pids(target, 'SIM-1.sqlite3') == [1, 2, 3, 4, 5, 6, 11, 12]
+
+    # the readings are moved back with their original pids, which are below the high-water mark
+    assert reimport(path, [Validator.find(sensor, 'simple-range', vmin=0, vmax=60)]) == 4
+    assert replicate(str(tmp_path / 'logs'), target) == 4
+    assert _pids(target, 'SIM-1.sqlite3') == list(range(1, 13))
+    assert target.high_water('SIM-1.sqlite3') == (12, 4)
+    assert replicate(str(tmp_path / 'logs'), target) == 0
+
+    # a reading that was moved back and then rejected again only moves the mark
+    revalidate(path, [Validator.find(sensor, 'simple-range', vmin=0, vmax=30)])
+    assert reimport(path, [Validator.find(sensor, 'simple-range', vmin=0, vmax=30)]) == 0
+    assert replicate(str(tmp_path / 'logs'), target) == 0
+
+
+def test_sensor_is_from_the_latest_partition(make_config, simulator, tmp_path):
+    (tmp_path / 'logs').mkdir()
+    sensor = simulator(make_config(log_dir=tmp_path / 'logs', partition='month'), channels=1)
+    with Database(sensor) as db:
+        _log(db, [20.0, 21.0], t0=datetime(2026, 1, 31, 23, 59))
+
+    paths = find_partitions(str(tmp_path / 'logs' / 'SIM-1'))
+    assert len(paths) == 2
+    for i, path in enumerate(paths):
+        cxn = sqlite3.connect(path)
+        with cxn:
+            cxn.execute("INSERT INTO metadata VALUES ('2026-01-01T00:00:00', 'location', ?);", (f'room {i}',))
+        cxn.close()
+
+    target = MemoryTarget()
+    assert replicate(str(tmp_path / 'logs'), target) == 2
+    fields, metadata = target.sensors['SIM-1']
+    assert fields == ['channel1']
+    assert metadata['location'] == f'room {len(paths) - 1}'
+
+
+def test_sensor_metadata_that_changed_back(make_config, tmp_path):
+    # the alias of the equipment record is changed from A to B and then back to A
+    (tmp_path / 'logs').mkdir()
+    cfg = make_config(log_dir=tmp_path / 'logs')
+    for alias in ['A', 'B', 'A']:
+        connection = ConnectionRecord(manufacturer='MSL', model='Simulator', serial='SIM-1',
+                                      properties={'seed': 1, 'channels': 1})
+        record = EquipmentRecord(alias=alias, manufacturer='MSL', model='Simulator', serial='SIM-1',
+                                 connection=connection)
+        with Database(Sensor.find(cfg, record)) as db:
+            _log(db, [20.0])
+            path = db.path
+    cxn = sqlite3.connect(path)
+    try:
+        rows = cxn.execute("SELECT value FROM metadata WHERE field = 'alias' ORDER BY value;").fetchall()
+        assert rows == [('A',), ('B',)]
+    finally:
+        cxn.close()
+
+    target = MemoryTarget()
+    replicate(str(tmp_path / 'logs'), target)
+    assert target.sensors['SIM-1'][1]['alias'] == 'A'
+
+
+def test_target_created_before_reimports_were_tracked(tmp_path):
+    path = str(tmp_path / 'central.sqlite3')
+    cxn = sqlite3.connect(path)
+    with cxn:
+        cxn.execute('CREATE TABLE sources (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL, '
+                    'serial TEXT NOT NULL, high_water INTEGER NOT NULL DEFAULT 0)')
+        cxn.execute("INSERT INTO sources (name, serial, high_water) VALUES ('SIM-1.sqlite3', 'SIM-1', 7);")
+    cxn.close()
+    with SQLiteTarget(path) as target:
+        assert target.high_water('SIM-1.sqlite3') == (7, 0)
+        assert target.high_water('SIM-2.sqlite3') == (0, 0)
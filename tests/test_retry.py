@@ -0,0 +1,117 @@
+import time
+
+import pytest
+
+from msl.lab_logger import retry
+from msl.lab_logger.get_data import get_data
+from msl.lab_logger.retry import CircuitBreaker
+from msl.lab_logger.retry import RetryPolicy
+from msl.lab_logger.start_logging import SensorLogger
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(retry.time, 'sleep', delays.append)
+    return delays
+
+
+def _count_calls(sensor):
+    acquire = sensor.acquire
+    calls = []
+
+    def counted():
+        calls.append(1)
+        return acquire()
+
+    sensor.acquire = counted
+    return calls
+
+
+def test_delay_for():
+    policy = RetryPolicy(delay=1, max_delay=5, backoff=2, jitter=0)
+    assert [policy.delay_for(a) for a in range(1, 6)] == [1, 2, 4, 5, 5]
+
+    policy = RetryPolicy(delay=1, backoff=1, jitter=0.1)
+    assert all(0.9 <= policy.delay_for(1) <= 1.1 for _ in range(100))
+
+
+def test_retry_until_success(simulator, sleeps):
+    # the first two readings drop out and the third succeeds
+    sensor = simulator(dropout=1)
+    calls = _count_calls(sensor)
+    acquire = sensor.acquire
+
+    def flaky():
+        if len(calls) == 2:
+            sensor.dropout = 0
+        return acquire()
+
+    data = RetryPolicy(attempts=5, delay=1, backoff=2, jitter=0).call(flaky)
+    assert len(data) == sensor.channels
+    assert len(calls) == 3
+    assert sleeps == [1, 2]
+
+
+def test_retry_raises_last_exception(simulator, sleeps):
+    sensor = simulator(dropout=1)
+    calls = _count_calls(sensor)
+    with pytest.raises(TimeoutError):
+        RetryPolicy(attempts=3, delay=0.5, backoff=3, jitter=0).call(sensor.acquire)
+    assert len(calls) == 3
+    assert sleeps == [0.5, 1.5]
+
+
+def test_circuit_breaker():
+    breaker = CircuitBreaker(threshold=3, cooldown=0.05)
+    assert breaker.allow()
+    assert not breaker.failure()
+    assert not breaker.failure()
+    assert breaker.failure()
+    assert breaker.is_open
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    # the trial call fails, which re-opens the circuit
+    assert breaker.failure()
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.failures == 0
+    assert not breaker.is_open
+
+
+def test_from_config(make_config):
+    policy, breaker = retry.from_config(make_config(retry={'attempts': 4, 'delay': 2, 'threshold': 7}))
+    assert policy.attempts == 4
+    assert policy.delay == 2.0
+    assert breaker.threshold == 7
+    assert breaker.cooldown == 300.0
+
+
+def test_sensor_logger_pauses_a_failing_sensor(make_config, simulator, sleeps):
+    cfg = make_config(retry={'attempts': 2, 'delay': 0, 'threshold': 2, 'cooldown': 60})
+    sensor_logger = SensorLogger(cfg, simulator(cfg, dropout=1).record)
+    try:
+        sensor_logger.sensor.dropout = 1
+        calls = _count_calls(sensor_logger.sensor)
+        sensor_logger.log()
+        sensor_logger.log()
+        assert len(calls) == 4  # 2 attempts for each of the 2 readings
+        assert sensor_logger.breaker.is_open
+
+        # the sensor is not read while the circuit is open, even if it would succeed
+        sensor_logger.sensor.dropout = 0
+        sensor_logger.log()
+        assert len(calls) == 4
+
+        sensor_logger.breaker._opened_at -= 60
+        sensor_logger.log()
+        assert len(calls) == 5
+        assert not sensor_logger.breaker.is_open
+    finally:
+        sensor_logger.close()
+    assert len(get_data(sensor_logger.database.path)) == 1
@@ -0,0 +1,123 @@
+import sqlite3
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+
+from msl.lab_logger import revalidate as module
+from msl.lab_logger.database import Database
+from msl.lab_logger.get_data import get_data
+from msl.lab_logger.revalidate import find_databases
+from msl.lab_logger.revalidate import reimport
+from msl.lab_logger.revalidate import revalidate
+from msl.lab_logger.validators import Validator
+
+VALUES = [20.0] * 6 + [50.0] * 4
+
+
+def _log(db, values, t0=datetime(2026, 1, 1)):
+    for i, value in enumerate(values):
+        db.write((db.timestamp(t0 + timedelta(minutes=i)), value))
+    db.flush()
+
+
+def _select(path, sql):
+    cxn = sqlite3.connect(path)
+    try:
+        return cxn.execute(sql).fetchall()
+    finally:
+        cxn.close()
+
+
+@pytest.fixture
+def sensor(simulator):
+    return simulator(channels=1)
+
+
+@pytest.fixture
+def path(sensor):
+    with Database(sensor) as db:
+        _log(db, VALUES)
+    return db.path
+
+
+def _range(sensor, vmax):
+    return [Validator.find(sensor, 'simple-range', vmin=0, vmax=vmax)]
+
+
+def test_revalidate_moves_the_rejected_readings(sensor, path):
+    assert revalidate(path, _range(sensor, 30), chunk_size=3) == 4
+    assert [r[0] for r in get_data(path, as_datetime=False)] == [1, 2, 3, 4, 5, 6]
+    assert _select(path, 'SELECT pid, channel1, validator FROM rejected ORDER BY pid;') == [
+        (pid, 50.0, 'simple-range') for pid in range(7, 11)]
+    assert revalidate(path, _range(sensor, 30)) == 0
+
+
+def test_revalidate_keep(sensor, path):
+    assert revalidate(path, _range(sensor, 30), keep=True) == 4
+    assert len(get_data(path)) == 10
+    assert _select(path, 'SELECT COUNT(*) FROM rejected;') == [(4,)]
+
+    # the readings that are already in the rejected table are not copied again
+    revalidate(path, _range(sensor, 30), keep=True)
+    assert _select(path, 'SELECT COUNT(*) FROM rejected;') == [(4,)]
+    assert len(get_data(path)) == 10
+
+
+def test_reimport(sensor, path):
+    revalidate(path, _range(sensor, 30))
+    assert reimport(path, _range(sensor, 40)) == 0
+    assert reimport(path, _range(sensor, 60), chunk_size=3) == 4
+    assert [r[0] for r in get_data(path, as_datetime=False)] == list(range(1, 11))
+    assert [r[2] for r in get_data(path)] == VALUES
+    assert _select(path, 'SELECT COUNT(*) FROM rejected;') == [(0,)]
+    assert _select(path, 'SELECT id, pid FROM reimported;') == [(1, 7), (2, 8), (3, 9), (4, 10)]
+
+
+def test_reimport_without_a_pid(sensor, path):
+    # a reading that was rejected when it was written does not have a pid
+    with Database(sensor) as db:
+        db.write_rejected((db.timestamp(datetime(2026, 1, 2)), 50.0), 'simple-range')
+    assert _select(path, 'SELECT pid FROM rejected;') == [(None,)]
+
+    assert reimport(path, _range(sensor, 60)) == 1
+    assert get_data(path)[-1][0] == 11
+    assert _select(path, 'SELECT COUNT(*) FROM reimported;') == [(0,)]
+
+
+def test_find_databases(make_config, simulator, tmp_path):
+    sensor = simulator(make_config(log_dir=tmp_path / 'logs', partition='month'), channels=1)
+    with Database(sensor) as db:
+        _log(db, [20.0, 50.0], t0=datetime(2026, 1, 31, 23, 59))
+    directory = str(tmp_path / 'logs' / 'SIM-1')
+
+    serial, databases = find_databases(directory)
+    assert serial == 'SIM-1'
+    assert [p[-15:] for p in databases] == ['2026-01.sqlite3', '2026-02.sqlite3']
+    assert find_databases(databases[1]) == ('SIM-1', databases[1:])
+    assert find_databases(databases[1], serial='ABC') == ('ABC', databases[1:])
+
+    path = tmp_path / 'SIM-2.sqlite3'
+    path.touch()
+    assert find_databases(str(path)) == ('SIM-2', [str(path)])
+
+    with pytest.raises(FileNotFoundError):
+        find_databases(str(tmp_path / 'SIM-3.sqlite3'))
+    with pytest.raises(FileNotFoundError):
+        find_databases(str(tmp_path))
+
+
+def test_main_partitioned(make_config, simulator, tmp_path, monkeypatch):
+    cfg = make_config('<validators><validator name="simple-range" vmin="0" vmax="30"/></validators>',
+                      log_dir=tmp_path / 'logs', partition='month')
+    sensor = simulator(cfg, channels=1)
+    with Database(sensor) as db:
+        _log(db, [20.0, 50.0, 50.0], t0=datetime(2026, 1, 31, 23, 58))
+    monkeypatch.setattr(module, 'find_records', lambda cfg, serials: {s: sensor.record for s in serials})
+
+    module.main(cfg.path, str(tmp_path / 'logs' / 'SIM-1'))
+    directory = tmp_path / 'logs' / 'SIM-1'
+    for name, pids in [('2026-01', [2]), ('2026-02', [1])]:
+        path = str(directory / f'{name}.sqlite3')
+        assert [pid for pid, in _select(path, 'SELECT pid FROM rejected;')] == pids
+        assert all(r[2] == 20.0 for r in get_data(path))
@@ -0,0 +1,67 @@
+import threading
+import time
+
+from msl.lab_logger.database import Database
+from msl.lab_logger.get_data import _connect
+from msl.lab_logger.scheduler import LatencyStats
+from msl.lab_logger.scheduler import Scheduler
+
+
+def test_latency_stats():
+    stats = LatencyStats()
+    for value in (0.1, 0.2, 0.3):
+        stats.add(value)
+    assert stats.count == 3
+    assert abs(stats.mean - 0.2) < 1e-12
+    assert abs(stats.jitter - 0.1) < 1e-12
+    assert stats.min == 0.1
+    assert stats.max == 0.3
+
+
+def _run(scheduler, seconds):
+    thread = threading.Thread(target=scheduler.run)
+    thread.start()
+    time.sleep(seconds)
+    scheduler.stop()
+    thread.join()
+
+
+def test_latency_is_reported_periodically():
+    reports = []
+    scheduler = Scheduler(stats_interval=0.1)
+    job = scheduler.add('job', lambda: None, 0.01, report=reports.append)
+    _run(scheduler, 0.55)
+
+    assert 3 <= len(reports) <= 6
+    assert all(stats.count > 0 for stats in reports)
+    # each report covers the samples since the previous report
+    assert sum(stats.count for stats in reports) + job.window.count == job.latency.count
+
+
+def test_report_error_does_not_stop_the_job():
+    def report(stats):
+        raise RuntimeError('cannot report')
+
+    calls = []
+    scheduler = Scheduler(stats_interval=0.05)
+    scheduler.add('job', lambda: calls.append(1), 0.01, report=report)
+    _run(scheduler, 0.3)
+    assert len(calls) > 10
+
+
+def test_latency_is_written_to_the_database(simulator):
+    sensor = simulator()
+    scheduler = Scheduler(stats_interval=0.1)
+    with Database(sensor) as db:
+        scheduler.add('sim', lambda: None, 0.01, report=db.write_latency)
+        _run(scheduler, 0.35)
+
+    cxn = _connect(db.path, False)
+    try:
+        rows = cxn.execute('SELECT count, skipped, mean, jitter, min, max FROM latency;').fetchall()
+    finally:
+        cxn.close()
+    assert len(rows) >= 2
+    for count, skipped, mean, jitter, minimum, maximum in rows:
+        assert count > 0
+        assert minimum <= mean <= maximum
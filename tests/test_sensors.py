@@ -0,0 +1,54 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from msl.lab_logger.sensors import connection_alive
+
+
+def test_pool_keeps_the_connection_open(fake_sensor, fake_device):
+    for _ in range(10):
+        assert fake_sensor.acquire() == (20.1, 45.2, 8.3)
+    assert fake_device.connections == 1
+
+
+def test_pool_reconnects_if_the_device_closed_the_connection(fake_sensor, fake_device):
+    assert fake_sensor.acquire() == (20.1, 45.2, 8.3)
+    fake_device.close_clients()
+    time.sleep(0.05)
+    # the health check detects the closed connection, so the reading does not fail
+    assert fake_sensor.acquire() == (20.1, 45.2, 8.3)
+    assert fake_device.connections == 2
+
+
+def test_pool_reconnects_if_there_are_unread_bytes(fake_sensor, fake_device):
+    assert fake_sensor.acquire() == (20.1, 45.2, 8.3)
+    fake_device.send_to_clients(b'99.9,99.9,99.9\n')
+    time.sleep(0.05)
+    # the unread reply is not returned as the next reading
+    assert fake_sensor.acquire() == (20.1, 45.2, 8.3)
+    assert fake_device.connections == 2
+
+
+def test_pool_reconnects_after_an_error(fake_sensor, fake_device):
+    with pytest.raises(RuntimeError):
+        with fake_sensor.connect():
+            raise RuntimeError('reading failed')
+    assert fake_sensor.acquire() == (20.1, 45.2, 8.3)
+    assert fake_device.connections == 2
+
+
+@pytest.mark.parametrize('is_open, in_waiting, alive', [(True, 0, True), (True, 3, False), (False, 0, False)])
+def test_connection_alive_serial(is_open, in_waiting, alive):
+    connection = SimpleNamespace(serial=SimpleNamespace(is_open=is_open, in_waiting=in_waiting))
+    assert connection_alive(connection) is alive
+
+
+def test_connection_alive_other():
+    assert connection_alive(object())
+
+
+def test_find_does_not_print(simulator, capsys):
+    sensor = simulator()
+    assert type(sensor).__name__ == 'Simulator'
+    assert capsys.readouterr().out == ''
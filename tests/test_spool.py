@@ -0,0 +1,120 @@
+import logging
+import os
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+
+from msl.lab_logger import timestamps
+from msl.lab_logger.database import Database
+from msl.lab_logger.get_data import get_data
+from msl.lab_logger.schema import DatabaseTypes
+from msl.lab_logger.schema import FieldSchema
+from msl.lab_logger.spool import DATA
+from msl.lab_logger.spool import REJECTED
+from msl.lab_logger.spool import Spool
+
+T0 = datetime(2026, 4, 5, 1)
+
+
+def _write(db, minutes, value):
+    db.write((db.timestamp(T0 + timedelta(minutes=minutes)), value))
+
+
+def _item(minutes, value, kind=DATA):
+    row = (T0 + timedelta(minutes=minutes), value)
+    return (kind, row, 'range') if kind == REJECTED else (kind, row)
+
+
+@pytest.fixture
+def database(make_config, simulator):
+    db = Database(simulator(make_config(), channels=1))
+    yield db
+    db.close()
+
+
+def test_records(tmp_path):
+    schema = FieldSchema(('temperature', 'count'), (DatabaseTypes.REAL, DatabaseTypes.INTEGER))
+    path = str(tmp_path / 'SIM-1.spool')
+    spool = Spool(path, schema)
+    spool.append([(DATA, (T0, 20.5, 3)), (DATA, (T0, None, 4)), (REJECTED, (T0, 99.0, 5), 'range')])
+    assert len(spool) == 3
+    ms = timestamps.to_epoch(T0)
+    assert [item for items in spool.records() for item in items] == [
+        (DATA, ms, (20.5, 3)), (DATA, ms, (None, 4)), (REJECTED, ms, (99.0, 5), 'range')]
+    spool.close()
+
+    # a record that was partially written (the process was killed) is removed
+    with open(path, mode='ab') as fp:
+        fp.write(b'\x00' * 10)
+    spool = Spool(path, schema)
+    assert len(spool) == 3
+    spool.truncate()
+    assert len(spool) == 0
+    spool.close(remove=True)
+    assert not os.path.exists(path)
+
+
+def test_schema_changed(tmp_path):
+    path = str(tmp_path / 'SIM-1.spool')
+    Spool(path, FieldSchema(('a',), (DatabaseTypes.REAL,))).close()
+    spool = Spool(path, FieldSchema(('a', 'b'), (DatabaseTypes.REAL, DatabaseTypes.REAL)))
+    assert len(spool) == 0
+    spool.close()
+    assert len([f for f in os.listdir(tmp_path) if f.endswith('.orphan')]) == 1
+
+
+def test_corrupt_record_is_skipped(tmp_path):
+    path = str(tmp_path / 'SIM-1.spool')
+    spool = Spool(path, FieldSchema(('a',), (DatabaseTypes.REAL,)))
+    spool.append([(DATA, (T0, 1.0)), (DATA, (T0, 2.0))])
+    with open(path, mode='r+b') as fp:
+        fp.seek(-1, os.SEEK_END)
+        fp.write(b'\xff')
+    assert [item[2] for items in spool.records() for item in items] == [(1.0,)]
+    spool.close()
+
+
+def test_replay_skips_readings_in_the_database(tmp_path, database):
+    # the database has the first 3 readings, the process was killed before the spool was emptied
+    for minutes in range(3):
+        _write(database, minutes, 20.0 + minutes)
+    database.flush()
+
+    spool = Spool(str(tmp_path / 'SIM-1.spool'), database.schema)
+    spool.append([_item(minutes, 20.0 + minutes) for minutes in range(5)])
+    spool.append([_item(5, 99.0, REJECTED)])
+    assert spool.replay(database) == (3, 3)
+    assert len(spool) == 0
+    spool.close()
+
+    assert [r[2] for r in get_data(database.path)] == [20.0, 21.0, 22.0, 23.0, 24.0]
+    assert get_data(database.path, include_rejected=True)[-1][2] == 99.0
+
+
+def test_replay_after_the_clock_went_back(tmp_path, database, caplog):
+    # daylight saving time ended at 02:00 and the clock went back to 01:00, the
+    # database has the readings until 01:50 before the database became unavailable
+    for minutes in range(0, 60, 10):
+        _write(database, minutes, 20.0)
+    database.flush()
+
+    spool = Spool(str(tmp_path / 'SIM-1.spool'), database.schema)
+    spool.append([_item(40, 20.0), _item(50, 20.0)])  # already in the database
+    spool.append([_item(minutes, 21.0) for minutes in range(0, 60, 10)])  # the repeated hour
+    spool.append([_item(60, 21.0)])
+    with caplog.at_level(logging.WARNING, logger='msl-lab-logger'):
+        assert spool.replay(database) == (7, 2)
+    spool.close()
+    assert 'Wrote 6 reading(s)' in caplog.text
+
+    data = get_data(database.path)
+    assert len(data) == 13
+    assert [r[2] for r in data].count(21.0) == 7
+
+
+def test_from_config(make_config, database, tmp_path):
+    assert Spool.from_config(database, make_config()) is None
+    spool = Spool.from_config(database, make_config(spool=tmp_path / 'spool'))
+    assert spool.path == os.path.join(tmp_path / 'spool', f'{database.serial}.spool')
+    spool.close(remove=True)
@@ -0,0 +1,39 @@
+import logging
+import threading
+
+from msl.lab_logger import start_logging
+from msl.lab_logger.get_data import get_data
+
+
+class Scheduler(start_logging.Scheduler):
+
+    def run(self) -> None:
+        # stop logging after 1 second
+        threading.Timer(1, self.stop).start()
+        super().run()
+
+
+def test_sensors_are_logged_concurrently(make_config, simulator, tmp_path, monkeypatch, caplog):
+    cfg = make_config('<serials>SIM-1 SIM-2 SIM-3 SIM-4</serials>',
+                      wait=0.05, stats_interval=0, retry={'attempts': 1})
+    records = {
+        'SIM-1': simulator(cfg, serial='SIM-1').record,
+        'SIM-2': simulator(cfg, serial='SIM-2', dropout=1).record,  # every reading fails
+        'SIM-3': simulator(cfg, serial='SIM-3', latency=0.3).record,  # a reading takes longer than the wait
+        'SIM-4': None,  # not in the equipment register
+    }
+    monkeypatch.setattr(start_logging.register_cache, 'find_records', lambda cfg, serials: records)
+    monkeypatch.setattr(start_logging, 'Scheduler', Scheduler)
+    monkeypatch.setattr(start_logging.signal, 'signal', lambda signum, handler: None)
+
+    with caplog.at_level(logging.INFO, logger='msl-lab-logger'):
+        start_logging.main(cfg.path)
+
+    assert 'Cannot log serial SIM-4' in caplog.text
+    assert 'SIM-2 failed' in caplog.text
+    assert not (tmp_path / 'SIM-4.sqlite3').exists()
+    assert get_data(str(tmp_path / 'SIM-2.sqlite3')) == []
+
+    # the slow sensor and the failing sensor do not delay the other sensor
+    assert len(get_data(str(tmp_path / 'SIM-1.sqlite3'))) >= 10
+    assert 2 <= len(get_data(str(tmp_path / 'SIM-3.sqlite3'))) <= 4
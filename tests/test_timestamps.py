@@ -0,0 +1,99 @@
+from datetime import datetime
+from datetime import timedelta
+import sqlite3
+
+import pytest
+
+from msl.lab_logger import timestamps
+from msl.lab_logger.database import Database
+from msl.lab_logger.export import export
+from msl.lab_logger.get_data import get_data
+from msl.lab_logger.scheduler import LatencyStats
+
+
+def test_epoch_round_trip():
+    dt = datetime(2026, 2, 1, 2, 0, 0, 123000)
+    assert timestamps.from_epoch(timestamps.to_epoch(dt)) == dt
+
+
+@pytest.mark.parametrize('value', ['2026-02-01 02:00:00', '2026-02-01T02:00:00', datetime(2026, 2, 1, 2)])
+def test_query_value(value):
+    assert timestamps.query_value(value, timestamps.ISO) == '2026-02-01T02:00:00'
+    assert timestamps.query_value(value, timestamps.EPOCH) == timestamps.to_epoch(datetime(2026, 2, 1, 2))
+
+
+def _log(make_config, simulator, **elements):
+    if 'log_dir' in elements:
+        elements['log_dir'].mkdir()
+    sensor = simulator(make_config(**elements))
+    with Database(sensor) as db:
+        t0 = datetime(2026, 1, 31, 22)
+        for i in range(13):
+            db.write((db.timestamp(t0 + timedelta(minutes=30 * i)), *sensor.acquire()))
+    return db.directory if 'partition' in elements else db.path
+
+
+def _times(rows):
+    # the type of a timestamp depends on the format that it is stored as
+    times = []
+    for row in rows:
+        value = row[1]
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        elif isinstance(value, int):
+            value = timestamps.from_epoch(value)
+        times.append(value)
+    return times
+
+
+@pytest.mark.parametrize('start, end', [(None, '2026-02-01 02:00:00'),
+                                        ('2026-02-01 02:00:00', None),
+                                        ('2026-02-01', '2026-02-01 02:00:00'),
+                                        ('2026-01-31 23:00:00', '2026-02-01')])
+def test_same_records_for_every_format(make_config, simulator, tmp_path, start, end):
+    iso = _log(make_config, simulator, timestamp_format='iso')
+    expected = _times(get_data(iso, start=start, end=end))
+    assert expected
+
+    paths = [
+        _log(make_config, simulator, timestamp_format='epoch', log_dir=tmp_path / 'epoch'),
+        _log(make_config, simulator, partition='month', log_dir=tmp_path / 'partitioned'),
+    ]
+    export(iso, str(tmp_path / 'export.npz'))
+    paths.append(str(tmp_path / 'export.npz'))
+    for path in paths:
+        assert _times(get_data(path, start=start, end=end)) == expected, path
+
+
+def test_convert_to_epoch(make_config, simulator):
+    sensor = simulator(make_config(timestamp_format='iso'))
+    with Database(sensor) as db:
+        t0 = datetime(2026, 1, 31, 22)
+        for i in range(10):
+            row = (db.timestamp(t0 + timedelta(minutes=i)), *sensor.acquire())
+            if i % 3:
+                db.write(row)
+            else:
+                db.write_rejected(row, 'range')
+        stats = LatencyStats()
+        stats.add(0.01)
+        db.write_latency(stats)
+
+    expected = get_data(db.path, include_rejected=True)
+    assert len(expected) == 10
+    assert timestamps.convert_to_epoch(db.path)
+    assert not timestamps.convert_to_epoch(db.path)
+
+    converted = get_data(db.path, include_rejected=True)
+    assert _times(converted) == _times(expected)
+    assert [(r[0], *r[2:]) for r in converted] == [(r[0], *r[2:]) for r in expected]
+    assert _times(get_data(db.path, start='2026-01-31 22:03:00', include_rejected=True)) == _times(expected[4:])
+    cxn = sqlite3.connect(db.path)
+    try:
+        assert timestamps.timestamp_format(cxn) == timestamps.EPOCH
+        for table in ('rejected', 'latency'):
+            assert cxn.execute(f'SELECT typeof(datetime) FROM {table};').fetchone() == ('integer',)
+        indexes = {row[0] for row in cxn.execute("SELECT name FROM sqlite_master WHERE type='index';")}
+        assert {'data_datetime', 'rejected_datetime', 'rejected_pid'} <= indexes
+    finally:
+        cxn.close()
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from msl.lab_logger.validators import Validator
+
+
+def _readings(lower, upper):
+    # random readings around the bounds, the bounds themselves and NaN
+    rng = np.random.default_rng(1)
+    lower, upper = np.asarray(lower, dtype=float), np.asarray(upper, dtype=float)
+    span = upper - lower
+    values = rng.uniform(lower - span / 4, upper + span / 4, size=(200, len(lower)))
+    return np.vstack([values, lower, upper, np.full(len(lower), np.nan)])
+
+
+@pytest.mark.parametrize('name', ['simple-range', 'send-email'])
+def test_validate_many_simple_range(simulator, name):
+    validator = Validator.find(simulator(), name, vmin=19, vmax=21)
+    values = _readings([19] * 3, [21] * 3)
+    expected = np.array([validator.validate(tuple(row)) for row in values])
+    assert 0 < expected.sum() < len(values)
+    assert np.array_equal(validator.validate_many(values), expected)
+
+    # a structured array, the fields are selected by name
+    array = np.array([tuple(row) for row in values], dtype=[(f, float) for f in reversed(validator.field_names)])
+    array = array[list(validator.field_names)]
+    assert np.array_equal(validator.validate_many(array), expected)
+
+
+def test_validate_many_ithx_range_checker(fake_sensor):
+    validator = Validator.find(fake_sensor, 'ithx-range-checker', tmin=18, tmax=22, hmin=30, hmax=60, dmin=0, dmax=15)
+    values = _readings([18, 30, 0], [22, 60, 15])
+    expected = np.array([validator.validate(tuple(row)) for row in values])
+    assert 0 < expected.sum() < len(values)
+    assert np.array_equal(validator.validate_many(values), expected)
+
+
+def test_ithx_range_checker_unknown_field(simulator):
+    with pytest.raises(ValueError, match="'channel1' field"):
+        Validator.find(simulator(), 'ithx-range-checker')
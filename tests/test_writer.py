@@ -0,0 +1,162 @@
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+
+from msl.lab_logger import writer
+from msl.lab_logger.database import Database
+from msl.lab_logger.get_data import get_data
+from msl.lab_logger.spool import DATA
+from msl.lab_logger.writer import BackgroundWriter
+
+
+@pytest.fixture(autouse=True)
+def idle(monkeypatch):
+    # the writer checks the spill (and retries a failed flush) more often
+    monkeypatch.setattr(writer, '_IDLE', 0.01)
+
+
+def _row(db, i):
+    return db.timestamp(datetime(2026, 1, 1) + timedelta(seconds=i)), 20.0 + i
+
+
+def _spill(path, db, indices):
+    with open(path, mode='at', encoding='utf-8') as fp:
+        for i in indices:
+            fp.write(json.dumps((DATA, _row(db, i))) + '\n')
+
+
+def _check(path, n):
+    # every row is written once and the rows are in time order
+    rows = get_data(path, as_datetime=False)
+    assert [r[2] for r in rows] == [20.0 + i for i in range(n)]
+    assert [r[0] for r in rows] == sorted(r[0] for r in rows)
+
+
+def _lock(path):
+    db = sqlite3.connect(path, isolation_level=None)
+    db.execute('BEGIN EXCLUSIVE;')
+    return db
+
+
+@pytest.fixture
+def database(make_config, simulator):
+    db = Database(simulator(make_config(db_timeout=0.01), channels=1))
+    yield db
+    db.close()
+
+
+def test_write(database):
+    w = BackgroundWriter(database, batch_size=3)
+    for i in range(10):
+        w.write(_row(database, i))
+    w.write_rejected(_row(database, 10), 'range')
+    w.close()
+    _check(database.path, 10)
+    assert get_data(database.path, include_rejected=True)[-1][0] is None
+    assert w.stats.written == 11
+
+
+def test_written_is_counted_after_the_write(database):
+    w = BackgroundWriter(database, batch_size=1)
+    lock = _lock(database.path)
+    try:
+        for i in range(3):
+            w.write(_row(database, i))
+        time.sleep(0.1)
+        assert w.stats.errors > 0
+        assert w.stats.written == 0
+    finally:
+        lock.execute('ROLLBACK;')
+        lock.close()
+    w.write(_row(database, 3))
+    w.close()
+    _check(database.path, 4)
+    assert 0 < w.stats.written < 4
+
+
+def test_spill_while_the_database_is_locked(database):
+    w = BackgroundWriter(database, maxsize=2, batch_size=2, policy='spill')
+    lock = _lock(database.path)
+    try:
+        for i in range(20):
+            w.write(_row(database, i))
+            time.sleep(0.005)
+        time.sleep(0.2)  # the writer tries to replay the spill many times
+        assert w.stats.spilled > 0
+        assert w.stats.errors > 0
+    finally:
+        lock.execute('ROLLBACK;')
+        lock.close()
+    for i in range(20, 25):
+        w.write(_row(database, i))
+    w.close()
+    _check(database.path, 25)
+    assert not os.path.exists(w.spill_path)
+    assert not os.path.exists(w.replay_path)
+
+
+def test_replay_is_read_once(database):
+    w = BackgroundWriter(database, policy='spill')
+    # stop the thread, to replay the spill without the thread also replaying it
+    w._queue.put(None)
+    w._thread.join()
+
+    lock = _lock(database.path)
+    try:
+        _spill(w.spill_path, database, range(5))
+        w._replay_spill()
+        assert database.pending == 5
+        assert os.path.exists(w.replay_path)
+
+        # more readings are spilled while the database is locked, the
+        # readings in the replay file must not be added to the buffer again
+        _spill(w.spill_path, database, range(5, 8))
+        w._replay_spill()
+        w._replay_spill()
+        assert database.pending == 5
+    finally:
+        lock.execute('ROLLBACK;')
+        lock.close()
+
+    w.close()
+    _check(database.path, 8)
+    assert not os.path.exists(w.spill_path)
+    assert not os.path.exists(w.replay_path)
+
+
+def test_leftover_spill_is_written_first(database):
+    # the process was killed while it was replaying a spill (and had spilled more readings since)
+    _spill(f'{database.path}.spill.replay', database, range(5))
+    _spill(f'{database.path}.spill', database, range(5, 8))
+    w = BackgroundWriter(database)
+    for i in range(8, 10):
+        w.write(_row(database, i))
+    w.close()
+    _check(database.path, 10)
+    assert not os.path.exists(w.spill_path)
+    assert not os.path.exists(w.replay_path)
+
+
+def test_leftover_spill_is_written_when_closed(database):
+    lock = _lock(database.path)
+    try:
+        _spill(f'{database.path}.spill.replay', database, range(5))
+        w = BackgroundWriter(database, policy='spill')
+        time.sleep(0.1)
+        assert os.path.exists(w.replay_path)
+    finally:
+        lock.execute('ROLLBACK;')
+        lock.close()
+    w.close()
+    _check(database.path, 5)
+    assert not os.path.exists(w.replay_path)
+
+
+def test_invalid_policy(database):
+    with pytest.raises(ValueError, match='Invalid writer policy'):
+        BackgroundWriter(database, policy='ignore')
@@ -1 +1,5 @@
-from msl.lab_logger import start_logging
+import sys
+
+from msl.lab_logger.start_logging import main
+
+main(*sys.argv[1:])